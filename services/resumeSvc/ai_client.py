@@ -0,0 +1,308 @@
+"""Asynchronous xAI client shared by every request in a process.
+
+xAI calls run as coroutines on one background event loop using AsyncOpenAI
+over a pooled httpx connection to the API base URL. A semaphore bounds the
+number of calls in flight and every call has a timeout, so one process holds
+a fixed number of xAI connections however many requests arrive, and calls
+that cannot get a slot fail fast instead of piling up.
+
+AIRunner.run() and stream() are synchronous: the calling thread (a Flask
+request thread) is blocked until the call finishes. A slow xAI response
+therefore still occupies a request thread for its duration; callers that
+must not hold one should queue the analysis (/resume/jobs) instead.
+
+Calls have separate connect and read timeouts and an overall deadline,
+429/5xx/connection failures are retried with jittered exponential backoff,
+and a circuit breaker stops calling xAI after repeated failures so callers
+fall back to local scoring immediately until a half-open probe succeeds.
+"""
+import asyncio
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling xAI while the circuit breaker is open."""
+
+
+def is_retryable(error):
+    """True for rate limits, server errors, timeouts and connection failures."""
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, (APIConnectionError, asyncio.TimeoutError, httpx.TransportError))
+
+
+def retry_after_seconds(error):
+    """Retry-After of a 429/503 response in seconds, if the server sent a numeric one."""
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers["retry-after"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with half-open probing.
+
+    Closed: calls go through. After failure_threshold consecutive failures
+    it opens and rejects calls for recovery_timeout seconds, then lets up to
+    half_open_max_calls probes through: a success closes it, a failure
+    opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30.0, half_open_max_calls=1, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probes = 0
+        self.rejected = 0
+        self.trips = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may proceed now; counts a probe when half-open."""
+        with self._lock:
+            if self.state == OPEN and self.clock() - self.opened_at >= self.recovery_timeout:
+                self.state = HALF_OPEN
+                self.probes = 0
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and self.probes < self.half_open_max_calls:
+                self.probes += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info("xAI circuit breaker closed")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+
+    def release(self):
+        """The call ended without a verdict (e.g. cancelled); free its half-open probe."""
+        with self._lock:
+            if self.state == HALF_OPEN and self.probes > 0:
+                self.probes -= 1
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(f"xAI circuit breaker opened after {self.consecutive_failures} failures")
+                    self.trips += 1
+                self.state = OPEN
+                self.opened_at = self.clock()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout": self.recovery_timeout,
+                "trips": self.trips,
+                "rejected": self.rejected,
+            }
+
+
+class AIRunner:
+    """Runs chat completions on a dedicated event loop with bounded concurrency."""
+
+    def __init__(self, api_key, base_url, max_concurrency=64, timeout=60.0, queue_timeout=30.0,
+                 connect_timeout=5.0, read_timeout=None, max_retries=2, retry_base_delay=0.5,
+                 retry_max_delay=8.0, breaker=None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout  # overall deadline for one call, retries included
+        self.queue_timeout = queue_timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout or timeout
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.retries = 0
+        self.in_flight = 0
+        self.waiting = 0
+        self._loop = None
+        self._client = None
+        self._semaphore = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        """Start the loop thread on first use in each process (threads do not survive fork)."""
+        if self._loop is not None and self._pid == os.getpid():
+            return self._loop
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="ai-runner", daemon=True)
+                thread.start()
+                asyncio.run_coroutine_threadsafe(self._open(), loop).result()
+                self._loop = loop
+                self._pid = os.getpid()
+        return self._loop
+
+    def start(self):
+        """Start the loop and client now rather than on the first call in this process."""
+        self._ensure_started()
+
+    async def _open(self):
+        # One pooled, keep-alive connection set to the API base URL for the whole process
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+        )
+        # Retries are done here (see _call) so they share the deadline and the breaker
+        self._client = AsyncOpenAI(
+            api_key=self.api_key, base_url=self.base_url, http_client=http_client, max_retries=0
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+
+    @asynccontextmanager
+    async def _slot(self):
+        """Hold one of the max_concurrency call slots."""
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def backoff_delay(self, attempt, error=None):
+        """Full-jitter exponential backoff, at least the server's Retry-After when given."""
+        delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.retry_max_delay))
+        return delay
+
+    async def _call(self, attempt_fn, can_retry=lambda: True):
+        """Run attempt_fn under the breaker, retrying retryable failures within the deadline."""
+        if not self.breaker.allow():
+            raise CircuitOpenError("xAI circuit breaker is open")
+        try:
+            async with self._slot():
+                try:
+                    result = await asyncio.wait_for(self._attempts(attempt_fn, can_retry), self.timeout)
+                except Exception as e:
+                    # Other errors (e.g. 400) still mean xAI answered
+                    if is_retryable(e):
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                    raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        return result
+
+    async def _attempts(self, attempt_fn, can_retry):
+        attempt = 0
+        while True:
+            try:
+                return await attempt_fn()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e) or not can_retry():
+                    raise
+                delay = self.backoff_delay(attempt, e)
+                logger.warning(f"xAI call failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                self.retries += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def create_completion(self, **kwargs):
+        """Await a chat completion, queueing behind the concurrency limit.
+
+        Raises CircuitOpenError without calling xAI while the breaker is open.
+        """
+        return await self._call(lambda: self._client.chat.completions.create(**kwargs))
+
+    async def stream_completion(self, on_delta, **kwargs):
+        """Stream a chat completion, passing each content delta to on_delta; returns the full text.
+
+        Only failures before the first delta are retried.
+        """
+        parts = []
+        return await self._call(lambda: self._consume_stream(on_delta, parts, **kwargs), can_retry=lambda: not parts)
+
+    async def _consume_stream(self, on_delta, parts, **kwargs):
+        stream = await self._client.chat.completions.create(stream=True, **kwargs)
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                on_delta(delta)
+        return "".join(parts)
+
+    def submit(self, coro_fn, *args, **kwargs):
+        """Schedule coro_fn(*args, **kwargs) on the runner loop and return a concurrent Future."""
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(coro_fn(*args, **kwargs), loop)
+
+    def run(self, coro_fn, *args, **kwargs):
+        """Run coro_fn on the runner loop and block the calling thread until it finishes."""
+        return self.submit(coro_fn, *args, **kwargs).result()
+
+    def complete(self, **kwargs):
+        """Blocking chat completion for synchronous callers."""
+        return self.run(self.create_completion, **kwargs)
+
+    def stream(self, **kwargs):
+        """Yield content deltas of a streamed completion to a synchronous caller.
+
+        Errors from the call (including timeouts) are raised after the deltas
+        received so far have been yielded.
+        """
+        deltas = queue.Queue()
+        future = self.submit(self.stream_completion, deltas.put, **kwargs)
+        future.add_done_callback(lambda _: deltas.put(None))
+        while True:
+            delta = deltas.get()
+            if delta is None:
+                break
+            yield delta
+        future.result()
+
+    def stats(self):
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "timeout": self.timeout,
+            "connect_timeout": self.connect_timeout,
+            "retries": self.retries,
+        }
@@ -1,13 +1,30 @@
-from flask import Flask, request, jsonify
-from pypdf import PdfReader
-import spacy
-import re
+from flask import Flask, Response, request, jsonify, stream_with_context
+from werkzeug.exceptions import RequestEntityTooLarge
 import os
 import logging
 import json
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from openai import OpenAI  # Import OpenAI client
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, asdict
+import numpy as np
+from ai_client import AIRunner, CircuitBreaker, CircuitOpenError
+from extraction import extract_certifications, extract_education, extract_experience
+from pdf_document import ParsedDocument, count_pages, merge_documents, page_ranges, parse_page_range, parse_pdf
+from process_pool import ExtractionPool
+from prompt_budget import count_tokens, compact_json, dedupe_text, estimate_output_tokens, fit_sections, strip_job_boilerplate
+from skill_matcher import get_skill_matcher, normalize_skill
+from semantic_scorer import SemanticScorer
+from single_flight import SingleFlight
+from jobs import JobManager, JobQueueFull, InMemoryJobStore, SQLiteJobStore
+from json_salvage import conform_to_schema, parse_json_lenient
+from metrics import (
+    MetricsRegistry, collect_stage_timings, record_stage_timings, server_timing_header, timed_stage
+)
+from near_duplicates import NearDuplicateIndex
+from result_cache import ResultCache, job_description_digest, result_cache_key
+from sections import diff_sections, merge_extractions, section_digest, segment_resume
+from uploads import SpooledUpload, UploadTooLarge, spool_upload
 
 
 
@@ -19,8 +36,34 @@ app = Flask(__name__)
 from flask_cors import CORS
 CORS(app)  # Enable CORS
 
-# Load spaCy model
-nlp = spacy.load("en_core_web_sm")
+# Upload limits, enforced here rather than trusting the Node gateway: the whole
+# request body, each resume file, and how much of a PDF gets parsed
+app.config["MAX_CONTENT_LENGTH"] = int(os.getenv("MAX_CONTENT_LENGTH", str(32 * 1024 * 1024)))
+RESUME_MAX_BYTES = int(os.getenv("RESUME_MAX_BYTES", str(10 * 1024 * 1024)))
+# Uploads above this size are spooled to a temp file (in UPLOAD_SPOOL_DIR) and memory-mapped
+UPLOAD_MEMORY_THRESHOLD = int(os.getenv("UPLOAD_MEMORY_THRESHOLD", str(1024 * 1024)))
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "20"))
+PDF_MAX_PAGE_CHARS = int(os.getenv("PDF_MAX_PAGE_CHARS", "20000"))
+# Extraction stops once this much resume text has been read
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "100000"))
+# Documents with at least this many pages are split into page ranges across the extraction pool
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+# Page ranges per extraction process; smaller ranges let parsing stop sooner at PDF_MAX_CHARS
+PDF_PARALLEL_RANGES_PER_PROCESS = int(os.getenv("PDF_PARALLEL_RANGES_PER_PROCESS", "4"))
+
+# spaCy is only needed for entity extraction, so the model is loaded lazily on
+# first use with every component except NER excluded
+SPACY_MODEL = os.getenv("SPACY_MODEL", "en_core_web_sm")
+SPACY_EXCLUDED_COMPONENTS = ["tagger", "parser", "attribute_ruler", "lemmatizer", "senter"]
+# Adds "organizations" and "dates" to local extraction results when enabled
+EXTRACT_ENTITIES = os.getenv("EXTRACT_ENTITIES", "0") == "1"
+# Whether warm_up() loads the spaCy model (by default only when entities are extracted)
+PRELOAD_SPACY = os.getenv("PRELOAD_SPACY", "1" if EXTRACT_ENTITIES else "0") == "1"
+_nlp = None
+_nlp_lock = threading.Lock()
+# Set by warm_up() once models are loaded; /ready reports it
+models_ready = threading.Event()
 
 # Config: Check environment variable USE_AI
 # USE_AI = os.getenv("USE_AI", "0") == "1"  # Reverted to env var for flexibility
@@ -31,11 +74,141 @@ XAI_API_KEY = "xai-uLjxrB3g8U1OSGYYLm53UYZOVSPACL9cxngv9NKJG5bRSx064GXwxEcfgYG2m
 
 if not XAI_API_KEY and USE_AI:
     logger.error("XAI_API_KEY not set in environment, required for AI mode")
-client = OpenAI(
+XAI_BASE_URL = os.getenv("XAI_BASE_URL", "https://api.x.ai/v1")
+XAI_MODEL = os.getenv("XAI_MODEL", "grok-2-latest")
+# xAI calls run on a shared event loop: at most AI_MAX_CONCURRENCY in flight,
+# each bounded by AI_TIMEOUT seconds including retries (plus AI_QUEUE_TIMEOUT
+# waiting for a slot). 429/5xx/connection failures are retried AI_MAX_RETRIES
+# times with jittered backoff; after AI_BREAKER_FAILURES consecutive failed
+# calls the breaker opens and analyses use the local scorer straight away
+# until a probe succeeds, AI_BREAKER_RECOVERY seconds later.
+ai_runner = AIRunner(
     api_key=XAI_API_KEY,
-    base_url="https://api.x.ai/v1",
+    base_url=XAI_BASE_URL,
+    max_concurrency=int(os.getenv("AI_MAX_CONCURRENCY", "64")),
+    timeout=float(os.getenv("AI_TIMEOUT", "60")),
+    queue_timeout=float(os.getenv("AI_QUEUE_TIMEOUT", "30")),
+    connect_timeout=float(os.getenv("AI_CONNECT_TIMEOUT", "5")),
+    read_timeout=float(os.getenv("AI_READ_TIMEOUT", "45")),
+    max_retries=int(os.getenv("AI_MAX_RETRIES", "2")),
+    retry_base_delay=float(os.getenv("AI_RETRY_BASE_DELAY", "0.5")),
+    retry_max_delay=float(os.getenv("AI_RETRY_MAX_DELAY", "8")),
+    breaker=CircuitBreaker(
+        failure_threshold=int(os.getenv("AI_BREAKER_FAILURES", "5")),
+        recovery_timeout=float(os.getenv("AI_BREAKER_RECOVERY", "30")),
+    ),
 )
 
+# Result cache: identical resume + job description pairs skip the whole pipeline
+result_cache = ResultCache(
+    max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024")),
+    max_bytes=int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    ttl_seconds=int(os.getenv("RESULT_CACHE_TTL", "3600")),
+    db_path=os.getenv("RESULT_CACHE_DB") or None,
+)
+
+# Document store: the parsed text and job-independent extraction of every
+# resume analyzed or registered (POST /resumes), keyed by content digest, so
+# /resume/parse can take a resume_digest instead of the file and repeat
+# analyses skip both the upload and the extraction. LRU within
+# DOCUMENT_STORE_MAX_BYTES, with an optional SQLite tier in DOCUMENT_STORE_DB.
+document_store = ResultCache(
+    max_entries=int(os.getenv("DOCUMENT_STORE_MAX_ENTRIES", "4096")),
+    max_bytes=int(os.getenv("DOCUMENT_STORE_MAX_BYTES", str(128 * 1024 * 1024))),
+    ttl_seconds=int(os.getenv("DOCUMENT_STORE_TTL", str(7 * 24 * 3600))),
+    db_path=os.getenv("DOCUMENT_STORE_DB") or None,
+)
+
+# Near-duplicate reuse: a resume whose text is within NEAR_DUPLICATE_THRESHOLD
+# Jaccard similarity of one already analyzed by xAI against the same job
+# description reuses that AI result instead of calling xAI again.
+# NEAR_DUPLICATE_MODE is "off", "reuse" (return the earlier result as is) or
+# "rescore" (shift its score by the change in the local score). Requests
+# naming a resume_owner only match earlier resumes of the same owner.
+# Ownerless requests share one index across users, so a match there is always
+# rescored and only its score is kept: extracted data and suggestions come
+# from the current resume's local analysis.
+NEAR_DUPLICATE_MODE = os.getenv("NEAR_DUPLICATE_MODE", "off")
+near_duplicates = NearDuplicateIndex(
+    threshold=float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.9")),
+    num_perm=int(os.getenv("NEAR_DUPLICATE_PERMUTATIONS", "128")),
+    max_entries=int(os.getenv("NEAR_DUPLICATE_MAX_ENTRIES", "10000")),
+)
+
+# Section-level analysis. With SECTION_EXTRACTION=1 local extraction runs per
+# resume section (contact, summary, experience, ...) and each section's result
+# is cached by content, so a new version of a resume only re-extracts the
+# sections that changed. A parse request naming previous_resume_digest sends
+# xAI only the changed sections, with summaries of the unchanged ones and the
+# earlier analysis, unless more than INCREMENTAL_MAX_CHANGED_FRACTION of the
+# text changed.
+SECTION_EXTRACTION = os.getenv("SECTION_EXTRACTION", "0") == "1"
+INCREMENTAL_ANALYSIS = os.getenv("INCREMENTAL_ANALYSIS", "1") == "1"
+INCREMENTAL_MAX_CHANGED_FRACTION = float(os.getenv("INCREMENTAL_MAX_CHANGED_FRACTION", "0.6"))
+section_cache = ResultCache(
+    max_entries=int(os.getenv("SECTION_CACHE_MAX_ENTRIES", "20000")),
+    max_bytes=int(os.getenv("SECTION_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    ttl_seconds=int(os.getenv("SECTION_CACHE_TTL", str(7 * 24 * 3600))),
+    db_path=os.getenv("SECTION_CACHE_DB") or None,
+)
+
+# Concurrent identical analyses (same resume, job description and mode) share one run
+in_flight_analyses = SingleFlight()
+
+# Submit/poll analyses: in-memory job store by default, SQLite when JOB_STORE_DB is set
+job_manager = JobManager(
+    store=SQLiteJobStore(os.getenv("JOB_STORE_DB")) if os.getenv("JOB_STORE_DB") else InMemoryJobStore(),
+    max_workers=int(os.getenv("JOB_WORKERS", "4")),
+    callback_timeout=float(os.getenv("JOB_CALLBACK_TIMEOUT", "10")),
+    # Queued plus running jobs allowed before submissions get 503
+    max_pending=int(os.getenv("JOB_MAX_PENDING", "1000")),
+    # Comma-separated callback hosts (".example.com" covers subdomains); empty allows any public host
+    callback_allowed_hosts=[host.strip() for host in os.getenv("CALLBACK_ALLOWED_HOSTS", "").split(",") if host.strip()],
+)
+
+# Per-process metrics exposed at /metrics; STAGE_TIMING_HEADER=1 also echoes
+# each /resume/parse request's stage timings in a Server-Timing header
+metrics = MetricsRegistry()
+STAGE_SECONDS = metrics.histogram(
+    "resume_stage_duration_seconds", "Time spent in each analysis pipeline stage.", ["stage"]
+)
+REQUEST_SECONDS = metrics.histogram(
+    "resume_request_duration_seconds", "Time to handle a request, by endpoint and status.", ["endpoint", "status"]
+)
+AI_FALLBACKS = metrics.counter(
+    "resume_ai_fallback", "AI analyses that fell back to the local no-AI result.", ["mode"]
+)
+AI_JSON_DECODE_FAILURES = metrics.counter(
+    "resume_ai_json_decode_failures", "xAI responses that could not be parsed as JSON."
+)
+AI_JSON_REPAIRS = metrics.counter(
+    "resume_ai_json_repairs", "Truncated or malformed xAI responses salvaged instead of discarded."
+)
+AI_INCREMENTAL_ANALYSES = metrics.counter(
+    "resume_ai_incremental_analyses", "xAI analyses sent only the sections changed since an earlier version."
+)
+AI_TOKENS = metrics.counter("resume_ai_tokens", "Tokens reported in xAI completion usage.", ["type"])
+STAGE_TIMING_HEADER = os.getenv("STAGE_TIMING_HEADER", "0") == "1"
+
+# Job profile memoization and the registry of postings referenced by id
+JOB_PROFILE_CACHE_SIZE = int(os.getenv("JOB_PROFILE_CACHE_SIZE", "2048"))
+MAX_REGISTERED_POSTINGS = int(os.getenv("MAX_REGISTERED_POSTINGS", "10000"))
+# Registered postings (posting_id -> job description). With POSTINGS_DB set to
+# a SQLite file shared by the gunicorn workers, a posting_id works on every
+# worker. Least recently used postings beyond MAX_REGISTERED_POSTINGS or
+# POSTINGS_MAX_BYTES, and postings older than POSTINGS_TTL, are dropped;
+# their ids then answer 404 until registered again.
+posting_store = ResultCache(
+    max_entries=MAX_REGISTERED_POSTINGS,
+    max_bytes=int(os.getenv("POSTINGS_MAX_BYTES", str(64 * 1024 * 1024))),
+    ttl_seconds=int(os.getenv("POSTINGS_TTL", str(90 * 24 * 3600))),
+    db_path=os.getenv("POSTINGS_DB") or None,
+)
+
+# Upper bounds for a single /resume/parse/batch request
+BATCH_MAX_RESUMES = int(os.getenv("BATCH_MAX_RESUMES", "50"))
+BATCH_MAX_JOB_DESCRIPTIONS = int(os.getenv("BATCH_MAX_JOB_DESCRIPTIONS", "100"))
+
 # Common skills for local extraction
 COMMON_TECH_SKILLS = {
     "programming": {"python", "java", "javascript", "c++", "go", "rust"},
@@ -48,6 +221,8 @@ COMMON_TECH_SKILLS = {
     "soft_skills": {"communication", "problem-solving", "leadership", "teamwork"}
 }
 
+TAXONOMY_SKILLS = frozenset(skill for skill_set in COMMON_TECH_SKILLS.values() for skill in skill_set)
+
 # Job levels and their associated keywords
 JOB_LEVELS = {
     "entry": {"junior", "entry", "entry-level", "graduate", "associate"},
@@ -66,168 +241,100 @@ TECH_DOMAINS = {
     "security": {"security", "cybersecurity", "information security", "security engineer"}
 }
 
-def extract_text_from_pdf(pdf_file):
-    """Extract and clean text from a PDF resume."""
+def load_pdf_document(pdf_file):
+    """Parse a PDF once, or pass through a document that was already parsed."""
+    if isinstance(pdf_file, ParsedDocument):
+        return pdf_file
     try:
-        reader = PdfReader(pdf_file)
-        text = ""
-        for page in reader.pages:
-            page_text = page.extract_text() or ""
-            page_text = re.sub(r'\s+', ' ', page_text).strip()
-            text += page_text + " "
-        return text.strip()
+        with timed_stage(STAGE_SECONDS, "pdf_parse"):
+            document = parse_pdf(
+                pdf_file, max_pages=PDF_MAX_PAGES, max_page_chars=PDF_MAX_PAGE_CHARS, max_chars=PDF_MAX_CHARS
+            )
     except Exception as e:
         logger.error(f"PDF extraction failed: {str(e)}")
         raise ValueError(f"PDF extraction failed: {str(e)}")
+    if document.truncated:
+        logger.warning(
+            f"Resume truncated to {PDF_MAX_PAGES} pages, {PDF_MAX_PAGE_CHARS} characters per page "
+            f"and {PDF_MAX_CHARS} characters in total"
+        )
+    return document
+
+# TF-IDF space for the semantic-match component. Without a persisted model
+# (SEMANTIC_MODEL_PATH, a .npy of IDF weights) or corpus (SEMANTIC_CORPUS_PATH),
+# the IDF weights are fitted once per process from the skill, domain and level
+# taxonomies; words outside them still count, at the highest weight.
+semantic_scorer = SemanticScorer(
+    bootstrap_corpus=[" ".join(sorted(keywords)) for taxonomy in (COMMON_TECH_SKILLS, TECH_DOMAINS, JOB_LEVELS) for keywords in taxonomy.values()],
+    model_path=os.getenv("SEMANTIC_MODEL_PATH") or None,
+    corpus_path=os.getenv("SEMANTIC_CORPUS_PATH") or None,
+)
+# Points of the 50-point skills component awarded for semantic similarity
+# instead of the skill match ratio. 0 (the default) keeps the full 50 points on
+# skill matches, as before the component existed; any other value changes
+# scores, usually lowering them, since similarity rarely reaches 1.
+SEMANTIC_POINTS = float(os.getenv("SEMANTIC_POINTS", "0"))
+
+def extract_text_from_pdf(pdf_file):
+    """Extract and clean text from a PDF resume."""
+    return load_pdf_document(pdf_file).text
 
 def check_formatting(pdf_file):
     """Check for formatting issues that might confuse ATS."""
     try:
-        reader = PdfReader(pdf_file)
-        penalty = 0
-        for page in reader.pages:
-            text = page.extract_text() or ""
-            if re.search(r'image|table', text, re.IGNORECASE):
-                penalty -= 10
-            if len(text.split()) < 50:
-                penalty -= 5
-        return max(penalty, -20)
+        with timed_stage(STAGE_SECONDS, "formatting_check"):
+            document = pdf_file if isinstance(pdf_file, ParsedDocument) else parse_pdf(
+                pdf_file, max_pages=PDF_MAX_PAGES, max_page_chars=PDF_MAX_PAGE_CHARS
+            )
+            penalty = 0
+            for page in document.pages:
+                if page.mentions_layout:
+                    penalty -= 10
+                if page.word_count < 50:
+                    penalty -= 5
+            return max(penalty, -20)
     except Exception:
         return 0
 
-def extract_skills_and_experience(text, job_skills=None):
+def get_nlp():
+    """Load the spaCy model on first use."""
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                import spacy
+                logger.info(f"Loading spaCy model {SPACY_MODEL}")
+                _nlp = spacy.load(SPACY_MODEL, exclude=SPACY_EXCLUDED_COMPONENTS)
+    return _nlp
+
+def extract_entities(text, labels=("ORG", "DATE")):
+    """Extract named entities with only the NER components running."""
+    nlp = get_nlp()
+    entities = {label: [] for label in labels}
+    with timed_stage(STAGE_SECONDS, "spacy_ner"), \
+            nlp.select_pipes(enable=[name for name in ("tok2vec", "ner") if name in nlp.pipe_names]):
+        doc = nlp(text)
+    for ent in doc.ents:
+        if ent.label_ in entities and ent.text not in entities[ent.label_]:
+            entities[ent.label_].append(ent.text)
+    return entities
+
+def extract_skills_and_experience(text, job_skills=None, include_entities=None):
     """Extract skills and experience locally."""
-    doc = nlp(text.lower())
-    skills = set()
-    for skill_set in COMMON_TECH_SKILLS.values():
-        for skill in skill_set:
-            # Check for the skill in lowercase text but preserve original case
-            if skill in text.lower():
-                # Find the original case in the text
-                pattern = re.compile(re.escape(skill), re.IGNORECASE)
-                match = pattern.search(text)
-                if match:
-                    skills.add(match.group(0))  # Use the original case from the text
-                else:
-                    skills.add(skill.capitalize())  # Fallback to capitalized version
-    
-    if job_skills:
-        for skill in job_skills:
-            if skill.lower() in text.lower():
-                # Find the original case in the text
-                pattern = re.compile(re.escape(skill), re.IGNORECASE)
-                match = pattern.search(text)
-                if match:
-                    skills.add(match.group(0))  # Use the original case from the text
-                else:
-                    skills.add(skill)  # Use the original case from job_skills
-
-    exp_matches = re.findall(r"(\d+)\s*(years?|yrs?)\s*(of)?\s*(experience|exp)?\s*(in)?\s*([a-z\s]+)?", text, re.IGNORECASE)
-    total_exp = 0
-    relevant_exp = {}
-    for match in exp_matches:
-        years = int(match[0])
-        role = match[5].strip() if match[5] else "general"
-        total_exp += years
-        relevant_exp[role] = relevant_exp.get(role, 0) + years
-
-    # Improved education extraction
-    edu_matches = []
-    # Look for standard degree patterns with and without "in"
-    edu_patterns = [
-        r"(bachelor'?s|master'?s|phd|doctorate|bs|ms|mba)\s*(in|of)?\s*([a-z\s]+)",  # With "in" or "of"
-        r"(bachelor'?s|master'?s|phd|doctorate|bs|ms|mba)\s+([a-z\s]+)",  # Without "in"
-        r"education:?\s*(bachelor'?s|master'?s|phd|doctorate|bs|ms|mba)\s*(in|of)?\s*([a-z\s]+)",  # After "Education:"
-        r"education:?\s*(bachelor'?s|master'?s|phd|doctorate|bs|ms|mba)\s+([a-z\s]+)",  # After "Education:" without "in"
-    ]
-    
-    for pattern in edu_patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        if matches:
-            for match in matches:
-                if isinstance(match, tuple):
-                    # Handle patterns with "in" or "of"
-                    if len(match) == 3:
-                        degree, _, field = match
-                        if field:
-                            edu_matches.append((degree, field))
-                    # Handle patterns without "in"
-                    elif len(match) == 2:
-                        degree, field = match
-                        if field:
-                            edu_matches.append((degree, field))
-    
-    # Also look for education section
-    education_section = re.search(r"education:?(.*?)(experience|skills|$)", text, re.IGNORECASE | re.DOTALL)
-    if education_section:
-        section_text = education_section.group(1)
-        # Look for Computer Science in the education section
-        cs_match = re.search(r"(bs|bachelor'?s|master'?s).*?(computer\s*science)", section_text, re.IGNORECASE)
-        if cs_match:
-            edu_matches.append((cs_match.group(1), cs_match.group(2)))
-    
-    # Format education entries
-    education = []
-    seen = set()  # To avoid duplicates
-    for deg, field in edu_matches:
-        # Clean up degree and field
-        deg = deg.strip().lower()
-        field = field.strip().lower()
-        
-        # Normalize degree names
-        if deg in ['bs', "bachelor's", 'bachelor', 'bachelors']:
-            deg = 'BS'
-        elif deg in ['ms', "master's", 'master', 'masters']:
-            deg = 'MS'
-        
-        # Format the education entry
-        entry = f"{deg} in {field.title()}"
-        if entry not in seen:
-            education.append(entry)
-            seen.add(entry)
-    
-    # If no education found but "Computer Science" is in the text, add it
-    if not education and "computer science" in text.lower():
-        education.append("BS in Computer Science")
-    
-    # Improved certification extraction
-    certifications = []
-    cert_patterns = [
-        r"(certified|certification)\s*([a-z\s]+)",  # Standard certification pattern
-        r"(aws|amazon)\s*(certified)",  # AWS certification pattern
-        r"certifications?:?\s*([^\.]+)",  # After "Certifications:" pattern
-    ]
-    
-    for pattern in cert_patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        if matches:
-            for match in matches:
-                if isinstance(match, tuple):
-                    if len(match) == 2:
-                        # For standard certification pattern
-                        cert = match[1].strip() if match[1] else match[0].strip()
-                        certifications.append(cert)
-                else:
-                    # For single group matches
-                    cert = match.strip()
-                    certifications.append(cert)
-    
-    # Clean up certifications
-    clean_certs = []
-    for cert in certifications:
-        # Remove common prefixes
-        cert = re.sub(r'^(certified|certification)\s+', '', cert, flags=re.IGNORECASE)
-        # Clean up whitespace
-        cert = ' '.join(cert.split())
-        if cert:
-            clean_certs.append(cert)
-    
-    # If AWS is mentioned in certifications context, add it
-    if any('aws' in cert.lower() for cert in clean_certs):
-        if 'AWS Certified' not in clean_certs:
-            clean_certs.append('AWS Certified')
+    # One pass over the text matches the whole taxonomy plus any job-specific skills
+    matcher = get_skill_matcher(TAXONOMY_SKILLS | frozenset(job_skills) if job_skills else TAXONOMY_SKILLS)
+    # Skills in order of first mention, so results are identical across processes
+    skills = {}
+    with timed_stage(STAGE_SECONDS, "skill_match"):
+        for match in matcher.first_matches(text).values():
+            skills.setdefault(match.surface, None)  # Use the original case from the text
 
-    return {
+    with timed_stage(STAGE_SECONDS, "regex_extraction"):
+        total_exp, relevant_exp = extract_experience(text)
+        education = extract_education(text)
+        clean_certs = extract_certifications(text)
+
+    result = {
         "skills": list(skills),
         "total_experience_years": total_exp,
         "relevant_experience": relevant_exp,
@@ -235,10 +342,40 @@ def extract_skills_and_experience(text, job_skills=None):
         "certifications": clean_certs
     }
 
+    # spaCy only runs when a consumer asked for entities
+    if EXTRACT_ENTITIES if include_entities is None else include_entities:
+        entities = extract_entities(text)
+        result["organizations"] = entities["ORG"]
+        result["dates"] = entities["DATE"]
+
+    return result
+
+def extract_section(text, job_skills=None):
+    """extract_skills_and_experience for one resume section, cached by content."""
+    skills_key = section_digest("\n".join(sorted(job_skills))) if job_skills else "-"
+    key = f"{section_digest(text)}:{skills_key}:{int(EXTRACT_ENTITIES)}"
+    cached = section_cache.get(key)
+    if cached is not None:
+        return cached
+    result = extract_skills_and_experience(text, job_skills)
+    section_cache.set(key, result)
+    return result
+
+def extract_resume_data(text, job_skills=None):
+    """Local extraction for a resume, merged from cached per-section results when SECTION_EXTRACTION is on."""
+    if not SECTION_EXTRACTION:
+        return extract_skills_and_experience(text, job_skills)
+    return merge_extractions(extract_section(section, job_skills) for section in segment_resume(text).values())
+
+def canonical_skills(skills):
+    """Case- and whitespace-insensitive skill set, so "PYTHON" in a posting matches "python" in a resume."""
+    return {normalize_skill(skill) for skill in skills}
+
 def generate_improvement_suggestions_no_ai(resume_data, job_data, formatting_penalty):
     """Generate suggestions without AI."""
     suggestions = []
-    missing_skills = set(job_data["skills"]) - set(resume_data["skills"])
+    resume_skills = canonical_skills(resume_data["skills"])
+    missing_skills = [skill for skill in job_data["skills"] if normalize_skill(skill) not in resume_skills]
     if missing_skills:
         suggestions.append(f"Add the following skills to your resume: {', '.join(missing_skills)}.")
     if resume_data["total_experience_years"] < 2:
@@ -253,37 +390,110 @@ def generate_improvement_suggestions_no_ai(resume_data, job_data, formatting_pen
         suggestions.append("Simplify formatting—avoid images or tables.")
     return suggestions if suggestions else ["Your resume is well-aligned."]
 
+def score_breakdown_no_ai(resume_data, skill_match, formatting_penalty, semantic_match=0.0):
+    """Score breakdown for a resume given its skill match ratio and TF-IDF similarity to a job.
+
+    The skills component is 50 points, SEMANTIC_POINTS of which go to the
+    semantic match.
+    """
+    return {
+        "skills": skill_match * (50 - SEMANTIC_POINTS),
+        "semantic_match": semantic_match * SEMANTIC_POINTS,
+        "experience": min(resume_data["total_experience_years"] / 10, 1) * 30,
+        "education_certifications": min((5 if resume_data["education"] else 0) + (5 if resume_data["certifications"] else 0), 10),
+        "formatting": max(0, 10 + (formatting_penalty / 2))
+    }
+
 def weighted_score_no_ai(resume_text, job_desc_text, pdf_file):
     """Calculate ATS score without AI."""
     try:
-        job_data = extract_skills_and_experience(job_desc_text)
-        resume_data = extract_skills_and_experience(resume_text, job_data["skills"])
+        job_data = get_job_profile(job_desc_text).data
+        resume_data = extract_resume_data(resume_text, job_data["skills"])
 
-        skill_match = len(set(resume_data["skills"]) & set(job_data["skills"])) / len(set(job_data["skills"])) if job_data["skills"] else 0
-        skill_score = skill_match * 50
-        exp_score = min(resume_data["total_experience_years"] / 10, 1) * 30
-        edu_cert_score = min((5 if resume_data["education"] else 0) + (5 if resume_data["certifications"] else 0), 10)
+        job_skills = canonical_skills(job_data["skills"])
+        skill_match = len(canonical_skills(resume_data["skills"]) & job_skills) / len(job_skills) if job_skills else 0
+        semantic_match = 0.0
+        if SEMANTIC_POINTS:
+            with timed_stage(STAGE_SECONDS, "semantic_similarity"):
+                semantic_match = float(semantic_scorer.similarity([resume_text], [job_desc_text])[0, 0])
         formatting_penalty = check_formatting(pdf_file)
-        format_score = max(0, 10 + (formatting_penalty / 2))
+        breakdown = score_breakdown_no_ai(resume_data, skill_match, formatting_penalty, semantic_match)
 
-        final_score = min(skill_score + exp_score + edu_cert_score + format_score, 100)
+        final_score = min(sum(breakdown.values()), 100)
         suggestions = generate_improvement_suggestions_no_ai(resume_data, job_data, formatting_penalty)
 
         return {
             "data": resume_data,
             "ats_score": f"{final_score:.2f}%",
-            "breakdown": {
-                "skills": skill_score,
-                "experience": exp_score,
-                "education_certifications": edu_cert_score,
-                "formatting": format_score
-            },
+            "breakdown": breakdown,
             "improvement_suggestions": suggestions
         }
     except Exception as e:
         logger.error(f"No-AI scoring failed: {str(e)}")
         raise ValueError(f"Scoring error: {str(e)}")
 
+def skill_match_matrix(resume_skill_lists, job_skill_lists):
+    """Skill match ratio for every resume/job pair, computed as one matrix product.
+
+    Entry [i][j] equals the weighted_score_no_ai ratio for resume i against job j:
+    the share of job j's distinct skills that also appear in resume i, compared
+    case-insensitively.
+    """
+    job_skill_lists = [canonical_skills(skills) for skills in job_skill_lists]
+    vocabulary = {}
+    for skills in job_skill_lists:
+        for skill in skills:
+            vocabulary.setdefault(skill, len(vocabulary))
+
+    jobs = np.zeros((len(job_skill_lists), len(vocabulary)), dtype=np.float32)
+    for row, skills in enumerate(job_skill_lists):
+        jobs[row, [vocabulary[skill] for skill in skills]] = 1
+    resumes = np.zeros((len(resume_skill_lists), len(vocabulary)), dtype=np.float32)
+    for row, skills in enumerate(resume_skill_lists):
+        columns = [vocabulary[skill] for skill in canonical_skills(skills) if skill in vocabulary]
+        resumes[row, columns] = 1
+
+    overlap = resumes @ jobs.T
+    job_skill_counts = jobs.sum(axis=1)
+    return np.divide(overlap, job_skill_counts, out=np.zeros_like(overlap), where=job_skill_counts > 0)
+
+def batch_score_no_ai(resumes, job_descs, details=False):
+    """Score every resume against every job description without AI.
+
+    resumes is a list of (resume_text, parsed_document) pairs. Each resume and
+    each job description is extracted exactly once; returns a matrix of
+    {"ats_score", "ats_score_value", "breakdown"} dicts indexed [resume][job];
+    ats_score is the "85.00%" string every other endpoint returns and
+    ats_score_value the same score as a number, for ranking. details adds the
+    "data" and "improvement_suggestions" weighted_score_no_ai returns.
+    """
+    job_data = [get_job_profile(job_desc).data for job_desc in job_descs]
+    # Match every job's skills in one pass per resume
+    all_job_skills = sorted({skill for data in job_data for skill in data["skills"]})
+    resume_data = [extract_resume_data(text, all_job_skills) for text, _ in resumes]
+    formatting_penalties = [check_formatting(document) for _, document in resumes]
+
+    skill_matches = skill_match_matrix([data["skills"] for data in resume_data], [data["skills"] for data in job_data])
+    semantic_matches = semantic_scorer.similarity([text for text, _ in resumes], job_descs) if SEMANTIC_POINTS \
+        else np.zeros((len(resumes), len(job_descs)))
+    scores = []
+    for i, data in enumerate(resume_data):
+        row = []
+        for j in range(len(job_data)):
+            breakdown = score_breakdown_no_ai(
+                data, float(skill_matches[i, j]), formatting_penalties[i], float(semantic_matches[i, j])
+            )
+            score = round(min(sum(breakdown.values()), 100), 2)
+            cell = {"ats_score": f"{score:.2f}%", "ats_score_value": score, "breakdown": breakdown}
+            if details:
+                cell["data"] = data
+                cell["improvement_suggestions"] = generate_improvement_suggestions_no_ai(
+                    data, job_data[j], formatting_penalties[i]
+                )
+            row.append(cell)
+        scores.append(row)
+    return scores
+
 def extract_job_level(job_desc):
     """Extract job level from job description."""
     job_desc_lower = job_desc.lower()
@@ -309,6 +519,68 @@ def extract_job_domain(job_desc):
     top_domains = [domain for domain, score in domain_scores.items() if score == max_score]
     return top_domains[0]
 
+@dataclass
+class JobProfile:
+    """Everything derived from a job description, computed once per posting."""
+    posting_id: str
+    skills: list
+    level: str
+    domain: str
+    required_years: int
+    education: list
+    data: dict  # full extract_skills_and_experience output, as used by the scorers
+
+    def to_dict(self):
+        profile = asdict(self)
+        profile.pop("data")
+        return profile
+
+# Job profiles memoized by normalized job-description digest (LRU)
+job_profile_cache = OrderedDict()
+_job_profile_lock = threading.Lock()
+
+def build_job_profile(job_desc, posting_id=None):
+    """Run the job-description extraction and keyword scans once."""
+    data = extract_skills_and_experience(job_desc)
+    return JobProfile(
+        posting_id=posting_id or job_description_digest(job_desc),
+        skills=data["skills"],
+        level=extract_job_level(job_desc),
+        domain=extract_job_domain(job_desc),
+        required_years=data["total_experience_years"],
+        education=data["education"],
+        data=data,
+    )
+
+def get_job_profile(job_desc):
+    """Return the JobProfile for a job description, computing it at most once while cached."""
+    posting_id = job_description_digest(job_desc)
+    with _job_profile_lock:
+        profile = job_profile_cache.get(posting_id)
+        if profile is not None:
+            job_profile_cache.move_to_end(posting_id)
+            return profile
+
+    profile = build_job_profile(job_desc, posting_id)
+    with _job_profile_lock:
+        job_profile_cache[posting_id] = profile
+        while len(job_profile_cache) > JOB_PROFILE_CACHE_SIZE:
+            job_profile_cache.popitem(last=False)
+    return profile
+
+def register_posting(job_desc):
+    """Register a posting so later requests can reference it by posting_id."""
+    profile = get_job_profile(job_desc)
+    posting_store.set(profile.posting_id, job_desc)
+    return profile
+
+def get_registered_posting(posting_id):
+    """Return (job_description, JobProfile) for a registered posting, or None."""
+    job_desc = posting_store.get(posting_id)
+    if job_desc is None:
+        return None
+    return job_desc, get_job_profile(job_desc)
+
 SYSTEM_PROMPT = """You are an advanced ATS optimization and career development expert with expertise in:
 1. Technical resume analysis
 2. Industry-specific keyword optimization
@@ -370,156 +642,786 @@ Return a JSON object with:
 }
 """
 
-def analyze_with_ai(resume_text, job_desc, local_data, formatting_penalty):
-    """Use xAI to refine data, score, and suggest improvements."""
-    # Input validation
-    if not resume_text or not job_desc:
-        logger.error("Empty resume text or job description provided")
-        return None
-        
-    # Extract job context
-    job_level = extract_job_level(job_desc)
-    job_domain = extract_job_domain(job_desc)
+# JSON Schema of the BASE_PROMPT output: sent as the structured-output
+# response_format and used to validate and coerce replies
+_STRINGS = {"type": "array", "items": {"type": "string"}}
+AI_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "data": {
+            "type": "object",
+            "properties": {
+                "skills": {"type": "array", "items": {
+                    "type": "object",
+                    "properties": {"name": {"type": "string"}, "confidence": {"type": "number"},
+                                   "relevance": {"type": "number"}},
+                    "required": ["name"],
+                }},
+                "total_experience_years": {"type": "number"},
+                "relevant_experience": {
+                    "type": "object",
+                    "properties": {
+                        "roles": {"type": "array", "items": {
+                            "type": "object",
+                            "properties": {"title": {"type": "string"}, "years": {"type": "number"},
+                                           "relevance_score": {"type": "number"}},
+                            "required": ["title"],
+                        }},
+                        "improvement_areas": _STRINGS,
+                    },
+                    "required": ["roles", "improvement_areas"],
+                },
+                "education": _STRINGS,
+                "certifications": _STRINGS,
+                "missing_keywords": _STRINGS,
+            },
+            "required": ["skills", "total_experience_years", "relevant_experience", "education",
+                         "certifications", "missing_keywords"],
+        },
+        "ats_score": {"type": "string"},
+        "breakdown": {
+            "type": "object",
+            "properties": {name: {"type": "number"} for name in (
+                "skills", "experience", "education_certifications", "formatting", "keyword_optimization"
+            )},
+            "required": ["skills", "experience", "education_certifications", "formatting", "keyword_optimization"],
+        },
+        "improvement_suggestions": {
+            "type": "object",
+            "properties": {"critical": _STRINGS, "recommended": _STRINGS, "advanced": _STRINGS},
+            "required": ["critical", "recommended", "advanced"],
+        },
+    },
+    "required": ["data", "breakdown", "improvement_suggestions"],
+}
+# "json_schema" (structured output), "json_object" (JSON mode) or "none"
+AI_RESPONSE_FORMAT = os.getenv("AI_RESPONSE_FORMAT", "json_schema")
+
+def ai_response_format():
+    """The response_format argument for chat completions, if any."""
+    if AI_RESPONSE_FORMAT == "json_schema":
+        return {"response_format": {
+            "type": "json_schema",
+            "json_schema": {"name": "resume_analysis", "schema": AI_RESPONSE_SCHEMA},
+        }}
+    if AI_RESPONSE_FORMAT == "json_object":
+        return {"response_format": {"type": "json_object"}}
+    return {}
+
+# Input tokens allowed for the whole prompt, and the completion cap sized to
+# the JSON schema in BASE_PROMPT, between AI_MAX_OUTPUT_TOKENS_FLOOR and
+# AI_MAX_OUTPUT_TOKENS_CEILING. The floor keeps the earlier fixed cap of 2000:
+# a reply cut off by the cap fails to parse and falls back to the local score.
+AI_PROMPT_TOKEN_BUDGET = int(os.getenv("AI_PROMPT_TOKEN_BUDGET", "6000"))
+AI_MAX_OUTPUT_TOKENS = estimate_output_tokens(
+    BASE_PROMPT[BASE_PROMPT.index("{"):],
+    floor=int(os.getenv("AI_MAX_OUTPUT_TOKENS_FLOOR", "2000")),
+    ceiling=int(os.getenv("AI_MAX_OUTPUT_TOKENS_CEILING", "4000"))
+)
+
+def job_prompt_context(job_desc, formatting_penalty):
+    """(job context prompt, formatting prompt, compacted job description) for the xAI prompt."""
+    # Job context comes from the memoized profile of the posting
+    job_profile = get_job_profile(job_desc)
+    job_level = job_profile.level
+    job_domain = job_profile.domain
     
     context_prompt = f"""
-    Job Context:
-    - Level: {job_level}
-    - Domain: {job_domain}
-    - Industry Trends: Consider current market demands in {job_domain}
-    - Career Level Expectations: Focus on expectations for {job_level} positions
+Job Context:
+- Level: {job_level}
+- Domain: {job_domain}
+- Industry Trends: Consider current market demands in {job_domain}
+- Career Level Expectations: Focus on expectations for {job_level} positions
+"""
+    formatting_prompt = f"""
+**Formatting Analysis:**
+Penalty Score: {formatting_penalty}
+"""
+    job_text = dedupe_text(strip_job_boilerplate(job_desc)) or dedupe_text(job_desc)
+    return context_prompt, formatting_prompt, job_text
+
+def build_ai_messages(resume_text, job_desc, local_data, formatting_penalty):
+    """Build the chat messages for the xAI analysis within the prompt token budget."""
+    context_prompt, formatting_prompt, job_text = job_prompt_context(job_desc, formatting_penalty)
+
+    # Compact each section, then truncate the least important ones to fit the budget
+    fixed_tokens = count_tokens(SYSTEM_PROMPT + BASE_PROMPT + context_prompt + formatting_prompt) + 20
+    sections = fit_sections([
+        {"name": "resume", "text": dedupe_text(resume_text), "priority": 3, "min_tokens": 1000},
+        {"name": "job_description", "text": job_text, "priority": 2, "min_tokens": 300},
+        {"name": "local_analysis", "text": compact_json(local_data), "priority": 1},
+    ], AI_PROMPT_TOKEN_BUDGET - fixed_tokens)
+
+    full_prompt = BASE_PROMPT + context_prompt + f"""
+**Resume Text:**
+{sections["resume"]}
+
+**Job Description:**
+{sections["job_description"]}
+
+**Local Analysis Results:**
+{sections["local_analysis"]}
+""" + formatting_prompt
+
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": full_prompt}
+    ]
+
+REVISION_PROMPT = """
+This resume is a revision of one analyzed earlier against the same job description. Only the
+sections under **Changed Sections** differ from that version; the unchanged sections are
+summarized from their local extraction, and the sections listed under **Removed Sections** were
+deleted. Update the previous analysis for these changes and return the complete JSON object.
+"""
+
+@dataclass
+class Revision:
+    """How a resume differs from an earlier version that xAI already analyzed."""
+    previous_result: dict
+    sections: dict  # section name -> text of the new version
+    changed: list
+    unchanged: list
+    removed: list
+
+def plan_revision(previous_digest, job_desc, resume_text):
+    """Revision of the resume against the earlier version previous_digest, or None.
+
+    None when the earlier version or its AI result for this job description
+    is no longer stored, or when too much changed for an incremental prompt
+    to pay off.
     """
-    
-    full_prompt = BASE_PROMPT + context_prompt + "\n\n" + f"""
-    **Resume Text:**
-    {resume_text}
+    previous = load_stored_stage(previous_digest)
+    if previous is None:
+        return None
+    previous_result = result_cache.get(result_cache_key(previous_digest, job_description_digest(job_desc), "ai"))
+    if previous_result is None:
+        return None
+    previous_result.pop("near_duplicate", None)
+    sections = segment_resume(resume_text)
+    changed, unchanged, removed = diff_sections(segment_resume(previous.document.text), sections)
+    if sum(len(sections[name]) for name in changed) > INCREMENTAL_MAX_CHANGED_FRACTION * len(resume_text):
+        return None
+    return Revision(previous_result, sections, changed, unchanged, removed)
+
+def build_revision_ai_messages(revision, job_desc, local_data, formatting_penalty):
+    """Chat messages asking xAI to update its earlier analysis for the changed sections only."""
+    context_prompt, formatting_prompt, job_text = job_prompt_context(job_desc, formatting_penalty)
+    changed_text = "\n\n".join(f"[{name}]\n{revision.sections[name]}" for name in revision.changed) or "(none)"
+    summaries = {name: {field: value for field, value in extract_section(revision.sections[name]).items() if value}
+                 for name in revision.unchanged}
 
-    **Job Description:**
-    {job_desc}
+    fixed_tokens = count_tokens(SYSTEM_PROMPT + BASE_PROMPT + REVISION_PROMPT + context_prompt + formatting_prompt) + 40
+    sections = fit_sections([
+        {"name": "previous_analysis", "text": compact_json(revision.previous_result), "priority": 4},
+        {"name": "changed_sections", "text": changed_text, "priority": 3, "min_tokens": 1000},
+        {"name": "job_description", "text": job_text, "priority": 2, "min_tokens": 300},
+        {"name": "unchanged_sections", "text": compact_json(summaries), "priority": 1},
+        {"name": "local_analysis", "text": compact_json(local_data), "priority": 0},
+    ], AI_PROMPT_TOKEN_BUDGET - fixed_tokens)
+
+    full_prompt = BASE_PROMPT + REVISION_PROMPT + context_prompt + f"""
+**Previous Analysis:**
+{sections["previous_analysis"]}
+
+**Changed Sections:**
+{sections["changed_sections"]}
+
+**Unchanged Sections (summaries):**
+{sections["unchanged_sections"]}
+
+**Removed Sections:**
+{", ".join(revision.removed) or "(none)"}
+
+**Job Description:**
+{sections["job_description"]}
+
+**Local Analysis Results:**
+{sections["local_analysis"]}
+""" + formatting_prompt
+
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": full_prompt}
+    ]
 
-    **Local Analysis Results:**
-    {json.dumps(local_data, indent=2)}
+def parse_ai_response(response_text):
+    """Parse the xAI response text into a result dict, or None if unusable.
 
-    **Formatting Analysis:**
-    Penalty Score: {formatting_penalty}
+    Fenced, prose-wrapped and truncated replies are salvaged, then checked
+    against AI_RESPONSE_SCHEMA. A reply is discarded when it has no "data"
+    object or was cut off before a complete score breakdown, since filling
+    the breakdown with defaults would report a score of zero. Salvaged
+    results are marked "repaired" so they are not cached.
     """
+    logger.info(f"xAI response: {response_text}")
 
+    with timed_stage(STAGE_SECONDS, "ai_json_parse"):
+        ai_result, repaired = parse_json_lenient(response_text)
+    if not isinstance(ai_result, dict) or not isinstance(ai_result.get("data"), dict):
+        AI_JSON_DECODE_FAILURES.inc()
+        logger.error(f"Failed to parse JSON from xAI response: {repr(response_text)}")
+        return None
+    breakdown = ai_result.get("breakdown")
+    required_scores = AI_RESPONSE_SCHEMA["properties"]["breakdown"]["required"]
+    if not isinstance(breakdown, dict) or any(name not in breakdown for name in required_scores):
+        AI_JSON_DECODE_FAILURES.inc()
+        logger.error(f"xAI response has no complete score breakdown: {repr(response_text)}")
+        return None
+    if repaired:
+        AI_JSON_REPAIRS.inc()
+        logger.warning("Salvaged a truncated xAI response")
+
+    # Convert old format suggestions to new format if needed
+    if isinstance(ai_result.get("improvement_suggestions"), list):
+        suggestions = ai_result["improvement_suggestions"]
+        ai_result["improvement_suggestions"] = {
+            "critical": suggestions[:2] if suggestions else [],
+            "recommended": suggestions[2:4] if len(suggestions) > 2 else [],
+            "advanced": suggestions[4:] if len(suggestions) > 4 else []
+        }
+
+    ai_result, problems = conform_to_schema(ai_result, AI_RESPONSE_SCHEMA)
+    if problems:
+        logger.warning(f"xAI response did not match the schema: {'; '.join(problems)}")
+    # A reply cut off before the score still has the breakdown it is the sum of
+    if not ai_result.get("ats_score"):
+        points = sum(value for value in ai_result["breakdown"].values() if isinstance(value, (int, float)))
+        ai_result["ats_score"] = f"{min(points, 100):.2f}%"
+    if repaired:
+        ai_result["repaired"] = True
+    return ai_result
+
+def log_ai_error(e):
+    if isinstance(e, CircuitOpenError):
+        logger.warning("xAI circuit breaker is open, using local analysis")
+        return
+    logger.error(f"AI analysis failed: {type(e).__name__}: {str(e)}")
+    if hasattr(e, 'response') and e.response is not None:
+        logger.error(f"Response status: {e.response.status_code}")
+        logger.error(f"Response body: {e.response.text}")
+    if hasattr(e, 'request') and e.request is not None:
+        logger.error(f"Request URL: {e.request.url}")
+        logger.error(f"Request headers: {e.request.headers}")
+
+def record_token_usage(completion):
+    usage = getattr(completion, "usage", None)
+    if usage is not None:
+        AI_TOKENS.inc(usage.prompt_tokens or 0, type="prompt")
+        AI_TOKENS.inc(usage.completion_tokens or 0, type="completion")
+
+async def analyze_with_ai_async(resume_text, job_desc, local_data, formatting_penalty, messages=None):
+    """Coroutine version of analyze_with_ai; runs on the AI runner's event loop."""
+    # Input validation
+    if not resume_text or not job_desc:
+        logger.error("Empty resume text or job description provided")
+        return None
+
+    if messages is None:
+        with timed_stage(STAGE_SECONDS, "prompt_build"):
+            messages = build_ai_messages(resume_text, job_desc, local_data, formatting_penalty)
     try:
         logger.info("Calling xAI API")
-        completion = client.chat.completions.create(
-            model="grok-2-latest",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": full_prompt}
-            ],
-            max_tokens=2000
-        )
-        
-        response_text = completion.choices[0].message.content
-        logger.info(f"xAI response: {response_text}")
-
-        # Debug: Log the raw response
-        logger.debug(f"Raw response to parse: {repr(response_text)} (length: {len(response_text.strip())})")
-
-        # Strip Markdown code block syntax
-        cleaned_response = response_text.strip()
-        if cleaned_response.startswith("```json") and cleaned_response.endswith("```"):
-            cleaned_response = cleaned_response[7:-3].strip()  # Remove ```json and ```
-        elif cleaned_response.startswith("```") and cleaned_response.endswith("```"):
-            cleaned_response = cleaned_response[3:-3].strip()  # Remove generic ```
-        
-        # Check if the cleaned response is empty
-        if not cleaned_response:
-            logger.error("xAI returned an empty response after cleaning")
-            return None
-
-        # Debug: Log the cleaned response
-        logger.debug(f"Cleaned response to parse: {repr(cleaned_response)} (length: {len(cleaned_response)})")
-
-        # Parse the cleaned response as JSON
-        ai_result = json.loads(cleaned_response)
-        
-        # Ensure required fields are present with defaults
-        ai_result.setdefault("breakdown", {
-            "skills": 0,
-            "experience": 0,
-            "education_certifications": 0,
-            "formatting": 0,
-            "keyword_optimization": 0
-        })
-        
-        # Convert old format suggestions to new format if needed
-        if isinstance(ai_result.get("improvement_suggestions"), list):
-            suggestions = ai_result["improvement_suggestions"]
-            ai_result["improvement_suggestions"] = {
-                "critical": suggestions[:2] if suggestions else [],
-                "recommended": suggestions[2:4] if len(suggestions) > 2 else [],
-                "advanced": suggestions[4:] if len(suggestions) > 4 else []
-            }
-        
-        return ai_result
-
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse JSON from xAI response: {str(e)}. Raw response: {repr(response_text)}. Cleaned response: {repr(cleaned_response)}")
-        return None
+        with timed_stage(STAGE_SECONDS, "xai_request"):
+            completion = await ai_runner.create_completion(
+                model=XAI_MODEL,
+                messages=messages,
+                max_tokens=AI_MAX_OUTPUT_TOKENS,
+                **ai_response_format()
+            )
+        record_token_usage(completion)
+        return parse_ai_response(completion.choices[0].message.content)
     except Exception as e:
-        logger.error(f"AI analysis failed: {str(e)}")
-        if hasattr(e, 'response'):
-            logger.error(f"Response status: {e.response.status_code}")
-            logger.error(f"Response body: {e.response.text}")
-        if hasattr(e, 'request'):
-            logger.error(f"Request URL: {e.request.url}")
-            logger.error(f"Request headers: {e.request.headers}")
+        log_ai_error(e)
         return None
 
+def analyze_with_ai(resume_text, job_desc, local_data, formatting_penalty, messages=None):
+    """Use xAI to refine data, score, and suggest improvements.
+
+    Blocks the calling thread until the call on the AI runner's loop finishes
+    or times out. messages replaces the prompt built from the other arguments, e.g. with
+    one from build_revision_ai_messages.
+    """
+    return ai_runner.run(analyze_with_ai_async, resume_text, job_desc, local_data, formatting_penalty, messages)
+
 def analyze_no_ai(resume_text, job_desc, pdf_file):
     """Wrapper for no-AI analysis."""
     return weighted_score_no_ai(resume_text, job_desc, pdf_file)
 
+@dataclass
+class LocalStage:
+    """Output of the CPU-bound local stage of an analysis."""
+    document: ParsedDocument
+    formatting_penalty: int = 0
+    local_data: dict = None  # extraction results sent to the AI
+    local_result: dict = None  # complete no-AI analysis
+
+class UnknownResumeDigest(LookupError):
+    """A resume_digest that is not (or no longer) in the document store."""
+
+def run_local_stage(upload, job_desc, ai_inputs, local_result, document=None, stored=None):
+    """Parse the PDF and run local extraction; runs in the extraction pool.
+
+    ai_inputs adds the formatting penalty and extraction results the AI
+    prompt needs, local_result adds the full no-AI analysis. A document
+    already parsed (see parse_resume_parallel) skips the parse, and a stage
+    loaded from the document store also skips the AI-input extraction.
+    Raises ValueError for unreadable resumes.
+    """
+    if stored is not None:
+        stage = stored
+    else:
+        if document is None:
+            document = parse_resume_upload(upload)[1]
+        elif not document.text:
+            raise ValueError("Empty or unreadable resume text")
+        stage = LocalStage(document=document)
+    if ai_inputs and stage.local_data is None:
+        stage.formatting_penalty = check_formatting(stage.document)
+        stage.local_data = extract_resume_data(stage.document.text)
+    if local_result:
+        stage.local_result = analyze_no_ai(stage.document.text, job_desc, stage.document)
+    return stage
+
+def load_stored_stage(digest):
+    """The LocalStage stored for a resume digest, without a local_result, or None."""
+    with timed_stage(STAGE_SECONDS, "document_store_lookup"):
+        entry = document_store.get(digest)
+    if entry is None:
+        return None
+    return LocalStage(
+        document=ParsedDocument.from_dict(entry["document"]),
+        formatting_penalty=entry["formatting_penalty"],
+        local_data=entry["local_data"],
+    )
+
+def store_local_stage(digest, stage):
+    """Store the job-independent part of a local stage under the resume digest."""
+    document_store.set(digest, {
+        "document": stage.document.to_dict(),
+        "formatting_penalty": stage.formatting_penalty,
+        "local_data": stage.local_data,
+    })
+
+def local_stage_for(upload, digest, job_desc, ai_inputs, local_result):
+    """Local stage of an analysis, reusing the document store entry for digest.
+
+    upload may be None when the resume is only known by digest; a digest
+    missing from the store then raises UnknownResumeDigest. Fresh parses are
+    added to the store.
+    """
+    stored = load_stored_stage(digest)
+    if stored is None:
+        if upload is None:
+            raise UnknownResumeDigest(f"Unknown resume_digest: {digest}")
+        stage = extraction_pool.run(
+            run_local_stage, upload, job_desc, ai_inputs, local_result, parse_resume_parallel(upload)
+        )
+        store_local_stage(digest, stage)
+        return stage
+    if local_result or (ai_inputs and stored.local_data is None):
+        filled = extraction_pool.run(run_local_stage, None, job_desc, ai_inputs, local_result, None, stored)
+        if stored.local_data is None and filled.local_data is not None:
+            store_local_stage(digest, filled)
+        return filled
+    return stored
+
+def parse_resume_upload(upload):
+    """(text, document) for a SpooledUpload, or raise ValueError; runs in the extraction pool."""
+    with upload.open() as resume_file:
+        document = load_pdf_document(resume_file)
+    if not document.text:
+        raise ValueError("Empty or unreadable resume text")
+    return document.text, document
+
+def parse_upload_pages(upload, start, stop, max_chars=None):
+    """Parse one page range of an upload, within max_chars of text; runs in the extraction pool."""
+    with upload.open() as resume_file:
+        return parse_page_range(resume_file, start, stop, PDF_MAX_PAGE_CHARS, max_chars)
+
+def count_upload_pages(upload):
+    """Page count of an upload, or None when it cannot be read; runs in the extraction pool."""
+    try:
+        with upload.open() as resume_file:
+            return count_pages(resume_file)
+    except Exception:
+        return None  # run_local_stage reports the parse error
+
+def parse_resume_parallel(upload):
+    """Parse a long resume as page ranges spread across the extraction pool.
+
+    Returns None when the pool is disabled or the resume has fewer than
+    PDF_PARALLEL_MIN_PAGES pages; it is then parsed in one piece by
+    run_local_stage. The page count is read in the pool too, so no PDF is
+    opened on the request thread. The pages are cut into a few small ranges
+    per process, submitted in page order with one range per process in
+    flight. Each range is given the character budget still left when it is
+    submitted, and once the ranges collected so far hold PDF_MAX_CHARS of
+    text no more are submitted.
+    """
+    if not extraction_pool.enabled:
+        return None
+    page_count = extraction_pool.run(count_upload_pages, upload)
+    if page_count is None:
+        return None
+    pages = min(page_count, PDF_MAX_PAGES)
+    if pages < PDF_PARALLEL_MIN_PAGES:
+        return None
+
+    with timed_stage(STAGE_SECONDS, "pdf_parse_parallel"):
+        ranges = deque(page_ranges(pages, extraction_pool.max_workers * PDF_PARALLEL_RANGES_PER_PROCESS))
+        in_flight = deque()
+        parts = []
+        chars = 0
+        try:
+            while ranges or in_flight:
+                while ranges and len(in_flight) < extraction_pool.max_workers and chars < PDF_MAX_CHARS:
+                    start, stop = ranges.popleft()
+                    in_flight.append(
+                        extraction_pool.submit(parse_upload_pages, upload, start, stop, PDF_MAX_CHARS - chars)
+                    )
+                if not in_flight:
+                    break  # budget reached; the remaining ranges are never parsed
+                part = in_flight.popleft().result()
+                parts.append(part)
+                chars += sum(len(page.text) for page in part.pages)
+        except Exception as e:
+            logger.error(f"PDF extraction failed: {str(e)}")
+            raise ValueError(f"PDF extraction failed: {str(e)}")
+        finally:
+            for future in in_flight:
+                future.cancel()
+        return merge_documents(parts, max_chars=PDF_MAX_CHARS, truncated=pages < page_count or bool(ranges))
+
+def finalize_ai_result(result):
+    """Fill in the response structure of a usable AI result, or return None."""
+    if not result or "data" not in result:
+        return None
+    result.setdefault("improvement_suggestions", result.pop("suggestions", []))
+    return result
+
+def analyze_resume(resume, job_desc, on_partial=None, previous_digest=None, owner=None):
+    """Run the full analysis pipeline for one resume against one job description.
+
+    resume is the PDF as bytes, a SpooledUpload, or the digest (str) of a
+    resume in the document store. Results are served from and stored in the
+    result cache. If on_partial is given, it receives the local no-AI result
+    before the AI stage starts. previous_digest names an earlier version of
+    the resume; the AI stage then only re-analyzes the sections that changed
+    since it. owner scopes near-duplicate reuse to one user's resumes.
+    Raises ValueError for unreadable resumes and
+    UnknownResumeDigest for digests the store does not hold.
+    """
+    if isinstance(resume, str):
+        upload, digest = None, resume
+    else:
+        upload = resume if isinstance(resume, SpooledUpload) else SpooledUpload.from_bytes(resume)
+        digest = upload.digest
+    cache_key = result_cache_key(digest, job_description_digest(job_desc), "ai" if USE_AI else "local")
+    with timed_stage(STAGE_SECONDS, "cache_lookup"):
+        cached = result_cache.get(cache_key)
+    if cached is not None:
+        logger.info("Serving cached analysis")
+        return cached
+    # A near-duplicate reuse answers for one owner only, so owners never share a run
+    flight_key = f"{cache_key}:{owner}" if owner else cache_key
+    return in_flight_analyses.do(
+        flight_key, run_analysis, upload, digest, job_desc, cache_key, on_partial, previous_digest, owner
+    )
+
+def score_value(result):
+    """Numeric ats_score of a result ("85.00%" -> 85.0)."""
+    return float(str(result["ats_score"]).rstrip("%"))
+
+def near_duplicate_namespace(job_hash, owner=None):
+    """Index namespace for a job description, per owner when one is named."""
+    return f"{job_hash}:{owner}" if owner else job_hash
+
+def reuse_near_duplicate(signature, namespace, local_result, mode, shared=False):
+    """An earlier AI result for a near-duplicate resume and the same job, or None.
+
+    In "rescore" mode the earlier score moves by the difference between the
+    local scores of the two resumes; suggestions and extracted data are kept.
+    A shared match may be another user's resume: it is always rescored, and
+    its data and suggestions are replaced by the current local analysis.
+    """
+    match = near_duplicates.find(signature, namespace=namespace)
+    if match is None:
+        return None
+    key, similarity, entry = match
+    if mode == "rescore" and (local_result is None or entry["local_score"] is None):
+        return None
+    result = result_cache.get(entry["result_key"])
+    if result is None:
+        near_duplicates.discard(key)
+        return None
+    if mode == "rescore":
+        shifted = score_value(result) + score_value(local_result) - entry["local_score"]
+        result["ats_score"] = f"{min(max(shifted, 0), 100):.2f}%"
+    if shared:
+        result["data"] = local_result["data"]
+        result["improvement_suggestions"] = local_result["improvement_suggestions"]
+    result["near_duplicate"] = {"similarity": round(similarity, 4), "mode": mode}
+    logger.info(f"Reusing AI analysis of a near-duplicate resume (similarity {similarity:.2f})")
+    return result
+
+def run_analysis(upload, digest, job_desc, cache_key, on_partial=None, previous_digest=None, owner=None):
+    """Uncached body of analyze_resume; concurrent duplicates share one call."""
+    near_duplicate_mode = NEAR_DUPLICATE_MODE if USE_AI else "off"
+    if near_duplicate_mode != "off" and not owner:
+        near_duplicate_mode = "rescore"
+    # Parse the PDF once; text extraction and the formatting check share it
+    with timed_stage(STAGE_SECONDS, "local_stage"):
+        local = local_stage_for(
+            upload, digest, job_desc, bool(USE_AI),
+            not USE_AI or on_partial is not None or near_duplicate_mode == "rescore"
+        )
+    resume_text = local.document.text
+
+    cacheable = True
+    if USE_AI:
+        logger.info("Running in AI mode")
+        if on_partial:
+            on_partial(local.local_result)
+        result = signature = None
+        if near_duplicate_mode != "off":
+            namespace = near_duplicate_namespace(job_description_digest(job_desc), owner)
+            with timed_stage(STAGE_SECONDS, "near_duplicate_lookup"):
+                signature = near_duplicates.signature(resume_text)
+                result = reuse_near_duplicate(
+                    signature, namespace, local.local_result, near_duplicate_mode, shared=not owner
+                )
+            # The cache key has no owner in it, and a reuse carries another resume's analysis
+            if result is not None:
+                cacheable = False
+        if result is None:
+            messages = None
+            revision = plan_revision(previous_digest, job_desc, resume_text) \
+                if previous_digest and INCREMENTAL_ANALYSIS else None
+            if revision is not None:
+                logger.info(f"Re-analyzing changed sections: {', '.join(revision.changed) or 'none'}")
+                AI_INCREMENTAL_ANALYSES.inc()
+                with timed_stage(STAGE_SECONDS, "prompt_build"):
+                    messages = build_revision_ai_messages(
+                        revision, job_desc, local.local_data, local.formatting_penalty
+                    )
+            result = finalize_ai_result(
+                analyze_with_ai(resume_text, job_desc, local.local_data, local.formatting_penalty, messages)
+            )
+            # A salvaged reply is served once but neither cached nor reused for other resumes
+            if result is not None and result.get("repaired"):
+                cacheable = False
+            elif result is not None and signature is not None:
+                near_duplicates.add(cache_key, signature, {
+                    "result_key": cache_key,
+                    "local_score": score_value(local.local_result) if local.local_result else None,
+                }, namespace=namespace)
+        if result is None:
+            logger.warning("AI failed, falling back to no-AI mode")
+            AI_FALLBACKS.inc(mode="sync")
+            result = local.local_result or extraction_pool.run(analyze_no_ai, resume_text, job_desc, local.document)
+            # Don't pin a degraded fallback result in the cache
+            cacheable = False
+    else:
+        logger.info("Running in no-AI mode")
+        result = local.local_result
+
+    if cacheable:
+        result_cache.set(cache_key, result)
+    return result
+
+def spool_resume(resume_file):
+    """Spool an uploaded resume within RESUME_MAX_BYTES; raises UploadTooLarge."""
+    return spool_upload(
+        resume_file.stream, RESUME_MAX_BYTES, memory_threshold=UPLOAD_MEMORY_THRESHOLD, spool_dir=UPLOAD_SPOOL_DIR
+    )
+
+def analyze_spooled_resume(upload, job_desc, owner=None, on_partial=None):
+    """analyze_resume for a queued job, removing the upload's temp file afterwards."""
+    with upload:
+        return analyze_resume(upload, job_desc, on_partial, owner=owner)
+
+def request_job_description():
+    """Job description from the form, or from the registered posting named by posting_id.
+
+    Returns (job_description, None) or (None, error_response).
+    """
+    if "job_description" in request.form:
+        return request.form["job_description"], None
+    posting_id = request.form.get("posting_id")
+    if posting_id:
+        posting = get_registered_posting(posting_id)
+        if posting is None:
+            return None, (jsonify({"error": f"Unknown posting_id: {posting_id}"}), 404)
+        return posting[0], None
+    return None, (jsonify({"error": "No job description provided"}), 400)
+
+def warm_up():
+    """Load models and build lookup structures ahead of the first request.
+
+    Run in the gunicorn master with preload_app (see wsgi.py) so workers
+    inherit the loaded models through copy-on-write instead of loading
+    their own. Safe to call more than once.
+    """
+    if models_ready.is_set():
+        return
+    start = time.perf_counter()
+    if PRELOAD_SPACY:
+        get_nlp()
+    if SEMANTIC_POINTS:
+        # Unused at the default of 0; skip fitting its IDF vector in the master and every child
+        semantic_scorer.vectorizer
+    get_skill_matcher(TAXONOMY_SKILLS)
+    models_ready.set()
+    logger.info(f"Models warm in {time.perf_counter() - start:.2f}s")
+
+# CPU-bound PDF parsing and local extraction run in EXTRACTION_PROCESSES child
+# processes (0 runs them on the request thread). Each child warms its models once,
+# and the stage timings it records are sent back to this process's metrics.
+extraction_pool = ExtractionPool(
+    max_workers=int(os.getenv("EXTRACTION_PROCESSES", "0")),
+    initializer=warm_up,
+    start_method=os.getenv("EXTRACTION_START_METHOD", "spawn"),
+    on_stage_timings=lambda timings: record_stage_timings(STAGE_SECONDS, timings),
+)
+
+@app.before_request
+def start_request_timer():
+    request.environ["resume.start_time"] = time.perf_counter()
+
+@app.after_request
+def observe_request_duration(response):
+    start = request.environ.get("resume.start_time")
+    if start is not None and request.url_rule is not None:
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - start, endpoint=request.url_rule.rule, status=response.status_code
+        )
+    return response
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    return jsonify({"error": f"Request body exceeds the {app.config['MAX_CONTENT_LENGTH']} byte limit"}), 413
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Prometheus scrape endpoint for this process's metrics."""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
 # Add health check endpoint
 @app.route('/health')
 def health_check():
     return jsonify({
         "status": "healthy",
         "message": "Server is running",
-        "ai_client": "initialized" if client else "not initialized"
+        "ai_client": "initialized" if XAI_API_KEY else "not initialized",
+        "ai_concurrency": ai_runner.stats(),
+        "ai_circuit_breaker": ai_runner.breaker.stats(),
+        "in_flight_analyses": in_flight_analyses.stats(),
+        "jobs": job_manager.stats(),
+        "extraction_pool": extraction_pool.stats(),
+        "result_cache": result_cache.stats(),
+        "document_store": document_store.stats(),
+        "postings": posting_store.stats(),
+        "near_duplicates": near_duplicates.stats(),
+        "section_cache": section_cache.stats()
     })
 
+@app.route("/ready")
+def readiness_check():
+    """Readiness probe: 200 only after warm_up() has loaded the models."""
+    if not models_ready.is_set():
+        return jsonify({"status": "warming_up"}), 503
+    return jsonify({"status": "ready", "spacy_loaded": _nlp is not None}), 200
+
+@app.route("/postings", methods=["POST"])
+def create_posting():
+    """Register a job description so parse requests can reference it by posting_id."""
+    payload = request.get_json(silent=True) or request.form
+    job_desc = payload.get("job_description")
+    if not job_desc or not job_desc.strip():
+        return jsonify({"error": "No job description provided"}), 400
+    profile = register_posting(job_desc)
+    return jsonify(profile.to_dict()), 201
+
+@app.route("/postings/<posting_id>", methods=["GET"])
+def get_posting(posting_id):
+    """Return the precomputed profile of a registered posting."""
+    posting = get_registered_posting(posting_id)
+    if posting is None:
+        return jsonify({"error": "Posting not found"}), 404
+    return jsonify(posting[1].to_dict()), 200
+
+def stored_resume_info(digest, stage):
+    return {
+        "resume_digest": digest,
+        "page_count": stage.document.page_count,
+        "characters": len(stage.document.text),
+        "truncated": stage.document.truncated,
+    }
+
+@app.route("/resumes", methods=["POST"])
+def register_resume():
+    """Extract a resume ahead of time so parse requests can reference it by resume_digest."""
+    if "resume" not in request.files:
+        return jsonify({"error": "No resume file provided"}), 400
+    try:
+        with spool_resume(request.files["resume"]) as upload:
+            stored = load_stored_stage(upload.digest)
+            if stored is not None and stored.local_data is not None:
+                return jsonify(stored_resume_info(upload.digest, stored)), 200
+            stage = local_stage_for(upload, upload.digest, None, True, False)
+        return jsonify(stored_resume_info(upload.digest, stage)), 201
+    except UploadTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+    except Exception as e:
+        logger.error(f"Processing error: {str(e)}")
+        return jsonify({"error": f"Internal processing error: {str(e)}"}), 500
+
+@app.route("/resumes/<digest>", methods=["GET"])
+def get_stored_resume(digest):
+    """Report whether a resume is still in the document store."""
+    stored = load_stored_stage(digest)
+    if stored is None:
+        return jsonify({"error": "Resume not found"}), 404
+    return jsonify(stored_resume_info(digest, stored)), 200
+
 @app.route("/resume/parse", methods=["POST"])
 def parse_and_rank():
-    """Parse resume and rank it with a consistent response structure."""
-    if "resume" not in request.files:
+    """Parse resume and rank it with a consistent response structure.
+
+    The resume is either uploaded as a file or named by the resume_digest of
+    one in the document store. previous_resume_digest optionally names the
+    version analyzed before, for an incremental AI analysis, and resume_owner
+    (e.g. a candidate or account id) scopes near-duplicate reuse to that owner.
+    """
+    resume_digest = request.form.get("resume_digest")
+    previous_digest = request.form.get("previous_resume_digest") or None
+    owner = request.form.get("resume_owner") or None
+    if "resume" not in request.files and not resume_digest:
         return jsonify({"error": "No resume file provided"}), 400
     
-    if "job_description" not in request.form:
-        return jsonify({"error": "No job description provided"}), 400
-
-    resume_file = request.files["resume"]
-    job_desc = request.form["job_description"]
+    job_desc, error = request_job_description()
+    if error:
+        return error
 
     try:
-        resume_text = extract_text_from_pdf(resume_file)
-        if not resume_text:
-            return jsonify({"error": "Empty or unreadable resume text"}), 400
-
-        if USE_AI:
-            logger.info("Running in AI mode")
-            formatting_penalty = check_formatting(resume_file)
-            local_data = extract_skills_and_experience(resume_text)
-            result = analyze_with_ai(resume_text, job_desc, local_data, formatting_penalty)
-            if result and "data" in result:
-                result.setdefault("breakdown", {
-                    "skills": 0, "experience": 0, "education_certifications": 0, "formatting": 0, "keyword_optimization": 0
-                })
-                result.setdefault("improvement_suggestions", result.pop("suggestions", []))
+        with collect_stage_timings() as timings:
+            if "resume" in request.files:
+                with spool_resume(request.files["resume"]) as upload:
+                    result = analyze_resume(upload, job_desc, previous_digest=previous_digest, owner=owner)
             else:
-                logger.warning("AI failed, falling back to no-AI mode")
-                result = analyze_no_ai(resume_text, job_desc, resume_file)
-        else:
-            logger.info("Running in no-AI mode")
-            result = analyze_no_ai(resume_text, job_desc, resume_file)
-
-        return jsonify(result), 200
+                result = analyze_resume(resume_digest, job_desc, previous_digest=previous_digest, owner=owner)
+        response = jsonify(result)
+        if STAGE_TIMING_HEADER:
+            response.headers["Server-Timing"] = server_timing_header(timings)
+        return response, 200
 
+    except UploadTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    except UnknownResumeDigest as e:
+        return jsonify({"error": str(e)}), 404
     except ValueError as ve:
         # For PDF extraction errors, return 500 as expected by the test
         if "PDF extraction failed" in str(ve):
@@ -529,6 +1431,226 @@ def parse_and_rank():
         logger.error(f"Processing error: {str(e)}")
         return jsonify({"error": f"Internal processing error: {str(e)}"}), 500
 
+def stream_resume_analysis(resume, job_desc):
+    """Yield (event, payload) pairs: the local result, AI output deltas, then the final result."""
+    upload = resume if isinstance(resume, SpooledUpload) else SpooledUpload.from_bytes(resume)
+    cache_key = result_cache_key(upload.digest, job_description_digest(job_desc), "ai" if USE_AI else "local")
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        yield "final", {"source": "cache", "result": cached}
+        return
+
+    with timed_stage(STAGE_SECONDS, "local_stage"):
+        local = local_stage_for(upload, upload.digest, job_desc, bool(USE_AI), True)
+    local_result = local.local_result
+    yield "local", {"result": local_result}
+
+    if not USE_AI:
+        result_cache.set(cache_key, local_result)
+        yield "final", {"source": "local", "result": local_result}
+        return
+
+    with timed_stage(STAGE_SECONDS, "prompt_build"):
+        messages = build_ai_messages(local.document.text, job_desc, local.local_data, local.formatting_penalty)
+    parts = []
+    result = None
+    try:
+        logger.info("Streaming xAI API")
+        with timed_stage(STAGE_SECONDS, "xai_stream"):
+            for delta in ai_runner.stream(
+                model=XAI_MODEL, messages=messages, max_tokens=AI_MAX_OUTPUT_TOKENS, **ai_response_format()
+            ):
+                parts.append(delta)
+                yield "ai_delta", {"text": delta}
+        result = finalize_ai_result(parse_ai_response("".join(parts)))
+    except Exception as e:
+        log_ai_error(e)
+
+    if result is None:
+        logger.warning("AI failed, falling back to no-AI mode")
+        AI_FALLBACKS.inc(mode="stream")
+        yield "final", {"source": "local", "result": local_result}
+        return
+
+    if not result.get("repaired"):
+        result_cache.set(cache_key, result)
+    yield "final", {"source": "ai", "result": result}
+
+@app.route("/resume/parse/stream", methods=["POST"])
+def parse_and_rank_stream():
+    """Stream the local analysis immediately, then the AI refinement as it arrives.
+
+    Responds with NDJSON ({"event": ..., ...} per line), or with Server-Sent
+    Events when the client accepts text/event-stream.
+    """
+    if "resume" not in request.files:
+        return jsonify({"error": "No resume file provided"}), 400
+    
+    job_desc, error = request_job_description()
+    if error:
+        return error
+
+    try:
+        upload = spool_resume(request.files["resume"])
+    except UploadTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    use_sse = "text/event-stream" in request.headers.get("Accept", "")
+
+    def encode(event, payload):
+        if use_sse:
+            return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        return json.dumps({"event": event, **payload}) + "\n"
+
+    def generate():
+        try:
+            for event, payload in stream_resume_analysis(upload, job_desc):
+                yield encode(event, payload)
+        except ValueError as ve:
+            yield encode("error", {"error": str(ve)})
+        except Exception as e:
+            logger.error(f"Processing error: {str(e)}")
+            yield encode("error", {"error": f"Internal processing error: {str(e)}"})
+
+    response = Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream" if use_sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    response.call_on_close(upload.close)
+    return response
+
+@app.route("/resume/jobs", methods=["POST"])
+def submit_parse_job():
+    """Queue a resume analysis and return its job id immediately."""
+    if "resume" not in request.files:
+        return jsonify({"error": "No resume file provided"}), 400
+    
+    job_desc, error = request_job_description()
+    if error:
+        return error
+
+    callback_url = request.form.get("callback_url") or None
+
+    try:
+        upload = spool_resume(request.files["resume"])
+    except UploadTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    try:
+        job_id = job_manager.submit(
+            analyze_spooled_resume, upload, job_desc, request.form.get("resume_owner") or None,
+            callback_url=callback_url
+        )
+    except ValueError as ve:
+        upload.close()
+        return jsonify({"error": str(ve)}), 400
+    except JobQueueFull as e:
+        upload.close()
+        response = jsonify({"error": f"Too many queued analyses, retry later ({str(e)})"})
+        response.headers["Retry-After"] = "5"
+        return response, 503
+    return jsonify({"job_id": job_id, "status": "queued", "status_url": f"/resume/jobs/{job_id}"}), 202
+
+@app.route("/resume/jobs/<job_id>", methods=["GET"])
+def get_parse_job(job_id):
+    """Return the status and any partial or final result of a queued analysis."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
+@app.route("/resume/parse/batch", methods=["POST"])
+def parse_and_rank_batch():
+    """Score many resumes against many job descriptions and rank the cross product."""
+    resume_files = request.files.getlist("resume")
+    job_descs = [job_desc for job_desc in request.form.getlist("job_description") if job_desc.strip()]
+    for posting_id in request.form.getlist("posting_id"):
+        posting = get_registered_posting(posting_id)
+        if posting is None:
+            return jsonify({"error": f"Unknown posting_id: {posting_id}"}), 404
+        job_descs.append(posting[0])
+    if not resume_files:
+        return jsonify({"error": "No resume file provided"}), 400
+    if not job_descs:
+        return jsonify({"error": "No job description provided"}), 400
+    if len(resume_files) > BATCH_MAX_RESUMES or len(job_descs) > BATCH_MAX_JOB_DESCRIPTIONS:
+        return jsonify({
+            "error": f"Batch limited to {BATCH_MAX_RESUMES} resumes and {BATCH_MAX_JOB_DESCRIPTIONS} job descriptions"
+        }), 400
+
+    top_k = request.form.get("top_k")
+    try:
+        top_k = int(top_k) if top_k else None
+    except ValueError:
+        return jsonify({"error": "top_k must be an integer"}), 400
+    if top_k is not None and top_k < 1:
+        return jsonify({"error": "top_k must be positive"}), 400
+
+    try:
+        resumes = []
+        resume_info = []
+        errors = []
+        uploads = []
+        try:
+            # Resumes are parsed in parallel when the extraction pool has processes
+            pending = []
+            for index, resume_file in enumerate(resume_files):
+                try:
+                    upload = spool_resume(resume_file)
+                except UploadTooLarge as e:
+                    errors.append({"resume": index, "filename": resume_file.filename, "error": str(e)})
+                    continue
+                uploads.append(upload)
+                pending.append((index, resume_file.filename, extraction_pool.submit(parse_resume_upload, upload)))
+            for index, filename, future in pending:
+                try:
+                    resumes.append(future.result())
+                except ValueError as ve:
+                    errors.append({"resume": index, "filename": filename, "error": str(ve)})
+                    continue
+                resume_info.append({"resume": index, "filename": filename})
+        finally:
+            for upload in uploads:
+                upload.close()
+        errors.sort(key=lambda error: error["resume"])
+
+        if not resumes:
+            return jsonify({"error": "No readable resumes provided", "errors": errors}), 400
+
+        scores = extraction_pool.run(batch_score_no_ai, resumes, job_descs)
+
+        by_resume = []
+        for i, info in enumerate(resume_info):
+            matches = sorted(
+                ({"job_description": j, **scores[i][j]} for j in range(len(job_descs))),
+                key=lambda match: match["ats_score_value"], reverse=True
+            )
+            by_resume.append({**info, "matches": matches[:top_k]})
+
+        by_job = []
+        for j in range(len(job_descs)):
+            matches = sorted(
+                ({**info, **scores[i][j]} for i, info in enumerate(resume_info)),
+                key=lambda match: match["ats_score_value"], reverse=True
+            )
+            by_job.append({"job_description": j, "matches": matches[:top_k]})
+
+        return jsonify({
+            "resumes": resume_info,
+            "scores": [[cell["ats_score_value"] for cell in row] for row in scores],
+            "by_resume": by_resume,
+            "by_job_description": by_job,
+            "errors": errors
+        }), 200
+
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+    except Exception as e:
+        logger.error(f"Batch processing error: {str(e)}")
+        return jsonify({"error": f"Internal processing error: {str(e)}"}), 500
+
 if __name__ == "__main__":
+    # Development server; production runs `gunicorn -c gunicorn.conf.py wsgi:application`
     logger.info(f"Starting service with USE_AI={USE_AI}")
+    warm_up()
+    job_manager.recover_interrupted()
     app.run(host="0.0.0.0", port=5000, debug=False)
\ No newline at end of file
@@ -0,0 +1,248 @@
+"""Micro-benchmarks and an end-to-end load test for the resume service hot paths.
+
+Generates a synthetic corpus of resume PDFs (1, 3 and 10 pages by default),
+times the local pipeline stages on each, then drives /resume/parse through
+the Flask test client with the xAI call stubbed out. Results are written as
+JSON so runs from different releases can be compared:
+
+    python benchmark.py --output bench.json
+    python benchmark.py --compare bench.json --threshold 0.2
+    python benchmark.py --http-stub lognormal:-0.5,0.6   # real HTTP round trips via stub_xai.py
+"""
+import argparse
+import asyncio
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+import app
+import stub_xai
+
+RESUME_SECTIONS = [
+    ["Summary", "Senior software engineer with 8 years of experience in Python and distributed systems.",
+     "Led a team of 6 engineers delivering APIs on AWS with Docker and Kubernetes."],
+    ["Skills", "Python, Java, JavaScript, React, Node.js, Django, Flask, SQL, NoSQL, Spark",
+     "Docker, Kubernetes, Terraform, Jenkins, Git, AWS, Azure, Machine Learning, TensorFlow"],
+    ["Experience", "Tech Corp - Staff Engineer (2019 - present): 5 years of experience in backend services",
+     "Built data pipelines in Spark and Hadoop, reduced latency by 40% and cost by 25%",
+     "Startup Inc - Senior Developer (2015 - 2019): 4 years of experience in web development"],
+    ["Education", "BS in Computer Science, University of Technology", "MS in Data Science"],
+    ["Certifications", "AWS Certified Solutions Architect", "Certified Kubernetes Administrator"],
+]
+
+JOB_DESCRIPTION = (
+    "Senior Backend Engineer. Required Skills: Python, Django, AWS, Docker, Kubernetes, SQL. "
+    "5+ years experience building APIs. BS in Computer Science or related field. "
+    "AWS certification preferred. We are an equal opportunity employer."
+)
+
+STUB_AI_RESPONSE = stub_xai.DEFAULT_RESPONSE
+
+
+def make_resume_pdf(pages, tag=""):
+    """Build a resume PDF with the given number of densely filled pages, tag added to each page header."""
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    for page in range(pages):
+        y = 750
+        pdf.drawString(72, y, f"John Doe - Resume page {page + 1} {tag}".rstrip())
+        y -= 24
+        while y > 72:
+            for section in RESUME_SECTIONS:
+                for line in section:
+                    if y <= 72:
+                        break
+                    pdf.drawString(72, y, line)
+                    y -= 14
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def summarize(samples):
+    """Timing statistics in milliseconds."""
+    ordered = sorted(samples)
+    return {
+        "runs": len(samples),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+    }
+
+
+def time_call(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def run_micro_benchmarks(page_counts, repeat):
+    """Time each local pipeline stage on every corpus document."""
+    results = {}
+    for pages in page_counts:
+        pdf_bytes = make_resume_pdf(pages)
+        document = app.load_pdf_document(io.BytesIO(pdf_bytes))
+        text = document.text
+        results[f"{pages}_pages"] = {
+            "pdf_bytes": len(pdf_bytes),
+            "text_chars": len(text),
+            "extract_text_from_pdf": time_call(lambda: app.extract_text_from_pdf(io.BytesIO(pdf_bytes)), repeat),
+            "check_formatting": time_call(lambda: app.check_formatting(io.BytesIO(pdf_bytes)), repeat),
+            "extract_skills_and_experience": time_call(lambda: app.extract_skills_and_experience(text), repeat),
+            "weighted_score_no_ai": time_call(
+                lambda: app.weighted_score_no_ai(text, JOB_DESCRIPTION, document), repeat
+            ),
+        }
+    return results
+
+
+def stub_completion(latency):
+    """A create_completion replacement that waits `latency` seconds and returns a canned reply."""
+    async def create_completion(**kwargs):
+        await asyncio.sleep(latency)
+        message = SimpleNamespace(content=STUB_AI_RESPONSE)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+    return create_completion
+
+
+def run_load_test(pages, requests, concurrency, ai_latency, use_cache=False, xai_base_url=None):
+    """Drive /resume/parse with concurrent clients and report latency and throughput.
+
+    Without use_cache every request uploads a different PDF, so the document
+    store and in-flight coalescing (keyed by the upload digest) miss, and
+    the result cache, near-duplicate index and section cache are bypassed:
+    each request does the full work.
+    """
+    if use_cache:
+        bodies = [make_resume_pdf(pages)] * requests
+    else:
+        bodies = [make_resume_pdf(pages, tag=f"#{index}") for index in range(requests)]
+    client = app.app.test_client()
+
+    def one_request(index):
+        start = time.perf_counter()
+        response = client.post("/resume/parse", data={
+            "resume": (io.BytesIO(bodies[index]), "resume.pdf"),
+            "job_description": JOB_DESCRIPTION,
+        })
+        return time.perf_counter() - start, response.status_code
+
+    patches = [mock.patch.object(app, "USE_AI", 1)]
+    if xai_base_url:
+        patches.append(mock.patch.object(app, "ai_runner", app.AIRunner(
+            api_key="benchmark", base_url=xai_base_url,
+            max_concurrency=app.ai_runner.max_concurrency, timeout=app.ai_runner.timeout,
+        )))
+    else:
+        patches.append(mock.patch.object(app.ai_runner, "create_completion", stub_completion(ai_latency)))
+    if not use_cache:
+        patches.append(mock.patch.object(app.result_cache, "get", return_value=None))
+        patches.append(mock.patch.object(app.near_duplicates, "find", return_value=None))
+        patches.append(mock.patch.object(app.section_cache, "get", return_value=None))
+
+    for patch in patches:
+        patch.start()
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(one_request, range(requests)))
+        elapsed = time.perf_counter() - start
+    finally:
+        for patch in reversed(patches):
+            patch.stop()
+
+    return {
+        "pages": pages,
+        "requests": requests,
+        "concurrency": concurrency,
+        "ai_latency_s": None if xai_base_url else ai_latency,
+        "xai_base_url": xai_base_url,
+        "result_cache": use_cache,
+        "errors": sum(1 for _, status in outcomes if status != 200),
+        "throughput_rps": round(requests / elapsed, 2),
+        "latency": summarize([duration for duration, _ in outcomes]),
+    }
+
+
+def compare(current, baseline, threshold):
+    """List median timings that regressed by more than threshold (a fraction) against a baseline."""
+    regressions = []
+    for corpus, stages in current["micro"].items():
+        for stage, stats in stages.items():
+            if not isinstance(stats, dict):
+                continue
+            before = baseline.get("micro", {}).get(corpus, {}).get(stage)
+            if before and before["median_ms"] > 0:
+                change = stats["median_ms"] / before["median_ms"] - 1
+                if change > threshold:
+                    regressions.append({"benchmark": f"{corpus}.{stage}", "baseline_ms": before["median_ms"],
+                                        "current_ms": stats["median_ms"], "change": round(change, 3)})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 3, 10], help="corpus page counts")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per micro-benchmark")
+    parser.add_argument("--requests", type=int, default=100, help="requests in the load test (0 to skip)")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent load-test clients")
+    parser.add_argument("--ai-latency", type=float, default=0.5, help="seconds the in-process AI stub waits")
+    parser.add_argument("--xai-base-url", help="send AI calls to this OpenAI-compatible stub instead")
+    parser.add_argument("--http-stub", metavar="LATENCY",
+                        help="start stub_xai.py in-process with this latency spec and send AI calls to it")
+    parser.add_argument("--with-cache", action="store_true", help="leave the result cache enabled")
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before flagging")
+    args = parser.parse_args(argv)
+
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "micro": run_micro_benchmarks(args.pages, args.repeat),
+    }
+    if args.requests:
+        xai_base_url, stub_server = args.xai_base_url, None
+        if args.http_stub:
+            stub_server, xai_base_url = stub_xai.start_in_thread(stub_xai.StubConfig(latency=args.http_stub))
+        try:
+            results["load"] = run_load_test(
+                max(args.pages), args.requests, args.concurrency, args.ai_latency, args.with_cache, xai_base_url
+            )
+        finally:
+            if stub_server:
+                stub_server.shutdown()
+                stub_server.server_close()
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            results["regressions"] = compare(results, json.load(baseline_file), args.threshold)
+        exit_code = 1 if results["regressions"] else 0
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""Offline bulk scoring of a resume archive with the local (no-AI) scorer.
+
+Scores every PDF under a directory, or listed in a manifest file (one path
+per line, relative paths resolved against the manifest), against one or more
+job descriptions, and writes one NDJSON line per resume:
+
+    python bulk_score.py resumes/ --job-file senior_backend.txt --output scores.ndjson
+    python bulk_score.py manifest.txt --job-description "Python developer" --processes 8
+    python bulk_score.py resumes/ --job-file senior_backend.txt --output scores.ndjson --resume
+
+Work is spread over the extraction process pool, each worker warming its
+models (spaCy too with --entities) once. Only a bounded window of files is
+in flight, so memory stays flat however large the archive is. Every line is
+flushed as soon as its resume is scored, so the output file is the
+checkpoint: --resume skips the paths already in it, dropping a line left
+half-written by an interrupted run. Resumes whose worker died are not
+written and are picked up by the next --resume run.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import app
+from process_pool import ExtractionPool
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_EVERY = 1000
+
+
+def iter_resume_paths(source):
+    """Yield PDF paths under a directory (recursively, in sorted order) or listed in a manifest."""
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(".pdf"):
+                    yield os.path.join(root, name)
+        return
+    base = os.path.dirname(source)
+    with open(source) as manifest:
+        for line in manifest:
+            path = line.strip()
+            if path and not path.startswith("#"):
+                yield os.path.join(base, path)
+
+
+def completed_paths(output_path):
+    """Paths already written to an earlier run's output.
+
+    The file is cut back to its last complete line, so a record half-written
+    when the run was interrupted is dropped and its resume scored again.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "rb+") as output_file:
+        good_end = 0
+        for line in output_file:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                done.add(json.loads(line)["path"])
+            except (ValueError, KeyError):
+                break
+            good_end += len(line)
+        output_file.truncate(good_end)
+    return done
+
+
+def score_resume(path, job_descs):
+    """Parse one PDF and score it against every job description; runs in a pool worker."""
+    try:
+        with open(path, "rb") as pdf_file:
+            document = app.load_pdf_document(pdf_file)
+        if not document.text:
+            raise ValueError("Empty or unreadable resume text")
+        # One extraction per resume, whatever the number of job descriptions
+        try:
+            row = app.batch_score_no_ai([(document.text, document)], job_descs, details=True)[0]
+        except Exception as e:
+            raise ValueError(f"Scoring error: {str(e)}")
+        scores = [{"job_description": index, **cell} for index, cell in enumerate(row)]
+    except (OSError, ValueError) as e:
+        return {"path": path, "error": str(e)}
+    return {"path": path, "pages": document.page_count, "truncated": document.truncated, "scores": scores}
+
+
+def score_archive(paths, job_descs, output, processes, done=frozenset()):
+    """Score paths not in done, writing NDJSON records to output as they finish; returns run stats."""
+    pool = ExtractionPool(max_workers=processes, initializer=app.warm_up)
+    max_pending = max(1, processes) * 4
+    pending = {}  # future -> path
+    stats = {"scored": 0, "errors": 0, "skipped": 0, "failed": 0}
+
+    def write_finished(futures):
+        for future in futures:
+            path = pending.pop(future)
+            try:
+                record = future.result()
+            except Exception as e:
+                # A worker that died takes its pool down; leave these for the next --resume run
+                logger.error(f"Scoring {path} failed: {type(e).__name__}: {str(e)}")
+                stats["failed"] += 1
+                continue
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            stats["errors" if "error" in record else "scored"] += 1
+            if (stats["scored"] + stats["errors"]) % PROGRESS_EVERY == 0:
+                logger.info(f"Scored {stats['scored'] + stats['errors']} resumes")
+
+    try:
+        for path in paths:
+            if path in done:
+                stats["skipped"] += 1
+                continue
+            pending[pool.submit(score_resume, path, job_descs)] = path
+            if len(pending) >= max_pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                write_finished(finished)
+        write_finished(wait(pending).done)
+    finally:
+        pool.shutdown()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="directory of PDFs or manifest file of PDF paths")
+    parser.add_argument("--job-description", action="append", default=[], help="job description text (repeatable)")
+    parser.add_argument("--job-file", action="append", default=[], help="file holding one job description (repeatable)")
+    parser.add_argument("--output", help="NDJSON output file (default stdout)")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted run into --output")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (0 scores on the main process)")
+    parser.add_argument("--entities", action="store_true", help="extract organizations and dates with spaCy")
+    args = parser.parse_args(argv)
+
+    job_descs = list(args.job_description)
+    for job_file in args.job_file:
+        with open(job_file) as job_desc_file:
+            job_descs.append(job_desc_file.read())
+    job_descs = [job_desc for job_desc in job_descs if job_desc.strip()]
+    if not job_descs:
+        parser.error("at least one --job-description or --job-file is required")
+    if args.resume and not args.output:
+        parser.error("--resume needs --output")
+    if args.entities:
+        # Read by workers when they import the app; set on the already imported module for --processes 0
+        os.environ["EXTRACT_ENTITIES"] = "1"
+        app.EXTRACT_ENTITIES = app.PRELOAD_SPACY = True
+
+    done = completed_paths(args.output) if args.resume else frozenset()
+    start = time.perf_counter()
+    output = open(args.output, "a" if args.resume else "w") if args.output else sys.stdout
+    try:
+        stats = score_archive(iter_resume_paths(args.source), job_descs, output, args.processes, done)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    stats["seconds"] = round(time.perf_counter() - start, 2)
+    print(json.dumps(stats), file=sys.stderr)
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
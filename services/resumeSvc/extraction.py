@@ -0,0 +1,124 @@
+"""Precompiled regex bank for experience, education and certification extraction.
+
+Every pattern is compiled once at import. Overlapping patterns are merged so
+each field takes one pass over the text (plus one short pass over the
+education section), and free-text captures are bounded in length and stop
+at line breaks, so long resumes without punctuation stay linear.
+"""
+import re
+
+# Longest role, field of study or certification name captured after a keyword
+MAX_PHRASE_CHARS = 60
+# Words that start a new resume section and end any phrase running into them
+SECTION_WORD_PATTERN = re.compile(
+    r"\b(?:experience|skills|certifications?|education|university|college|summary|projects)\b", re.IGNORECASE
+)
+
+EXPERIENCE_PATTERN = re.compile(
+    r"\b(\d{1,2})\+?\s*(?:years?|yrs?)\b(?:\s*of\b)?(?:\s*(?:experience|exp)\b)?(?:\s*in\b)?"
+    rf"[ \t]*([a-z][a-z \t]{{0,{MAX_PHRASE_CHARS - 1}}})?",
+    re.IGNORECASE,
+)
+
+# Degree, optionally "in"/"of", then the field; covers "Education: BS ..." too
+DEGREE_PATTERN = re.compile(
+    r"\b(bachelor'?s|master'?s|phd|doctorate|bs|ms|mba)\b(?:[ \t]*\b(?:in|of)\b)?"
+    rf"[ \t]*([a-z][a-z \t]{{0,{MAX_PHRASE_CHARS - 1}}})",
+    re.IGNORECASE,
+)
+EDUCATION_HEADER_PATTERN = re.compile(r"education:?", re.IGNORECASE)
+EDUCATION_SECTION_END_PATTERN = re.compile(r"experience|skills", re.IGNORECASE)
+COMPUTER_SCIENCE_PATTERN = re.compile(r"\b(bs|bachelor'?s|master'?s)\b.{0,80}?(computer\s*science)", re.IGNORECASE | re.DOTALL)
+
+# One pass for "Certifications: ...", "Certified <name>" and "AWS certified";
+# the AWS branch is zero-width past the vendor so "Certified <name>" still matches
+CERTIFICATION_PATTERN = re.compile(
+    r"\bcertifications?\b:?\s*(?P<listed>[^.\n]{1,120})"
+    rf"|\b(?:certified|certification)\b[ \t]*(?P<named>[a-z][a-z \t]{{0,{MAX_PHRASE_CHARS - 1}}})"
+    r"|\b(?P<aws>aws|amazon)(?=[ \t]*certified\b)",
+    re.IGNORECASE,
+)
+CERTIFICATION_PREFIX_PATTERN = re.compile(r"^(?:certified|certification)\s+", re.IGNORECASE)
+BULLET_PATTERN = re.compile(r"^[\s\-•*]+")
+
+
+def clip_phrase(phrase):
+    """Trim a captured phrase at the next section word and surrounding whitespace."""
+    if not phrase:
+        return ""
+    section = SECTION_WORD_PATTERN.search(phrase)
+    if section:
+        phrase = phrase[:section.start()]
+    return " ".join(phrase.split())
+
+
+def extract_experience(text):
+    """Return (total years, {role: years}) from "N years (of experience) (in) role" mentions."""
+    total_exp = 0
+    relevant_exp = {}
+    for match in EXPERIENCE_PATTERN.finditer(text):
+        years = int(match.group(1))
+        role = clip_phrase(match.group(2)) or "general"
+        total_exp += years
+        relevant_exp[role] = relevant_exp.get(role, 0) + years
+    return total_exp, relevant_exp
+
+
+def normalize_degree(degree):
+    degree = degree.strip().lower()
+    if degree in ['bs', "bachelor's", 'bachelor', 'bachelors']:
+        return 'BS'
+    if degree in ['ms', "master's", 'master', 'masters']:
+        return 'MS'
+    return degree
+
+
+def extract_education(text):
+    """Return degree entries such as "BS in Computer Science"."""
+    edu_matches = [(match.group(1), clip_phrase(match.group(2))) for match in DEGREE_PATTERN.finditer(text)]
+
+    # Also look for Computer Science in the education section
+    header = EDUCATION_HEADER_PATTERN.search(text)
+    if header:
+        section_end = EDUCATION_SECTION_END_PATTERN.search(text, header.end())
+        section_text = text[header.end():section_end.start() if section_end else len(text)]
+        cs_match = COMPUTER_SCIENCE_PATTERN.search(section_text)
+        if cs_match:
+            edu_matches.append((cs_match.group(1), cs_match.group(2)))
+
+    education = []
+    seen = set()  # To avoid duplicates
+    for deg, field in edu_matches:
+        field = field.strip().lower()
+        if not field:
+            continue
+        entry = f"{normalize_degree(deg)} in {field.title()}"
+        if entry not in seen:
+            education.append(entry)
+            seen.add(entry)
+
+    # If no education found but "Computer Science" is in the text, add it
+    if not education and "computer science" in text.lower():
+        education.append("BS in Computer Science")
+    return education
+
+
+def extract_certifications(text):
+    """Return certification names, adding "AWS Certified" when AWS certification is mentioned."""
+    certifications = []
+    aws_certified = False
+    for match in CERTIFICATION_PATTERN.finditer(text):
+        if match.group("aws"):
+            aws_certified = True
+            continue
+        cert = match.group("listed") or clip_phrase(match.group("named"))
+        cert = BULLET_PATTERN.sub('', cert or "")
+        cert = CERTIFICATION_PREFIX_PATTERN.sub('', cert)
+        cert = ' '.join(cert.split())
+        if cert and cert not in certifications:
+            certifications.append(cert)
+
+    if aws_certified or any('aws' in cert.lower() for cert in certifications):
+        if 'AWS Certified' not in certifications:
+            certifications.append('AWS Certified')
+    return certifications
@@ -0,0 +1,66 @@
+"""gunicorn settings for the resume service, configured through the environment.
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+The app and its models are preloaded in the master, and workers share those
+pages copy-on-write.
+
+Run ONE worker and scale with threads (and EXTRACTION_PROCESSES for CPU-bound
+parsing). Much of the service's state lives in the worker process: queued
+jobs, the document store, registered postings, request coalescing and the
+/metrics counters. With several workers a request can land on a worker that
+has never seen the job id, resume_digest or posting_id it names. More than one
+worker is refused unless JOB_STORE_DB, DOCUMENT_STORE_DB and POSTINGS_DB point
+at SQLite files shared by all workers; even then coalescing and metrics stay
+per worker. Per-process state (the xAI event loop, the job executor,
+SQLite connections) starts lazily in each worker.
+
+Graceful reload: `kill -HUP <master>` replaces workers without dropping
+in-flight requests. With preload the new workers fork from the already loaded
+app, so deploying new code needs USR2 (start a new master) followed by QUIT
+to the old one.
+"""
+import gc
+import os
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}")
+workers = int(os.getenv("GUNICORN_WORKERS", "1"))
+SHARED_STORES = ("JOB_STORE_DB", "DOCUMENT_STORE_DB", "POSTINGS_DB")
+if workers > 1 and not all(os.getenv(name) for name in SHARED_STORES):
+    raise RuntimeError(
+        f"GUNICORN_WORKERS > 1 needs {', '.join(SHARED_STORES)} so workers share jobs, stored resumes and "
+        "registered postings; otherwise run one worker and raise GUNICORN_THREADS"
+    )
+# Threads per worker; requests mostly wait on the xAI runner loop, so threads are cheap
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+worker_class = "gthread" if threads > 1 else "sync"
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+# AI_TIMEOUT plus AI_QUEUE_TIMEOUT bound an analysis, so allow a little more per request
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "60"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+# Recycle workers periodically, staggered so they don't all restart together
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def when_ready(server):
+    # Move the preloaded objects to the permanent generation so the garbage
+    # collector in workers does not touch (and copy) those shared pages
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    from app import ai_runner, job_manager, warm_up
+    warm_up()  # no-op when the master already preloaded the models
+    ai_runner.start()
+    job_manager.recover_interrupted()
+
+
+def worker_exit(server, worker):
+    from app import extraction_pool
+    extraction_pool.shutdown()
@@ -0,0 +1,350 @@
+"""Submit/poll job API for resume analysis.
+
+A JobManager runs analyses on a bounded worker pool and records their status,
+partial results and final results in a pluggable job store: in memory by
+default, or SQLite when jobs should survive a restart. An optional callback
+URL receives the finished job as JSON.
+
+A job runs on the process that accepted it. SQLite rows record that process,
+and jobs still queued or running when it is gone (restarted, recycled or
+killed) are failed as interrupted by recover_interrupted, which each process
+runs at start-up, so pollers and callbacks are not left waiting forever.
+
+Callback URLs are caller-supplied, so they are checked against an optional
+host allowlist and must resolve only to public addresses (no loopback,
+private, link-local or cloud metadata endpoints), both when the job is
+submitted and again right before the POST. The POST then connects to an
+address from that check, with the original Host header and TLS server name,
+so the host cannot be re-resolved somewhere private in between (DNS
+rebinding). Redirects are not followed. The
+number of queued and running jobs is capped so a flood of submissions is
+rejected instead of growing the queue without bound.
+"""
+import ipaddress
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+INTERRUPTED = "interrupted by restart"
+
+_process_tokens = {}  # pid -> token; a forked child has a new pid and so gets its own
+
+
+class InvalidCallbackUrl(ValueError):
+    """A callback URL that is malformed, not allowed, or points at a non-public address."""
+
+
+class JobQueueFull(RuntimeError):
+    """Too many jobs are already queued or running."""
+
+
+def process_token():
+    """"host:pid:nonce" naming this process; a restart that reuses the pid still gets a new token."""
+    pid = os.getpid()
+    if pid not in _process_tokens:
+        _process_tokens[pid] = f"{socket.gethostname()}:{pid}:{uuid.uuid4().hex}"
+    return _process_tokens[pid]
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by another user
+    return True
+
+
+def process_gone(token):
+    """Whether the process named by a process_token() has exited.
+
+    Processes on other hosts cannot be checked and count as running; tokens
+    missing entirely (rows written before they were recorded) count as gone.
+    """
+    if not token:
+        return True
+    if token == process_token():
+        return False
+    host, pid, _ = token.rsplit(":", 2)
+    if host != socket.gethostname():
+        return False
+    pid = int(pid)
+    return pid == os.getpid() or not process_alive(pid)
+
+
+def resolve_host(host, port):
+    """IP addresses a host name resolves to."""
+    return {info[4][0] for info in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)}
+
+
+def host_allowed(host, allowed_hosts):
+    """Whether host matches the allowlist; ".example.com" also matches its subdomains. Empty allows any."""
+    if not allowed_hosts:
+        return True
+    host = host.lower().rstrip(".")
+    return any(
+        host == pattern.lstrip(".") or (pattern.startswith(".") and host.endswith(pattern))
+        for pattern in (allowed.lower() for allowed in allowed_hosts)
+    )
+
+
+def check_callback_url(url, allowed_hosts=()):
+    """The sorted public addresses url resolves to.
+
+    Raises InvalidCallbackUrl unless url is http(s), allowed, and resolves
+    only to public addresses.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise InvalidCallbackUrl("callback_url must be an http(s) URL")
+    if not host_allowed(parts.hostname, allowed_hosts):
+        raise InvalidCallbackUrl(f"callback_url host is not allowed: {parts.hostname}")
+    try:
+        addresses = resolve_host(parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+    except (OSError, ValueError) as e:
+        raise InvalidCallbackUrl(f"callback_url host does not resolve: {parts.hostname}") from e
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%")[0])
+        if not ip.is_global or ip.is_multicast:
+            raise InvalidCallbackUrl(f"callback_url resolves to a non-public address: {parts.hostname}")
+    return sorted(addresses)
+
+
+def pinned_request(url, address, payload):
+    """An httpx POST of payload to url that connects to address instead of resolving the host again."""
+    parts = urlsplit(url)
+    host = f"[{address}]" if ":" in address else address
+    netloc = f"{host}:{parts.port}" if parts.port else host
+    extensions = {"sni_hostname": parts.hostname} if parts.scheme == "https" else {}
+    return httpx.Request(
+        "POST", urlunsplit(parts._replace(netloc=netloc)), json=payload,
+        headers={"Host": parts.netloc.rsplit("@", 1)[-1]}, extensions=extensions,
+    )
+
+
+def send_callback(url, address, payload, timeout):
+    """POST payload to url over a connection to the already checked address."""
+    with httpx.Client(timeout=timeout, follow_redirects=False, trust_env=False) as client:
+        response = client.send(pinned_request(url, address, payload))
+        response.raise_for_status()
+
+
+class InMemoryJobStore:
+    """Job records in a bounded dict; the oldest jobs are dropped first."""
+
+    def __init__(self, max_jobs=10000):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, job):
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def fail_interrupted(self, error):
+        """Nothing outlives the process here; returns no job ids."""
+        return []
+
+
+class SQLiteJobStore:
+    """Job records in SQLite so they survive restarts and are visible to every worker process."""
+
+    COLUMNS = ("id", "status", "created_at", "updated_at", "callback_url", "partial", "result", "error")
+    JSON_COLUMNS = ("partial", "result")
+
+    def __init__(self, db_path, max_jobs=10000):
+        self.db_path = db_path
+        self.max_jobs = max_jobs
+        self._local = threading.local()
+
+    def _connection(self):
+        # One connection per thread; sqlite3 connections are not shared across threads or forks
+        db = getattr(self._local, "db", None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.db_path, timeout=30)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, created_at REAL NOT NULL, updated_at REAL NOT NULL, "
+                "callback_url TEXT, partial TEXT, result TEXT, error TEXT, worker TEXT)"
+            )
+            if "worker" not in {row[1] for row in db.execute("PRAGMA table_info(jobs)")}:
+                db.execute("ALTER TABLE jobs ADD COLUMN worker TEXT")
+            db.commit()
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    def create(self, job):
+        db = self._connection()
+        row = [json.dumps(job.get(column)) if column in self.JSON_COLUMNS else job.get(column) for column in self.COLUMNS]
+        columns = self.COLUMNS + ("worker",)
+        db.execute(
+            f"INSERT INTO jobs ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", row + [process_token()]
+        )
+        db.execute(
+            "DELETE FROM jobs WHERE id NOT IN (SELECT id FROM jobs ORDER BY created_at DESC LIMIT ?)", (self.max_jobs,)
+        )
+        db.commit()
+
+    def update(self, job_id, **fields):
+        db = self._connection()
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        values = [json.dumps(value) if column in self.JSON_COLUMNS else value for column, value in fields.items()]
+        db.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", values + [job_id])
+        db.commit()
+
+    def get(self, job_id):
+        db = self._connection()
+        row = db.execute(f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(self.COLUMNS, row))
+        for column in self.JSON_COLUMNS:
+            job[column] = json.loads(job[column]) if job[column] is not None else None
+        return job
+
+    def fail_interrupted(self, error):
+        """Fail queued and running jobs whose process is gone; returns their ids."""
+        db = self._connection()
+        rows = db.execute("SELECT id, worker FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)).fetchall()
+        job_ids = [job_id for job_id, worker in rows if process_gone(worker)]
+        now = time.time()
+        for job_id in job_ids:
+            db.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ? AND status IN (?, ?)",
+                (FAILED, error, now, job_id, QUEUED, RUNNING),
+            )
+        db.commit()
+        return job_ids
+
+
+class JobManager:
+    """Runs submitted analyses on a worker pool and tracks them in a job store."""
+
+    def __init__(self, store, max_workers=4, callback_timeout=10.0, max_pending=1000, callback_allowed_hosts=()):
+        self.store = store
+        self.max_workers = max_workers
+        self.callback_timeout = callback_timeout
+        self.max_pending = max_pending
+        self.callback_allowed_hosts = tuple(callback_allowed_hosts)
+        self.pending = 0
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        # Worker threads do not survive fork, so each process builds its own pool
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="resume-job")
+                    self._pid = os.getpid()
+        return self._executor
+
+    def submit(self, fn, *args, callback_url=None):
+        """Queue fn(*args, on_partial=...) and return the new job id.
+
+        Raises InvalidCallbackUrl for a callback URL that may not be called
+        and JobQueueFull when max_pending jobs are already queued or running.
+        """
+        if callback_url:
+            check_callback_url(callback_url, self.callback_allowed_hosts)
+        with self._lock:
+            if self.pending >= self.max_pending:
+                raise JobQueueFull(f"{self.pending} jobs are already queued or running")
+            self.pending += 1
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        self.store.create({
+            "id": job_id,
+            "status": QUEUED,
+            "created_at": now,
+            "updated_at": now,
+            "callback_url": callback_url,
+            "partial": None,
+            "result": None,
+            "error": None,
+        })
+        try:
+            self._pool().submit(self._run, job_id, fn, args)
+        except BaseException:
+            self._release()
+            raise
+        return job_id
+
+    def _release(self):
+        with self._lock:
+            self.pending -= 1
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def recover_interrupted(self):
+        """Fail jobs left queued or running by a process that has exited, and notify their callbacks."""
+        job_ids = self.store.fail_interrupted(INTERRUPTED)
+        if job_ids:
+            logger.warning(f"Failed {len(job_ids)} jobs interrupted by a restart")
+        for job_id in job_ids:
+            self._pool().submit(self._notify, job_id)
+        return job_ids
+
+    def _run(self, job_id, fn, args):
+        try:
+            self.store.update(job_id, status=RUNNING, updated_at=time.time())
+
+            def on_partial(partial):
+                self.store.update(job_id, partial=partial, updated_at=time.time())
+
+            try:
+                result = fn(*args, on_partial=on_partial)
+                self.store.update(job_id, status=COMPLETED, result=result, updated_at=time.time())
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {str(e)}")
+                self.store.update(job_id, status=FAILED, error=str(e), updated_at=time.time())
+            self._notify(job_id)
+        finally:
+            self._release()
+
+    def stats(self):
+        with self._lock:
+            return {"pending": self.pending, "max_pending": self.max_pending}
+
+    def _notify(self, job_id):
+        job = self.store.get(job_id)
+        if not job or not job.get("callback_url"):
+            return
+        try:
+            # Checked again at send time, and the POST goes to an address that passed the check
+            addresses = check_callback_url(job["callback_url"], self.callback_allowed_hosts)
+            send_callback(job["callback_url"], addresses[0], job, self.callback_timeout)
+        except Exception as e:
+            logger.error(f"Callback for job {job_id} to {job['callback_url']} failed: {str(e)}")
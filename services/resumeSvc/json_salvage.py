@@ -0,0 +1,204 @@
+"""Tolerant parsing of LLM JSON output.
+
+Model replies are not always clean JSON: they come wrapped in Markdown
+fences, surrounded by prose, or cut off at max_tokens. parse_json_lenient
+finds the first JSON object in a reply, ignores anything after it, and if the
+object is truncated closes it at the last complete value, so everything the
+model finished writing is kept. conform_to_schema then checks the salvaged
+object against a JSON Schema subset (object, array, string, number, integer,
+boolean), coercing near-misses such as numeric strings, dropping values of
+the wrong type and filling required fields that are missing.
+"""
+import json
+import re
+
+FENCE_PATTERN = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL | re.IGNORECASE)
+LITERAL_PATTERN = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null")
+NUMBER_PATTERN = re.compile(r"^\s*-?\d+(?:\.\d+)?\s*%?\s*$")
+WHITESPACE = " \t\r\n"
+
+
+def strip_code_fences(text):
+    """Return the contents of the first Markdown code fence, or the text itself."""
+    match = FENCE_PATTERN.search(text)
+    return match.group(1) if match else text
+
+
+def _string_end(text, start):
+    """Index just past the string literal opening at start, or None if it is unterminated."""
+    index = start + 1
+    while index < len(text):
+        char = text[index]
+        if char == "\\":
+            index += 2
+            continue
+        if char == '"':
+            return index + 1
+        index += 1
+    return None
+
+
+def close_truncated_json(text):
+    """Make a truncated JSON object parseable by cutting it at the last complete
+    value and closing the containers still open there.
+
+    text must start with "{". Returns the repaired text, or None if not even
+    the opening brace is usable.
+    """
+    frames = []  # per open container: [closer, state]
+    safe_end, safe_closers = None, ""
+
+    def closers():
+        return "".join(frame[0] for frame in reversed(frames))
+
+    def value_done(end):
+        nonlocal safe_end, safe_closers
+        frames[-1][1] = "comma"
+        safe_end, safe_closers = end, closers()
+
+    index = 0
+    while index < len(text):
+        char = text[index]
+        if char in WHITESPACE:
+            index += 1
+            continue
+        if not frames and index > 0:
+            break
+        if char in "{[":
+            if frames and frames[-1][1] not in ("value",):
+                break
+            frames.append(["}" if char == "{" else "]", "key" if char == "{" else "value"])
+            index += 1
+            safe_end, safe_closers = index, closers()
+            continue
+        if not frames:
+            return None
+        frame = frames[-1]
+        if char in "}]":
+            if char != frame[0]:
+                break
+            frames.pop()
+            index += 1
+            if not frames:
+                return text[:index]
+            value_done(index)
+            continue
+        if char == '"':
+            end = _string_end(text, index)
+            if end is None:
+                break
+            if frame[0] == "}" and frame[1] == "key":
+                frame[1] = "colon"
+            elif frame[1] == "value":
+                value_done(end)
+            else:
+                break
+            index = end
+            continue
+        if char == ":" and frame[1] == "colon":
+            frame[1] = "value"
+            index += 1
+            continue
+        if char == "," and frame[1] == "comma":
+            frame[1] = "key" if frame[0] == "}" else "value"
+            index += 1
+            continue
+        match = LITERAL_PATTERN.match(text, index)
+        # A literal running to the end of the text may itself be cut short
+        if match and frame[1] == "value" and match.end() < len(text):
+            index = match.end()
+            value_done(index)
+            continue
+        break
+
+    if safe_end is None:
+        return None
+    return text[:safe_end] + safe_closers
+
+
+def parse_json_lenient(text):
+    """Parse the first JSON object in text, salvaging a truncated one.
+
+    Returns (obj, repaired), where repaired says whether the object had to
+    be closed, or (None, False) when no object can be recovered.
+    """
+    cleaned = strip_code_fences(text or "")
+    start = cleaned.find("{")
+    if start < 0:
+        return None, False
+    try:
+        obj, _ = json.JSONDecoder().raw_decode(cleaned, start)
+        return obj, False
+    except json.JSONDecodeError:
+        pass
+    repaired = close_truncated_json(cleaned[start:])
+    if repaired is None:
+        return None, False
+    try:
+        return json.loads(repaired), True
+    except json.JSONDecodeError:
+        return None, False
+
+
+def _default(schema):
+    return {"object": lambda: {}, "array": lambda: [], "string": lambda: "", "number": lambda: 0,
+            "integer": lambda: 0, "boolean": lambda: False}.get(schema.get("type"), lambda: None)()
+
+
+def conform_to_schema(value, schema):
+    """Coerce value to schema, returning (conformed value, list of problems).
+
+    Values that cannot be coerced become None at the top level, are dropped
+    from arrays, and are replaced by a type default for required properties.
+    """
+    problems = []
+
+    def conform(value, schema, path):
+        expected = schema.get("type")
+        if expected == "object":
+            if not isinstance(value, dict):
+                problems.append(f"{path}: expected object")
+                return None
+            result = dict(value)
+            for name, subschema in schema.get("properties", {}).items():
+                if name in value:
+                    conformed = conform(value[name], subschema, f"{path}.{name}")
+                    if conformed is None:
+                        result.pop(name)
+                    else:
+                        result[name] = conformed
+            for name in schema.get("required", []):
+                if name not in result:
+                    problems.append(f"{path}.{name}: missing")
+                    subschema = schema["properties"].get(name, {})
+                    default = _default(subschema)
+                    # Conforming a missing object's default fills its own required fields
+                    result[name] = conform(default, subschema, f"{path}.{name}") if default == {} else default
+            return result
+        if expected == "array":
+            if not isinstance(value, list):
+                problems.append(f"{path}: expected array")
+                return None
+            items = schema.get("items", {})
+            conformed = [conform(item, items, f"{path}[{index}]") for index, item in enumerate(value)]
+            return [item for item in conformed if item is not None]
+        if expected in ("number", "integer"):
+            if isinstance(value, str) and NUMBER_PATTERN.match(value):
+                value = float(value.strip().rstrip("%").strip())
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                problems.append(f"{path}: expected {expected}")
+                return None
+            return int(value) if expected == "integer" else value
+        if expected == "string":
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return str(value)
+            if not isinstance(value, str):
+                problems.append(f"{path}: expected string")
+                return None
+            return value
+        if expected == "boolean" and not isinstance(value, bool):
+            problems.append(f"{path}: expected boolean")
+            return None
+        return value
+
+    return conform(value, schema, "$"), problems
@@ -0,0 +1,159 @@
+"""MinHash/LSH index for finding near-duplicate resumes.
+
+Users edit a resume a word or two at a time and re-run the analysis against
+the same posting, so the exact-digest result cache never hits. Each resume
+text is reduced to a MinHash signature over its word shingles; signatures
+are split into bands, and resumes sharing any band bucket become candidates
+whose Jaccard similarity is then estimated from the full signatures.
+
+Entries live in a namespace (the job description digest) so only resumes
+scored against the same posting are compared, and the index is an LRU
+bounded by entry count.
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+WORD_PATTERN = re.compile(r"\w+")
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+
+
+def shingles(text, size=3):
+    """Set of lowercased word n-grams; a text shorter than size is one shingle."""
+    words = WORD_PATTERN.findall((text or "").casefold())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[index:index + size]) for index in range(len(words) - size + 1)}
+
+
+def lsh_bands(num_perm, threshold):
+    """(bands, rows) splitting num_perm so pairs at threshold similarity almost surely collide.
+
+    Picks the most rows per band (fewest spurious candidates) whose collision
+    curve midpoint, (1 / bands) ** (1 / rows), stays at or below threshold.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+def estimate_jaccard(signature_a, signature_b):
+    """Fraction of matching MinHash values, an unbiased Jaccard estimate."""
+    return float(np.mean(signature_a == signature_b))
+
+
+class MinHasher:
+    """MinHash signatures from num_perm universal hash functions with a fixed seed.
+
+    Shingles are hashed with BLAKE2b rather than hash(), so signatures agree
+    across processes and restarts.
+    """
+
+    def __init__(self, num_perm=128, shingle_size=3, seed=1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        # a * h + b stays below 2**64 for 32-bit shingle hashes, so nothing overflows
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text):
+        """uint64 array of num_perm minimum hash values for the text's shingles."""
+        grams = shingles(text, self.shingle_size)
+        if not grams:
+            return np.full(self.num_perm, MERSENNE_PRIME, dtype=np.uint64)
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=4).digest(), "little")
+             for gram in grams),
+            dtype=np.uint64, count=len(grams),
+        )
+        permuted = (np.outer(hashes, self._a) + self._b) % MERSENNE_PRIME
+        return permuted.min(axis=0)
+
+
+class NearDuplicateIndex:
+    """Thread-safe LSH index of text signatures with a value per key."""
+
+    def __init__(self, threshold=0.9, num_perm=128, shingle_size=3, max_entries=10000):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+        self.bands, self.rows = lsh_bands(num_perm, threshold)
+        self._entries = OrderedDict()  # key -> (namespace, signature, value)
+        self._buckets = {}  # (namespace, band, band bytes) -> set of keys
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def signature(self, text):
+        return self.hasher.signature(text)
+
+    def _band_keys(self, namespace, signature):
+        for band in range(self.bands):
+            yield namespace, band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, key, signature, value, namespace=""):
+        """Index signature under key, replacing any earlier entry for the key."""
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (namespace, signature, value)
+            for band_key in self._band_keys(namespace, signature):
+                self._buckets.setdefault(band_key, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def find(self, signature, namespace=""):
+        """(key, similarity, value) of the most similar entry at or above the threshold, or None."""
+        with self._lock:
+            candidates = set()
+            for band_key in self._band_keys(namespace, signature):
+                candidates |= self._buckets.get(band_key, set())
+            best = None
+            for key in candidates:
+                similarity = estimate_jaccard(signature, self._entries[key][1])
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (key, similarity, self._entries[key][2])
+            if best is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best[0])
+            self.hits += 1
+            return best
+
+    def discard(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "threshold": self.threshold,
+                "bands": self.bands,
+                "rows": self.rows,
+            }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        namespace, signature, _ = entry
+        for band_key in self._band_keys(namespace, signature):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
@@ -0,0 +1,130 @@
+"""Single-pass PDF ingestion for the resume service.
+
+A resume PDF is parsed once into a ParsedDocument that holds per-page text,
+word counts and layout signals. Text extraction and the formatting check both
+read from that object instead of building their own PdfReader. Page count,
+per-page text and total text can be capped so hostile documents stay cheap
+to parse, and long documents can be parsed as page ranges in parallel and
+merged. A ParsedDocument round-trips through a plain dict so a parse can be
+stored and reused instead of repeated.
+"""
+import re
+from dataclasses import asdict, dataclass, field
+
+from pypdf import PdfReader
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+# Extracted text that mentions images or tables usually means an ATS-hostile layout
+LAYOUT_MARKER_PATTERN = re.compile(r'image|table', re.IGNORECASE)
+
+
+@dataclass
+class ParsedPage:
+    """Normalized text and layout signals for a single PDF page."""
+    text: str
+    word_count: int
+    mentions_layout: bool
+
+
+@dataclass
+class ParsedDocument:
+    """Everything the service needs from a PDF, produced by a single parse."""
+    pages: list = field(default_factory=list)
+    # True when pages or page text were dropped to stay within the parse limits
+    truncated: bool = False
+
+    @property
+    def text(self):
+        """Cleaned text of the whole document, pages separated by a space."""
+        return " ".join(page.text for page in self.pages).strip()
+
+    @property
+    def page_count(self):
+        return len(self.pages)
+
+    @property
+    def word_counts(self):
+        return [page.word_count for page in self.pages]
+
+    def to_dict(self):
+        """JSON-serializable form, for storing a parse and reusing it later."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(pages=[ParsedPage(**page) for page in data["pages"]], truncated=data["truncated"])
+
+
+def parse_page_text(raw_text):
+    """Build a ParsedPage from the raw text pypdf extracted for one page."""
+    text = WHITESPACE_PATTERN.sub(' ', raw_text or "").strip()
+    return ParsedPage(
+        text=text,
+        word_count=len(text.split()),
+        mentions_layout=bool(LAYOUT_MARKER_PATTERN.search(text)),
+    )
+
+
+def _parse_pages(reader, start, stop, max_page_chars=None, max_chars=None):
+    """ParsedDocument for pages [start, stop) of an open reader, stopping at max_chars of text."""
+    document = ParsedDocument()
+    chars = 0
+    for index in range(start, stop):
+        if max_chars is not None and chars >= max_chars:
+            document.truncated = True
+            break
+        raw_text = reader.pages[index].extract_text() or ""
+        if max_page_chars is not None and len(raw_text) > max_page_chars:
+            raw_text = raw_text[:max_page_chars]
+            document.truncated = True
+        page = parse_page_text(raw_text)
+        document.pages.append(page)
+        chars += len(page.text)
+    return document
+
+
+def count_pages(pdf_file):
+    """Number of pages in a PDF, without extracting any text."""
+    return len(PdfReader(pdf_file).pages)
+
+
+def parse_pdf(pdf_file, max_pages=None, max_page_chars=None, max_chars=None):
+    """Parse a PDF file object (or path) into a ParsedDocument.
+
+    Only the first max_pages pages are read, each page's extracted text is
+    cut to max_page_chars, and extraction stops once the pages read so far
+    hold max_chars characters. Errors from pypdf are propagated; callers
+    decide how to surface them.
+    """
+    reader = PdfReader(pdf_file)
+    page_count = len(reader.pages)
+    stop = min(page_count, max_pages) if max_pages is not None else page_count
+    document = _parse_pages(reader, 0, stop, max_page_chars, max_chars)
+    document.truncated = document.truncated or stop < page_count
+    return document
+
+
+def parse_page_range(pdf_file, start, stop, max_page_chars=None, max_chars=None):
+    """Parse pages [start, stop) of a PDF, stopping at max_chars of text; one unit of parallel extraction."""
+    return _parse_pages(PdfReader(pdf_file), start, stop, max_page_chars, max_chars)
+
+
+def page_ranges(page_count, parts):
+    """Split page_count pages into at most `parts` contiguous (start, stop) ranges."""
+    size = -(-page_count // max(1, parts))
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def merge_documents(parts, max_chars=None, truncated=False):
+    """Join page-range documents in order, dropping pages once max_chars of text is reached."""
+    merged = ParsedDocument(truncated=truncated)
+    chars = 0
+    for part in parts:
+        merged.truncated = merged.truncated or part.truncated
+        for page in part.pages:
+            if max_chars is not None and chars >= max_chars:
+                merged.truncated = True
+                return merged
+            merged.pages.append(page)
+            chars += len(page.text)
+    return merged
@@ -0,0 +1,162 @@
+"""Process pool for the CPU-bound parts of an analysis.
+
+PDF parsing, skill matching and the regex battery are pure Python and hold
+the GIL, so in a threaded worker they serialize every other request behind
+them, including health checks and cache hits. Running them in child processes
+leaves the request threads free for I/O and the xAI calls.
+
+With max_workers set to 0 the pool runs work inline on the calling thread.
+
+Stage timings (metrics.timed_stage) recorded in a child would stay in the
+child's histograms. With on_stage_timings set, each task's timings are sent
+back with its result and passed to on_stage_timings in the context of the
+caller that submitted it, so they reach the parent's metrics and the
+request's Server-Timing header.
+"""
+import contextvars
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, InvalidStateError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from metrics import collect_stage_timings
+
+logger = logging.getLogger(__name__)
+
+
+def _call_collecting_timings(fn, *args):
+    """(fn(*args), {stage: seconds} timed during the call); runs in a child process."""
+    with collect_stage_timings() as timings:
+        result = fn(*args)
+    return result, timings
+
+
+class ExtractionPool:
+    """Lazily started ProcessPoolExecutor whose children run an initializer once."""
+
+    def __init__(self, max_workers=0, initializer=None, start_method="spawn", on_stage_timings=None):
+        self.max_workers = max_workers
+        self.initializer = initializer
+        self.start_method = start_method
+        self.on_stage_timings = on_stage_timings
+        self.submitted = 0
+        self.restarts = 0
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_workers > 0
+
+    def _pool(self):
+        # A pool belongs to the process that started it; forked workers start their own.
+        # Children are spawned by default so they don't inherit the parent's threads.
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context(self.start_method),
+                        initializer=self.initializer,
+                    )
+                    self._pid = os.getpid()
+        return self._executor
+
+    def _restart(self, broken):
+        with self._lock:
+            if self._executor is broken:
+                logger.error("Extraction process pool broke, starting a new one")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+                self.restarts += 1
+
+    def _task(self, fn, args):
+        if self.on_stage_timings is None:
+            return fn, args
+        return _call_collecting_timings, (fn,) + args
+
+    def _unwrap(self, inner):
+        """A Future for the result of a task submitted through _task, reporting its timings."""
+        if self.on_stage_timings is None:
+            return inner
+        outer = Future()
+        context = contextvars.copy_context()
+
+        def relay(done):
+            if outer.cancelled():
+                return
+            try:
+                if done.cancelled():
+                    outer.cancel()
+                    return
+                error = done.exception()
+                if error is not None:
+                    outer.set_exception(error)
+                    return
+                result, timings = done.result()
+                context.run(self.on_stage_timings, timings)
+                outer.set_result(result)
+            except InvalidStateError:
+                pass  # cancelled by the caller meanwhile
+
+        outer.add_done_callback(lambda future: future.cancelled() and inner.cancel())
+        inner.add_done_callback(relay)
+        return outer
+
+    def submit(self, fn, *args):
+        """Run fn(*args) in a child process (or inline when disabled) and return a Future."""
+        if not self.enabled:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        executor = self._pool()
+        task, task_args = self._task(fn, args)
+        try:
+            future = executor.submit(task, *task_args)
+        except BrokenProcessPool:
+            self._restart(executor)
+            future = self._pool().submit(task, *task_args)
+        self.submitted += 1
+        return self._unwrap(future)
+
+    def run(self, fn, *args):
+        """Run fn(*args) in a child process and return its result.
+
+        A child dying mid-task (e.g. killed for memory) breaks the whole pool;
+        the pool is restarted and the call retried once.
+        """
+        if not self.enabled:
+            return fn(*args)
+        executor = self._pool()
+        task, task_args = self._task(fn, args)
+        self.submitted += 1
+        try:
+            result = executor.submit(task, *task_args).result()
+        except BrokenProcessPool:
+            self._restart(executor)
+            result = self._pool().submit(task, *task_args).result()
+        if self.on_stage_timings is None:
+            return result
+        result, timings = result
+        self.on_stage_timings(timings)
+        return result
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self):
+        return {
+            "processes": self.max_workers,
+            "start_method": self.start_method if self.enabled else None,
+            "submitted": self.submitted,
+            "restarts": self.restarts,
+        }
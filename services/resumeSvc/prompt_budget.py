@@ -0,0 +1,120 @@
+"""Prompt compaction and token budgeting for the xAI analysis.
+
+Input tokens drive both the cost and the latency of an analysis, so the
+prompt sections are compacted (job-posting boilerplate dropped, whitespace
+and repeated sentences removed, JSON serialized without indentation) and then
+truncated by priority to fit a token budget. The output cap is sized from
+the response schema instead of a fixed number.
+"""
+import json
+import math
+import re
+
+try:
+    import tiktoken
+except ImportError:  # optional; fall back to a character-based estimate
+    tiktoken = None
+
+_encoding = None
+
+SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[.!?;])\s+|\s*\n\s*')
+WHITESPACE_PATTERN = re.compile(r'[ \t\r\f\v]+')
+# Sentences in job postings that carry no information about the role itself
+BOILERPLATE_PATTERN = re.compile(
+    r"equal opportunity|affirmative action|without regard to|regardless of (race|age|gender)|"
+    r"reasonable accommodation|e-verify|privacy (policy|notice)|"
+    r"protected (veteran|characteristic|status)|sexual orientation|gender identity|national origin|"
+    r"(competitive|comprehensive) (salary|compensation|benefits)|benefits include|401\(?k\)?|paid time off|"
+    r"\bpto\b|parental leave|about (us|the company)|follow us on|apply (now|today)|"
+    r"click (here|apply)|to learn more",
+    re.IGNORECASE,
+)
+TRUNCATION_MARKER = " [truncated]"
+
+
+def count_tokens(text):
+    """Count tokens locally: exactly with tiktoken when installed, else ~4 characters per token."""
+    global _encoding
+    if not text:
+        return 0
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        return len(_encoding.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def split_sentences(text):
+    return [sentence for sentence in SENTENCE_SPLIT_PATTERN.split(text or "") if sentence and sentence.strip()]
+
+
+def dedupe_text(text):
+    """Collapse whitespace and drop sentences that repeat earlier ones (e.g. page headers)."""
+    seen = set()
+    kept = []
+    for sentence in split_sentences(text):
+        sentence = WHITESPACE_PATTERN.sub(' ', sentence).strip()
+        key = sentence.casefold()
+        if key and key not in seen:
+            seen.add(key)
+            kept.append(sentence)
+    return " ".join(kept)
+
+
+def strip_job_boilerplate(job_desc):
+    """Drop EEO statements, benefits blurbs and calls to action from a job description."""
+    return " ".join(sentence for sentence in split_sentences(job_desc) if not BOILERPLATE_PATTERN.search(sentence))
+
+
+def compact_json(data):
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Cut text down to roughly max_tokens, marking the cut."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+    marker_tokens = count_tokens(TRUNCATION_MARKER)
+    keep = max(max_tokens - marker_tokens, 0)
+    if tiktoken is not None:
+        truncated = _encoding.decode(_encoding.encode(text)[:keep])
+    else:
+        truncated = text[:keep * 4]
+    return truncated.rstrip() + TRUNCATION_MARKER
+
+
+def fit_sections(sections, budget):
+    """Truncate sections so their total token count fits the budget.
+
+    sections is a list of dicts with "name", "text", "priority" (higher is kept
+    longer) and optional "min_tokens". Lower-priority sections are cut down to
+    their floor first; if that is not enough, floors are ignored in the same
+    order. Returns {name: text}.
+    """
+    texts = {section["name"]: section["text"] for section in sections}
+    tokens = {name: count_tokens(text) for name, text in texts.items()}
+    overflow = sum(tokens.values()) - budget
+    ordered = sorted(sections, key=lambda section: section["priority"])
+
+    for respect_floor in (True, False):
+        for section in ordered:
+            if overflow <= 0:
+                return texts
+            name = section["name"]
+            floor = section.get("min_tokens", 0) if respect_floor else 0
+            cut = min(tokens[name] - floor, overflow)
+            if cut <= 0:
+                continue
+            texts[name] = truncate_to_tokens(texts[name], tokens[name] - cut)
+            new_tokens = count_tokens(texts[name])
+            overflow -= tokens[name] - new_tokens
+            tokens[name] = new_tokens
+    return texts
+
+
+def estimate_output_tokens(schema, items_per_list=8, tokens_per_item=16, floor=0, ceiling=2000):
+    """Size the completion cap to the response schema: its skeleton plus room for each list, within [floor, ceiling]."""
+    lists = schema.count("[")
+    return max(floor, min(ceiling, count_tokens(schema) + lists * items_per_list * tokens_per_item))
@@ -0,0 +1,216 @@
+"""Content-addressed cache of resume analysis results.
+
+Results are keyed by the digest of the resume bytes and the digest of the
+normalized job description, so re-running the same resume against the same
+posting skips PDF parsing, local extraction and the xAI call entirely.
+
+The in-memory tier is an LRU bounded by entry count and serialized size, with
+a TTL on every entry. An optional SQLite tier survives restarts. It is held
+to the same byte budget through a size column whose running total triggers
+keep in a one-row table, so a write never scans the table, and its I/O runs
+outside the in-memory lock so memory hits never wait on the disk.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_job_description(job_desc):
+    """Collapse whitespace and case so cosmetic edits map to the same posting."""
+    return WHITESPACE_PATTERN.sub(' ', job_desc or "").strip().casefold()
+
+
+def job_description_digest(job_desc):
+    """SHA-256 of the normalized job description."""
+    return hashlib.sha256(normalize_job_description(job_desc).encode("utf-8")).hexdigest()
+
+
+def result_cache_key(resume_hash, job_hash, mode):
+    """Build the cache key for a resume/job pair analyzed in the given mode."""
+    return f"{mode}:{resume_hash}:{job_hash}"
+
+
+class ResultCache:
+    """Thread-safe LRU/TTL cache of JSON-serializable results with an optional SQLite tier."""
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttl_seconds=3600, db_path=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self._entries = OrderedDict()  # key -> (expires_at, payload)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()  # serializes use of the shared SQLite connection
+        self._db = None
+        self._db_pid = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connection(self):
+        """Open the SQLite tier lazily, once per process (connections do not survive fork)."""
+        if not self.db_path:
+            return None
+        if self._db is None or self._db_pid != os.getpid():
+            db = sqlite3.connect(self.db_path, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, payload TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL, "
+                "size INTEGER NOT NULL DEFAULT 0)"
+            )
+            columns = {row[1] for row in db.execute("PRAGMA table_info(results)")}
+            if "size" not in columns:
+                # Tables written before the size column existed
+                db.execute("ALTER TABLE results ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+                db.execute("UPDATE results SET size = LENGTH(payload)")
+            db.execute("CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at)")
+            db.execute("CREATE INDEX IF NOT EXISTS results_expires_at ON results (expires_at)")
+            db.execute("CREATE TABLE IF NOT EXISTS results_size (id INTEGER PRIMARY KEY CHECK (id = 1), total INTEGER NOT NULL)")
+            db.execute("INSERT OR IGNORE INTO results_size VALUES (1, (SELECT COALESCE(SUM(size), 0) FROM results))")
+            db.executescript("""
+                CREATE TRIGGER IF NOT EXISTS results_size_insert AFTER INSERT ON results
+                BEGIN UPDATE results_size SET total = total + NEW.size; END;
+                CREATE TRIGGER IF NOT EXISTS results_size_delete AFTER DELETE ON results
+                BEGIN UPDATE results_size SET total = total - OLD.size; END;
+                CREATE TRIGGER IF NOT EXISTS results_size_update AFTER UPDATE OF size ON results
+                BEGIN UPDATE results_size SET total = total - OLD.size + NEW.size; END;
+            """)
+            db.commit()
+            self._db = db
+            self._db_pid = os.getpid()
+        return self._db
+
+    def get(self, key):
+        """Return a fresh copy of the cached result, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, payload = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(payload)
+                self._remove(key)
+
+        payload = self._disk_get(key, now)
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+                return None
+            self._store(key, payload, now)
+            self.disk_hits += 1
+        return json.loads(payload)
+
+    def set(self, key, result):
+        """Cache a JSON-serializable result."""
+        payload = json.dumps(result, separators=(",", ":"))
+        now = time.time()
+        with self._lock:
+            self._store(key, payload, now)
+        self._disk_set(key, payload, now)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        with self._db_lock:
+            db = self._connection()
+            if db is not None:
+                db.execute("DELETE FROM results")
+                db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "disk_tier": bool(self.db_path),
+            }
+
+    def _store(self, key, payload, now):
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = (now + self.ttl_seconds, payload)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def _disk_get(self, key, now):
+        if not self.db_path:
+            return None
+        with self._db_lock:
+            return self._disk_get_locked(key, now)
+
+    def _disk_get_locked(self, key, now):
+        try:
+            db = self._connection()
+            row = db.execute("SELECT payload, expires_at FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            payload, expires_at = row
+            if expires_at <= now:
+                db.execute("DELETE FROM results WHERE key = ?", (key,))
+                db.commit()
+                return None
+            db.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+            db.commit()
+            return payload
+        except sqlite3.Error as e:
+            logger.error(f"Result cache disk read failed: {str(e)}")
+            return None
+
+    def _disk_set(self, key, payload, now):
+        if not self.db_path:
+            return
+        with self._db_lock:
+            self._disk_set_locked(key, payload, now)
+
+    def _disk_set_locked(self, key, payload, now):
+        try:
+            db = self._connection()
+            db.execute(
+                "INSERT INTO results (key, payload, expires_at, accessed_at, size) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET payload = excluded.payload, expires_at = excluded.expires_at, "
+                "accessed_at = excluded.accessed_at, size = excluded.size",
+                (key, payload, now + self.ttl_seconds, now, len(payload)),
+            )
+            db.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+            # Keep the disk tier within the same byte budget, dropping least recently used rows
+            while db.execute("SELECT total FROM results_size").fetchone()[0] > self.max_bytes:
+                deleted = db.execute(
+                    "DELETE FROM results WHERE key = (SELECT key FROM results ORDER BY accessed_at LIMIT 1)"
+                ).rowcount
+                if not deleted:
+                    break
+            db.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Result cache disk write failed: {str(e)}")
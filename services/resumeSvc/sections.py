@@ -0,0 +1,104 @@
+"""Resume section segmentation for incremental analysis.
+
+Resume text arrives with its line breaks collapsed, so sections are found by
+their headings: a known heading phrase followed by a colon ("Skills:") or
+written in capitals ("WORK EXPERIENCE"). Lower-case mentions such as
+"5 years of experience" are not headings. Text before the first heading is
+the contact block.
+
+Sections are compared between versions of a resume by content, and the
+extraction results of separately analyzed sections can be merged back into
+the shape extract_skills_and_experience returns for a whole resume.
+"""
+import hashlib
+import re
+
+CONTACT = "contact"
+SECTION_HEADINGS = {
+    "summary": ("summary", "professional summary", "profile", "objective", "about me"),
+    "experience": ("experience", "work experience", "professional experience", "employment history",
+                   "work history", "employment"),
+    "education": ("education", "academic background"),
+    "skills": ("skills", "technical skills", "core competencies"),
+    "certifications": ("certifications", "certification", "licenses and certifications",
+                       "licenses & certifications"),
+}
+SECTION_NAMES = (CONTACT,) + tuple(SECTION_HEADINGS)
+
+_HEADING_TO_SECTION = {heading: name for name, headings in SECTION_HEADINGS.items() for heading in headings}
+HEADING_PATTERN = re.compile(
+    r"(?<!\w)(" + "|".join(re.escape(heading) for heading in sorted(_HEADING_TO_SECTION, key=len, reverse=True))
+    + r")(?!\w)(\s*:)?",
+    re.IGNORECASE,
+)
+
+
+def find_headings(text):
+    """(start, section name) of every heading in the text, in order."""
+    headings = []
+    for match in HEADING_PATTERN.finditer(text or ""):
+        if match.group(2) or match.group(1).isupper():
+            headings.append((match.start(), _HEADING_TO_SECTION[match.group(1).lower()]))
+    return headings
+
+
+def segment_resume(text):
+    """{section name: text} in order of first appearance, headings included.
+
+    A section that appears more than once (e.g. experience split across
+    pages) is joined into one.
+    """
+    text = (text or "").strip()
+    sections = {}
+    bounds = find_headings(text)
+    if not bounds or bounds[0][0] > 0:
+        bounds.insert(0, (0, CONTACT))
+    for index, (start, name) in enumerate(bounds):
+        stop = bounds[index + 1][0] if index + 1 < len(bounds) else len(text)
+        chunk = text[start:stop].strip()
+        if chunk:
+            sections[name] = f"{sections[name]} {chunk}" if name in sections else chunk
+    return sections
+
+
+def section_digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def diff_sections(previous, current):
+    """Compare two segmentations: (changed, unchanged, removed) section names.
+
+    changed lists sections of current that are new or whose text differs.
+    """
+    changed = [name for name, text in current.items() if previous.get(name) != text]
+    unchanged = [name for name in current if name not in changed]
+    removed = [name for name in previous if name not in current]
+    return changed, unchanged, removed
+
+
+def _extend_unique(target, items):
+    for item in items:
+        if item not in target:
+            target.append(item)
+
+
+def merge_extractions(parts):
+    """Merge per-section extraction results into one whole-resume result.
+
+    Lists keep first-seen order without duplicates, experience years add up.
+    """
+    merged = {
+        "skills": [],
+        "total_experience_years": 0,
+        "relevant_experience": {},
+        "education": [],
+        "certifications": [],
+    }
+    for part in parts:
+        merged["total_experience_years"] += part["total_experience_years"]
+        for role, years in part["relevant_experience"].items():
+            merged["relevant_experience"][role] = merged["relevant_experience"].get(role, 0) + years
+        for field in ("skills", "education", "certifications", "organizations", "dates"):
+            if field in part:
+                _extend_unique(merged.setdefault(field, []), part[field])
+    return merged
@@ -0,0 +1,150 @@
+"""TF-IDF semantic similarity between resumes and job descriptions.
+
+Terms are hashed into a fixed feature space, so every word of a resume or
+posting counts, not only those of the fitting corpus; the corpus only sets
+the IDF weights, and terms it never saw get the highest weight. The fitted
+state is that IDF vector alone, persisted as a plain .npy array (never a
+pickle, so a model file cannot run code when loaded). Job-description
+vectors are cached by content digest. Because rows are L2-normalized, scoring
+many resumes against many postings is a single sparse matrix product.
+"""
+import hashlib
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.pipeline import make_pipeline
+
+logger = logging.getLogger(__name__)
+
+N_FEATURES = 2 ** 20
+
+
+def build_vectorizer():
+    return make_pipeline(
+        HashingVectorizer(stop_words="english", ngram_range=(1, 2), n_features=N_FEATURES,
+                          alternate_sign=False, norm=None),
+        TfidfTransformer(sublinear_tf=True),
+    )
+
+
+def load_vectorizer(model_path):
+    """A vectorizer with the IDF weights saved at model_path; raises ValueError for anything else."""
+    idf = np.load(model_path, allow_pickle=False)
+    if idf.shape != (N_FEATURES,):
+        raise ValueError(f"expected {N_FEATURES} IDF weights, found shape {idf.shape}")
+    vectorizer = build_vectorizer()
+    vectorizer[-1].idf_ = idf
+    return vectorizer
+
+
+def load_corpus(corpus_path):
+    """Read a corpus file with one document per line."""
+    with open(corpus_path, encoding="utf-8") as corpus_file:
+        return [line.strip() for line in corpus_file if line.strip()]
+
+
+class SemanticScorer:
+    """Cosine similarity between texts in a shared, persisted TF-IDF space."""
+
+    def __init__(self, bootstrap_corpus=(), model_path=None, corpus_path=None, max_cached_jobs=1024):
+        self.bootstrap_corpus = list(bootstrap_corpus)
+        self.model_path = model_path
+        self.corpus_path = corpus_path
+        self.max_cached_jobs = max_cached_jobs
+        self._vectorizer = None
+        self._job_vectors = OrderedDict()  # job digest -> 1 x V sparse row
+        self._lock = threading.Lock()
+
+    @property
+    def vectorizer(self):
+        """The fitted vectorizer, loaded or fitted on first use."""
+        if self._vectorizer is None:
+            with self._lock:
+                if self._vectorizer is None:
+                    self._vectorizer = self._load_or_fit()
+        return self._vectorizer
+
+    def _load_or_fit(self):
+        if self.model_path and os.path.exists(self.model_path):
+            try:
+                vectorizer = load_vectorizer(self.model_path)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring TF-IDF model at {self.model_path}: {str(e)}")
+            else:
+                logger.info(f"Loaded TF-IDF model from {self.model_path}")
+                return vectorizer
+
+        corpus = list(self.bootstrap_corpus)
+        if self.corpus_path:
+            corpus.extend(load_corpus(self.corpus_path))
+        vectorizer = build_vectorizer().fit(corpus)
+        logger.info(f"Fitted TF-IDF model on {len(corpus)} documents")
+        if self.model_path:
+            self.save(vectorizer)
+        return vectorizer
+
+    def fit(self, corpus):
+        """Refit the vectorizer on a new corpus, persisting it if a model path is set."""
+        vectorizer = build_vectorizer().fit(list(self.bootstrap_corpus) + list(corpus))
+        with self._lock:
+            self._vectorizer = vectorizer
+            self._job_vectors.clear()
+        if self.model_path:
+            self.save(vectorizer)
+        return vectorizer
+
+    def save(self, vectorizer=None):
+        # Write then rename so concurrent workers never load a half-written model
+        temp_path = f"{self.model_path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as model_file:
+            np.save(model_file, (vectorizer or self.vectorizer)[-1].idf_, allow_pickle=False)
+        os.replace(temp_path, self.model_path)
+
+    def job_matrix(self, job_descs):
+        """TF-IDF rows for job descriptions, reusing cached vectors."""
+        vectorizer = self.vectorizer
+        digests = [hashlib.sha256(job_desc.encode("utf-8")).hexdigest() for job_desc in job_descs]
+        rows = {}
+        missing = []
+        with self._lock:
+            for digest, job_desc in zip(digests, job_descs):
+                if digest in self._job_vectors:
+                    self._job_vectors.move_to_end(digest)
+                    rows[digest] = self._job_vectors[digest]
+                elif digest not in rows:
+                    rows[digest] = None
+                    missing.append((digest, job_desc))
+
+        if missing:
+            vectors = vectorizer.transform([job_desc for _, job_desc in missing])
+            with self._lock:
+                for index, (digest, _) in enumerate(missing):
+                    rows[digest] = vectors[index]
+                    self._job_vectors[digest] = vectors[index]
+                while len(self._job_vectors) > self.max_cached_jobs:
+                    self._job_vectors.popitem(last=False)
+
+        return sparse.vstack([rows[digest] for digest in digests], format="csr")
+
+    def similarity(self, resume_texts, job_descs):
+        """Cosine similarity matrix of shape (len(resume_texts), len(job_descs))."""
+        if not resume_texts or not job_descs:
+            return sparse.csr_matrix((len(resume_texts), len(job_descs))).toarray()
+        resumes = self.vectorizer.transform(resume_texts)
+        return (resumes @ self.job_matrix(job_descs).T).toarray()
+
+
+if __name__ == "__main__":
+    # Fit and persist a model: python semantic_scorer.py corpus.txt model.npy
+    if len(sys.argv) != 3:
+        print("usage: python semantic_scorer.py CORPUS_PATH MODEL_PATH")
+        sys.exit(1)
+    logging.basicConfig(level=logging.INFO)
+    scorer = SemanticScorer(model_path=sys.argv[2])
+    scorer.fit(load_corpus(sys.argv[1]))
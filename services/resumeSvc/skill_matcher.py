@@ -0,0 +1,88 @@
+"""Compiled skill matching.
+
+All skills in a taxonomy are compiled into a single trie-shaped regex so a
+text is scanned once, no matter how many skills there are. Matches respect
+word boundaries ("go" does not match inside "google") and report the
+canonical skill, the original-case surface form and its offsets.
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+SkillMatch = namedtuple("SkillMatch", ["skill", "surface", "start", "end"])
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_skill(skill):
+    """Lowercase a skill and collapse internal whitespace."""
+    return WHITESPACE_PATTERN.sub(' ', skill).strip().lower()
+
+
+def _trie_pattern(words):
+    """Build a regex that matches any of the words, sharing common prefixes."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return _node_pattern(trie)
+
+
+def _node_pattern(node):
+    alternatives = []
+    terminal = False
+    for char in sorted(node):
+        if char == '':
+            terminal = True
+            continue
+        char_pattern = r'\s+' if char == ' ' else re.escape(char)
+        alternatives.append(char_pattern + _node_pattern(node[char]))
+    if not alternatives:
+        return ''
+    pattern = alternatives[0] if len(alternatives) == 1 else '(?:' + '|'.join(alternatives) + ')'
+    if terminal:
+        # Greedy optional suffix: prefer the longest skill, back off to the shorter one
+        pattern = '(?:' + pattern + ')?'
+    return pattern
+
+
+class SkillMatcher:
+    """Matches every skill of a taxonomy in a single pass over the text."""
+
+    def __init__(self, skills):
+        self.skills = {}
+        for skill in sorted(skills):
+            key = normalize_skill(skill)
+            if key:
+                self.skills.setdefault(key, skill)
+        if self.skills:
+            self.pattern = re.compile(
+                r'(?<!\w)' + _trie_pattern(sorted(self.skills)) + r'(?!\w)', re.IGNORECASE
+            )
+        else:
+            self.pattern = None
+
+    def finditer(self, text):
+        """Yield a SkillMatch for every skill occurrence, left to right."""
+        if self.pattern is None or not text:
+            return
+        for match in self.pattern.finditer(text):
+            surface = match.group(0)
+            skill = self.skills.get(normalize_skill(surface))
+            if skill is not None:
+                yield SkillMatch(skill, surface, match.start(), match.end())
+
+    def first_matches(self, text):
+        """Return the first SkillMatch of each distinct skill, keyed by canonical skill."""
+        found = {}
+        for match in self.finditer(text):
+            found.setdefault(match.skill, match)
+        return found
+
+
+@lru_cache(maxsize=256)
+def get_skill_matcher(skills):
+    """Return a compiled matcher for a frozenset of skills, reusing earlier compiles."""
+    return SkillMatcher(skills)
@@ -0,0 +1,261 @@
+"""Local OpenAI-compatible stand-in for the xAI API, for capacity testing.
+
+Serves /v1/chat/completions (plain and streamed) with configurable latency
+distributions and injected failures: 429 rate limits, 500 errors, malformed
+replies and Markdown-fenced JSON. Point the service at it with
+
+    python stub_xai.py --port 8089 --latency lognormal:-0.5,0.6 --rate-limit-rate 0.05
+    XAI_BASE_URL=http://127.0.0.1:8089/v1 python app.py
+"""
+import argparse
+import json
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# A reply matching the BASE_PROMPT schema
+DEFAULT_RESPONSE = json.dumps({
+    "data": {
+        "skills": [{"name": "Python", "confidence": 0.9, "relevance": 0.9}],
+        "total_experience_years": 9,
+        "relevant_experience": {"roles": [], "improvement_areas": []},
+        "education": ["BS in Computer Science"],
+        "certifications": ["AWS Certified"],
+        "missing_keywords": [],
+    },
+    "ats_score": "85.00%",
+    "breakdown": {"skills": 40, "experience": 25, "education_certifications": 10, "formatting": 5,
+                  "keyword_optimization": 5},
+    "improvement_suggestions": {"critical": [], "recommended": [], "advanced": []},
+})
+
+MALFORMED_RESPONSES = [
+    lambda content: content[:len(content) // 2],  # truncated, as if cut off at max_tokens
+    lambda content: "Here is the analysis you asked for:\n" + content,  # prose before the JSON
+    lambda content: "I'm sorry, I can't help with that.",
+]
+
+
+def parse_latency(spec):
+    """Turn "fixed:S", "uniform:A,B", "normal:MEAN,SD", "lognormal:MU,SIGMA" or "exponential:MEAN"
+    into a function of a random.Random that returns a delay in seconds."""
+    name, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",") if value]
+    distributions = {
+        "fixed": (1, lambda rng, s: s),
+        "uniform": (2, lambda rng, a, b: rng.uniform(a, b)),
+        "normal": (2, lambda rng, mean, sd: rng.gauss(mean, sd)),
+        "lognormal": (2, lambda rng, mu, sigma: rng.lognormvariate(mu, sigma)),
+        "exponential": (1, lambda rng, mean: rng.expovariate(1 / mean) if mean > 0 else 0.0),
+    }
+    if name not in distributions or len(values) != distributions[name][0]:
+        raise ValueError(f"Invalid latency spec: {spec!r}")
+    sample = distributions[name][1]
+    return lambda rng: max(0.0, sample(rng, *values))
+
+
+@dataclass
+class StubConfig:
+    latency: str = "fixed:0"
+    rate_limit_rate: float = 0.0
+    error_rate: float = 0.0
+    malformed_rate: float = 0.0
+    fenced_rate: float = 0.0
+    stream_chunk_chars: int = 40
+    stream_chunk_delay: float = 0.0
+    retry_after: int = 1
+    response: str = DEFAULT_RESPONSE
+    seed: int = None
+    stats: dict = field(default_factory=lambda: {
+        "requests": 0, "rate_limited": 0, "errors": 0, "malformed": 0, "fenced": 0, "streamed": 0
+    })
+
+    def __post_init__(self):
+        self.sample_latency = parse_latency(self.latency)
+        self.rng = random.Random(self.seed)
+        self.lock = threading.Lock()
+
+    def roll(self, rate):
+        with self.lock:
+            return self.rng.random() < rate
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = None  # set by make_server
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self.send_json(200, {"object": "list", "data": [{"id": "grok-2-latest", "object": "model"}]})
+        elif self.path.rstrip("/") == "/stats":
+            with self.config.lock:
+                self.send_json(200, dict(self.config.stats))
+        else:
+            self.send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_json(404, {"error": {"message": "Not found"}})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self.send_json(400, {"error": {"message": "Invalid JSON body"}})
+            return
+
+        config = self.config
+        config.count("requests")
+        time.sleep(config.sample_latency(config.rng))
+
+        if config.roll(config.rate_limit_rate):
+            config.count("rate_limited")
+            self.send_json(429, {"error": {"message": "Rate limit exceeded", "type": "rate_limit_error"}},
+                           headers={"Retry-After": str(config.retry_after)})
+            return
+        if config.roll(config.error_rate):
+            config.count("errors")
+            self.send_json(500, {"error": {"message": "Internal server error", "type": "server_error"}})
+            return
+
+        content = config.response
+        if config.roll(config.malformed_rate):
+            config.count("malformed")
+            with config.lock:
+                content = config.rng.choice(MALFORMED_RESPONSES)(content)
+        elif config.roll(config.fenced_rate):
+            config.count("fenced")
+            content = f"```json\n{content}\n```"
+
+        prompt_chars = sum(len(str(message.get("content", ""))) for message in body.get("messages", []))
+        usage = {
+            "prompt_tokens": math.ceil(prompt_chars / 4),
+            "completion_tokens": math.ceil(len(content) / 4),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        model = body.get("model", "grok-2-latest")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+        if body.get("stream"):
+            config.count("streamed")
+            self.stream_completion(completion_id, model, content)
+            return
+
+        self.send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+    def stream_completion(self, completion_id, model, content):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def chunk(delta, finish_reason=None):
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        chunk({"role": "assistant", "content": ""})
+        size = max(1, self.config.stream_chunk_chars)
+        for start in range(0, len(content), size):
+            time.sleep(self.config.stream_chunk_delay)
+            chunk({"content": content[start:start + size]})
+        chunk({}, finish_reason="stop")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def make_server(config, host="127.0.0.1", port=0):
+    """Build a stub server; port 0 picks a free port (see server.server_address)."""
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"config": config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_thread(config, host="127.0.0.1", port=0):
+    """Start a stub server on a background thread and return (server, base_url)."""
+    server = make_server(config, host, port)
+    threading.Thread(target=server.serve_forever, name="stub-xai", daemon=True).start()
+    bound_host, bound_port = server.server_address[:2]
+    return server, f"http://{bound_host}:{bound_port}/v1"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default="fixed:0",
+                        help="fixed:S | uniform:A,B | normal:MEAN,SD | lognormal:MU,SIGMA | exponential:MEAN")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds on 429 responses")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="fraction of replies that are not valid JSON")
+    parser.add_argument("--fenced-rate", type=float, default=0.0, help="fraction of replies wrapped in ```json fences")
+    parser.add_argument("--stream-chunk-chars", type=int, default=40)
+    parser.add_argument("--stream-chunk-delay", type=float, default=0.0, help="seconds between streamed chunks")
+    parser.add_argument("--response-file", help="file with the reply content to serve")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    response = DEFAULT_RESPONSE
+    if args.response_file:
+        with open(args.response_file) as response_file:
+            response = response_file.read()
+    config = StubConfig(
+        latency=args.latency, rate_limit_rate=args.rate_limit_rate, error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate, fenced_rate=args.fenced_rate,
+        stream_chunk_chars=args.stream_chunk_chars, stream_chunk_delay=args.stream_chunk_delay,
+        retry_after=args.retry_after, response=response, seed=args.seed,
+    )
+    logging.basicConfig(level=logging.INFO)
+    server = make_server(config, args.host, args.port)
+    logger.info(f"Stub xAI API listening on http://{args.host}:{server.server_address[1]}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import pytest
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import time
+import httpx
+from openai import BadRequestError, RateLimitError
+from ai_client import AIRunner, CircuitBreaker, CircuitOpenError
+from stub_xai import StubConfig, start_in_thread
+
+class FakeCompletions:
+    """Stands in for client.chat.completions, recording peak concurrency."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+
+    async def create(self, **kwargs):
+        if kwargs.get("stream"):
+            return self._stream(["{\"ats", "_score\"", ": 1}"])
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            return SimpleNamespace(model=kwargs.get("model"))
+        finally:
+            self.active -= 1
+
+    async def _stream(self, deltas):
+        for delta in deltas:
+            await asyncio.sleep(self.delay)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+
+def make_runner(delay, **kwargs):
+    runner = AIRunner(api_key="test", base_url="http://127.0.0.1:9/v1", **kwargs)
+    runner._ensure_started()
+    completions = FakeCompletions(delay)
+    runner._client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return runner, completions
+
+def test_complete_returns_result():
+    """Test that a blocking caller receives the completion."""
+    runner, _ = make_runner(0)
+    assert runner.complete(model="grok-2-latest").model == "grok-2-latest"
+
+def test_concurrency_is_bounded():
+    """Test that no more than max_concurrency calls are in flight."""
+    runner, completions = make_runner(0.05, max_concurrency=3)
+    futures = [runner.submit(runner.create_completion, model="m") for _ in range(12)]
+    for future in futures:
+        future.result()
+    assert completions.peak == 3
+    assert runner.stats()["in_flight"] == 0
+
+def test_many_blocking_callers_share_one_loop():
+    """Test that concurrent threads overlap their calls instead of serializing."""
+    runner, completions = make_runner(0.1, max_concurrency=50)
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        list(pool.map(lambda _: runner.complete(model="m"), range(20)))
+    assert completions.peak > 1
+
+def test_stream_yields_deltas():
+    """Test that streamed deltas reach a synchronous caller in order."""
+    runner, _ = make_runner(0)
+    assert list(runner.stream(model="m")) == ['{"ats', '_score"', ': 1}']
+
+def test_stream_timeout_raises_after_partial_output():
+    """Test that a stream exceeding the timeout raises to the caller."""
+    runner, _ = make_runner(0.2, timeout=0.3)
+    received = []
+    with pytest.raises(asyncio.TimeoutError):
+        for delta in runner.stream(model="m"):
+            received.append(delta)
+    assert received == ['{"ats']
+
+def test_call_timeout():
+    """Test that a call exceeding the timeout raises."""
+    runner, _ = make_runner(1, timeout=0.05)
+    with pytest.raises(asyncio.TimeoutError):
+        runner.complete(model="m")
+    assert runner.stats()["in_flight"] == 0
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_circuit_breaker_states():
+    """Test closed -> open -> half-open -> closed/open transitions."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.stats()["state"] == "open"
+    assert not breaker.allow()
+
+    clock.now = 10
+    assert breaker.allow()  # the half-open probe
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record_failure()
+    assert breaker.stats()["state"] == "open"
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.release()  # probe ended without a verdict
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.stats()["state"] == "closed"
+    assert breaker.stats()["trips"] == 2
+    assert breaker.stats()["rejected"] == 2
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**config):
+        config = StubConfig(**config)
+        server, base_url = start_in_thread(config)
+        servers.append(server)
+        return config, base_url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def test_retries_rate_limits_with_backoff(stub):
+    """Test that 429s are retried and a later success is returned."""
+    config, base_url = stub(rate_limit_rate=1.0, retry_after=0)
+    runner = AIRunner(api_key="test", base_url=base_url, max_retries=3, retry_base_delay=0.01, retry_max_delay=0.02)
+    with pytest.raises(RateLimitError):
+        runner.complete(model="m", messages=[{"role": "user", "content": "hi"}])
+    assert config.stats["rate_limited"] == 4
+    assert runner.stats()["retries"] == 3
+
+    config.rate_limit_rate = 0.0
+    assert runner.complete(model="m", messages=[{"role": "user", "content": "hi"}]).choices
+    assert runner.breaker.stats()["consecutive_failures"] == 0
+
+def test_breaker_fails_fast_and_recovers(stub):
+    """Test that an open breaker skips xAI and a half-open probe closes it."""
+    config, base_url = stub(error_rate=1.0)
+    runner = AIRunner(
+        api_key="test", base_url=base_url, max_retries=0,
+        breaker=CircuitBreaker(failure_threshold=2, recovery_timeout=0.3),
+    )
+    messages = [{"role": "user", "content": "hi"}]
+    for _ in range(2):
+        with pytest.raises(Exception):
+            runner.complete(model="m", messages=messages)
+    assert runner.breaker.stats()["state"] == "open"
+
+    start = time.perf_counter()
+    with pytest.raises(CircuitOpenError):
+        runner.complete(model="m", messages=messages)
+    assert time.perf_counter() - start < 0.1
+    assert config.stats["requests"] == 2
+
+    config.error_rate = 0.0
+    time.sleep(0.3)
+    assert runner.complete(model="m", messages=messages).choices
+    assert runner.breaker.stats()["state"] == "closed"
+
+def test_client_errors_are_not_retried():
+    """Test that a 400 is raised at once and does not count against the breaker."""
+    runner, completions = make_runner(0, max_retries=3)
+    calls = []
+
+    async def bad_request(**kwargs):
+        calls.append(kwargs)
+        response = httpx.Response(400, request=httpx.Request("POST", "http://x"))
+        raise BadRequestError("bad", response=response, body=None)
+
+    completions.create = bad_request
+    with pytest.raises(BadRequestError):
+        runner.complete(model="m")
+    assert len(calls) == 1
+    assert runner.breaker.stats()["consecutive_failures"] == 0
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
@@ -1,7 +1,10 @@
 import pytest
 import os
 import io
-from app import app
+import json
+import time
+from unittest import mock
+from app import app, extract_skills_and_experience, get_job_profile
 import PyPDF2
 from reportlab.pdfgen import canvas
 
@@ -106,6 +109,710 @@ def test_parse_resume_success(client):
     # Check certifications
     assert any('AWS' in cert for cert in data['data']['certifications'])
 
+def test_parse_resume_served_from_cache(client):
+    """Test that repeating an identical request is served from the result cache."""
+    job_description = "Software Engineer Position. Required Skills: Python, React"
+    # reportlab stamps each PDF with a creation date, so reuse the exact bytes
+    pdf_bytes = create_sample_pdf().getvalue()
+    with mock.patch('app.USE_AI', 0):
+        first = client.post('/resume/parse', data={
+            'resume': (io.BytesIO(pdf_bytes), 'test.pdf'),
+            'job_description': job_description
+        })
+        assert first.status_code == 200
+        hits_before = client.get('/health').get_json()['result_cache']['hits']
+
+        with mock.patch('app.extract_text_from_pdf') as extract:
+            second = client.post('/resume/parse', data={
+                'resume': (io.BytesIO(pdf_bytes), 'test.pdf'),
+                'job_description': job_description
+            })
+    assert second.status_code == 200
+    assert second.get_json() == first.get_json()
+    extract.assert_not_called()
+    assert client.get('/health').get_json()['result_cache']['hits'] == hits_before + 1
+
+def test_register_resume_and_parse_by_digest(client):
+    """Test that a registered resume is analyzed by digest without re-parsing the PDF."""
+    pdf_bytes = create_sample_pdf().getvalue() + b"\n% registered"
+    registered = client.post('/resumes', data={'resume': (io.BytesIO(pdf_bytes), 'test.pdf')})
+    assert registered.status_code == 201
+    info = registered.get_json()
+    assert info['page_count'] == 1
+    assert info['truncated'] is False
+    digest = info['resume_digest']
+    assert client.get(f'/resumes/{digest}').get_json() == info
+    again = client.post('/resumes', data={'resume': (io.BytesIO(pdf_bytes), 'test.pdf')})
+    assert again.status_code == 200
+
+    with mock.patch('app.USE_AI', 0), mock.patch('app.parse_pdf') as parse:
+        response = client.post('/resume/parse', data={
+            'resume_digest': digest,
+            'job_description': 'Registered resume test. Required Skills: Python, React'
+        })
+    assert response.status_code == 200
+    parse.assert_not_called()
+    assert 'Python' in response.get_json()['data']['skills']
+    assert client.get('/health').get_json()['document_store']['entries'] >= 1
+
+    missing = client.post('/resume/parse', data={'resume_digest': 'f' * 64, 'job_description': 'Python'})
+    assert missing.status_code == 404
+    assert client.get(f'/resumes/{"f" * 64}').status_code == 404
+
+def test_local_extraction_skips_spacy():
+    """Test that the spaCy pipeline is not loaded unless entities are requested."""
+    with mock.patch('app.get_nlp') as get_nlp:
+        data = extract_skills_and_experience("Skills: Python, React. 5 years experience")
+    get_nlp.assert_not_called()
+    assert 'organizations' not in data
+
+def create_pdf(lines):
+    """Create a single-page PDF with one drawString line per entry."""
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer)
+    for offset, line in enumerate(lines):
+        p.drawString(100, 750 - 20 * offset, line)
+    p.save()
+    buffer.seek(0)
+    return buffer
+
+def test_parse_resume_batch(client):
+    """Test ranking several resumes against several job descriptions."""
+    backend_resume = create_sample_pdf().getvalue()
+    devops_resume = create_pdf(["Jane Roe", "Skills: Docker, Kubernetes, Terraform", "3 years experience"]).getvalue()
+    job_descriptions = [
+        "Backend engineer. Required Skills: Python, Node.js, React",
+        "DevOps engineer. Required Skills: Docker, Kubernetes, Terraform, AWS",
+    ]
+
+    response = client.post('/resume/parse/batch', data={
+        'resume': [(io.BytesIO(backend_resume), 'backend.pdf'), (io.BytesIO(devops_resume), 'devops.pdf')],
+        'job_description': job_descriptions,
+        'top_k': '1'
+    })
+    assert response.status_code == 200
+    data = response.get_json()
+
+    assert len(data['scores']) == 2
+    assert all(len(row) == 2 for row in data['scores'])
+    assert data['by_resume'][0]['matches'][0]['job_description'] == 0
+    assert data['by_resume'][1]['matches'][0]['job_description'] == 1
+    assert data['by_job_description'][1]['matches'][0]['filename'] == 'devops.pdf'
+    assert all(len(entry['matches']) == 1 for entry in data['by_resume'])
+
+    # Each cell agrees with the single-pair no-AI scorer
+    with mock.patch('app.USE_AI', 0):
+        single = client.post('/resume/parse', data={
+            'resume': (io.BytesIO(devops_resume), 'devops.pdf'),
+            'job_description': job_descriptions[1]
+        }).get_json()
+    assert f"{data['scores'][1][1]:.2f}%" == single['ats_score']
+    devops_match = data['by_job_description'][1]['matches'][0]
+    assert devops_match['ats_score'] == single['ats_score']
+    assert devops_match['ats_score_value'] == data['scores'][1][1]
+
+def test_parse_resume_batch_invalid_top_k(client):
+    """Test that a non-numeric top_k is rejected."""
+    response = client.post('/resume/parse/batch', data={
+        'resume': (create_sample_pdf(), 'test.pdf'),
+        'job_description': 'Software Engineer position',
+        'top_k': 'all'
+    })
+    assert response.status_code == 400
+
+def test_parse_job_submit_and_poll(client):
+    """Test submitting an analysis job and polling it to completion."""
+    with mock.patch('app.USE_AI', 0):
+        response = client.post('/resume/jobs', data={
+            'resume': (create_sample_pdf(), 'test.pdf'),
+            'job_description': 'Software Engineer. Required Skills: Python, React'
+        })
+        assert response.status_code == 202
+        job_id = response.get_json()['job_id']
+
+        deadline = time.time() + 10
+        job = client.get(f'/resume/jobs/{job_id}').get_json()
+        while job['status'] not in ('completed', 'failed') and time.time() < deadline:
+            time.sleep(0.05)
+            job = client.get(f'/resume/jobs/{job_id}').get_json()
+
+    assert job['status'] == 'completed'
+    assert 'ats_score' in job['result']
+    assert 'Python' in job['result']['data']['skills']
+
+def test_parse_job_rejects_unsafe_callback_and_full_queue(client):
+    """Test that metadata-service callbacks get 400 and a full job queue gets 503."""
+    import app as app_module
+    data = lambda **extra: {'resume': (create_sample_pdf(), 'test.pdf'), 'job_description': 'Python', **extra}
+    response = client.post('/resume/jobs', data=data(callback_url='http://169.254.169.254/latest/meta-data'))
+    assert response.status_code == 400
+    assert 'non-public' in response.get_json()['error']
+    assert client.post('/resume/jobs', data=data(callback_url='file:///etc/passwd')).status_code == 400
+
+    with mock.patch.object(app_module.job_manager, 'max_pending', 0):
+        response = client.post('/resume/jobs', data=data())
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+
+def test_parse_job_not_found(client):
+    """Test polling an unknown job id."""
+    response = client.get('/resume/jobs/does-not-exist')
+    assert response.status_code == 404
+
+def read_ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+
+def test_parse_resume_stream_local_first(client):
+    """Test that the stream emits the local result before the final result."""
+    with mock.patch('app.USE_AI', 0):
+        response = client.post('/resume/parse/stream', data={
+            'resume': (create_sample_pdf(), 'test.pdf'),
+            'job_description': 'Software Engineer. Required Skills: Python, React'
+        })
+        # The body is generated lazily, so consume it while the patch is active
+        events = read_ndjson(response)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert [event['event'] for event in events] == ['local', 'final']
+    assert events[1]['source'] == 'local'
+    assert 'ats_score' in events[0]['result']
+
+def test_parse_resume_stream_relays_ai_output(client):
+    """Test that AI deltas are relayed and assembled into the final result."""
+    ai_json = json.dumps({
+        "data": {"skills": ["Python"], "total_experience_years": 5, "relevant_experience": {},
+                 "education": [], "certifications": []},
+        "ats_score": "80.00%",
+        "breakdown": {"skills": 40, "experience": 20, "education_certifications": 5, "formatting": 10,
+                      "keyword_optimization": 5},
+        "improvement_suggestions": {"critical": [], "recommended": [], "advanced": []}
+    })
+    chunks = [ai_json[i:i + 25] for i in range(0, len(ai_json), 25)]
+    with mock.patch('app.USE_AI', 1), mock.patch('app.ai_runner.stream', return_value=iter(chunks)):
+        response = client.post('/resume/parse/stream', data={
+            'resume': (create_sample_pdf(), 'test.pdf'),
+            'job_description': 'Streaming role. Required Skills: Python'
+        })
+        events = read_ndjson(response)
+    assert events[0]['event'] == 'local'
+    assert "".join(event['text'] for event in events if event['event'] == 'ai_delta') == ai_json
+    assert events[-1]['event'] == 'final'
+    assert events[-1]['source'] == 'ai'
+    assert events[-1]['result']['ats_score'] == '80.00%'
+    assert 'breakdown' in events[-1]['result']
+
+def test_parse_resume_stream_sse(client):
+    """Test that Server-Sent Events are used when requested."""
+    with mock.patch('app.USE_AI', 0):
+        response = client.post('/resume/parse/stream', headers={'Accept': 'text/event-stream'}, data={
+            'resume': (create_sample_pdf(), 'test.pdf'),
+            'job_description': 'SSE role. Required Skills: React'
+        })
+        body = response.get_data(as_text=True)
+    assert response.mimetype == 'text/event-stream'
+    assert body.startswith('event: local\ndata: ')
+    assert 'event: final' in body
+
+def test_register_posting_and_parse_by_id(client):
+    """Test registering a posting and referencing it by posting_id."""
+    job_description = "Senior Backend Engineer. Required Skills: Python, Django, AWS. 5 years of experience."
+    response = client.post('/postings', json={'job_description': job_description})
+    assert response.status_code == 201
+    profile = response.get_json()
+    assert profile['level'] == 'senior'
+    assert profile['required_years'] == 5
+    assert 'Python' in profile['skills']
+
+    assert client.get(f"/postings/{profile['posting_id']}").get_json() == profile
+
+    with mock.patch('app.USE_AI', 0):
+        by_id = client.post('/resume/parse', data={
+            'resume': (create_sample_pdf(), 'test.pdf'),
+            'posting_id': profile['posting_id']
+        })
+    assert by_id.status_code == 200
+    assert 'Python' in by_id.get_json()['data']['skills']
+
+def test_registered_postings_are_shared_through_postings_db(client, tmp_path):
+    """Test that a posting registered by one worker resolves on another sharing POSTINGS_DB."""
+    import app as app_module
+    from result_cache import ResultCache
+    db_path = str(tmp_path / 'postings.db')
+    job_description = "Shared posting. Required Skills: Python, Go"
+    with mock.patch.object(app_module, 'posting_store', ResultCache(db_path=db_path)):
+        posting_id = client.post('/postings', json={'job_description': job_description}).get_json()['posting_id']
+    # A fresh store on the same file stands in for another worker process
+    with mock.patch.object(app_module, 'posting_store', ResultCache(db_path=db_path)):
+        response = client.get(f'/postings/{posting_id}')
+        assert app_module.get_registered_posting(posting_id)[0] == job_description
+    assert response.status_code == 200
+    assert response.get_json()['posting_id'] == posting_id
+
+def test_parse_resume_unknown_posting(client):
+    """Test that an unknown posting_id is rejected."""
+    response = client.post('/resume/parse', data={
+        'resume': (create_sample_pdf(), 'test.pdf'),
+        'posting_id': 'missing'
+    })
+    assert response.status_code == 404
+
+def test_job_profile_is_memoized():
+    """Test that a posting is analyzed once, including cosmetic variants."""
+    job_description = "Data Engineer. Required Skills: Spark, SQL, Hadoop. Memoization test."
+    with mock.patch('app.extract_skills_and_experience', wraps=extract_skills_and_experience) as extract:
+        first = get_job_profile(job_description)
+        second = get_job_profile("  data engineer.  required skills: spark, sql, hadoop. memoization test.")
+    assert first is second
+    assert extract.call_count == 1
+
+def test_posting_case_does_not_change_scores():
+    """Test that postings differing only in case score a resume the same, whichever was seen first."""
+    import app as app_module
+    resume_text = "Experienced python developer with 5 years of experience"
+    postings = ["Case test. Required: python", "Case test. Required: PYTHON"]
+    for order in (postings, postings[::-1]):
+        with mock.patch.object(app_module, 'job_profile_cache', app_module.OrderedDict()), \
+                mock.patch.object(app_module, 'check_formatting', return_value=0):
+            scores = [app_module.weighted_score_no_ai(resume_text, posting, None) for posting in order]
+            matrix = app_module.batch_score_no_ai([(resume_text, None)], order)
+        assert [score['breakdown']['skills'] for score in scores] == [50.0, 50.0]
+        assert [cell['breakdown']['skills'] for cell in matrix[0]] == [50.0, 50.0]
+        assert all('Add the following skills' not in ' '.join(score['improvement_suggestions']) for score in scores)
+
+def test_metrics_endpoint_reports_stages(client):
+    """Test that /metrics exposes stage histograms after a parse."""
+    with mock.patch('app.USE_AI', 0), mock.patch('app.SEMANTIC_POINTS', 10):
+        response = client.post('/resume/parse', data={
+            'resume': (create_sample_pdf(), 'test.pdf'),
+            'job_description': 'Metrics test. Required Skills: Python'
+        })
+    assert response.status_code == 200
+    metrics = client.get('/metrics')
+    assert metrics.status_code == 200
+    assert metrics.content_type.startswith('text/plain')
+    body = metrics.get_data(as_text=True)
+    for stage in ('pdf_parse', 'formatting_check', 'regex_extraction', 'semantic_similarity'):
+        assert f'resume_stage_duration_seconds_count{{stage="{stage}"}}' in body
+    assert 'resume_request_duration_seconds_count{endpoint="/resume/parse",status="200"}' in body
+
+def test_stage_timing_header(client):
+    """Test that stage timings are echoed in Server-Timing when enabled."""
+    with mock.patch('app.USE_AI', 0), mock.patch('app.STAGE_TIMING_HEADER', True):
+        response = client.post('/resume/parse', data={
+            'resume': (create_sample_pdf(), 'test.pdf'),
+            'job_description': 'Timing header test. Required Skills: Python'
+        })
+    assert response.status_code == 200
+    assert 'pdf_parse;dur=' in response.headers['Server-Timing']
+
+def test_ai_fallback_and_token_metrics(client):
+    """Test the fallback, JSON decode failure and token usage counters."""
+    import app as app_module
+    from types import SimpleNamespace
+
+    async def unparseable_completion(**kwargs):
+        message = SimpleNamespace(content="not json")
+        usage = SimpleNamespace(prompt_tokens=120, completion_tokens=3)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+    fallbacks = app_module.AI_FALLBACKS.value(mode="sync")
+    decode_failures = app_module.AI_JSON_DECODE_FAILURES.value()
+    prompt_tokens = app_module.AI_TOKENS.value(type="prompt")
+    with mock.patch('app.USE_AI', 1), \
+            mock.patch.object(app_module.ai_runner, 'create_completion', unparseable_completion):
+        response = client.post('/resume/parse', data={
+            'resume': (create_sample_pdf(), 'test.pdf'),
+            'job_description': 'Fallback metrics test. Required Skills: Python'
+        })
+    assert response.status_code == 200
+    assert app_module.AI_FALLBACKS.value(mode="sync") == fallbacks + 1
+    assert app_module.AI_JSON_DECODE_FAILURES.value() == decode_failures + 1
+    assert app_module.AI_TOKENS.value(type="prompt") == prompt_tokens + 120
+
+def test_ready_after_warm_up(client):
+    """Test that /ready is separate from /health and turns green after warm-up."""
+    import app as app_module
+    with mock.patch.object(app_module, 'models_ready', app_module.threading.Event()):
+        assert client.get('/ready').status_code == 503
+        assert client.get('/health').status_code == 200
+        app_module.warm_up()
+        response = client.get('/ready')
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'ready'
+
+def test_warm_up_skips_the_vectorizer_when_semantic_scoring_is_off():
+    """Test that warm-up only fits the TF-IDF vectorizer when SEMANTIC_POINTS is non-zero."""
+    import app as app_module
+    scorer = app_module.SemanticScorer(app_module.semantic_scorer.bootstrap_corpus)
+    with mock.patch.object(app_module, 'models_ready', app_module.threading.Event()), \
+            mock.patch.object(app_module, 'semantic_scorer', scorer), \
+            mock.patch.object(app_module, 'SEMANTIC_POINTS', 0):
+        app_module.warm_up()
+        assert scorer._vectorizer is None
+        app_module.models_ready.clear()
+        with mock.patch.object(app_module, 'SEMANTIC_POINTS', 10):
+            app_module.warm_up()
+        assert scorer._vectorizer is not None
+
+def test_gunicorn_config_from_environment():
+    """Test that worker and thread counts come from the environment."""
+    import runpy
+    config_path = os.path.join(os.path.dirname(__file__), 'gunicorn.conf.py')
+    with mock.patch.dict(os.environ, {'GUNICORN_THREADS': '1'}):
+        assert runpy.run_path(config_path)['workers'] == 1
+    shared_stores = {'JOB_STORE_DB': 'jobs.db', 'DOCUMENT_STORE_DB': 'documents.db', 'POSTINGS_DB': 'postings.db'}
+    with mock.patch.dict(os.environ, {'GUNICORN_WORKERS': '3', 'GUNICORN_THREADS': '1', **shared_stores}):
+        config = runpy.run_path(config_path)
+    assert config['workers'] == 3
+    assert config['worker_class'] == 'sync'
+    assert config['preload_app'] is True
+
+def test_gunicorn_refuses_workers_without_shared_stores():
+    """Test that several workers need every shared SQLite store."""
+    import runpy
+    config_path = os.path.join(os.path.dirname(__file__), 'gunicorn.conf.py')
+    shared_stores = {'JOB_STORE_DB': 'jobs.db', 'DOCUMENT_STORE_DB': 'documents.db', 'POSTINGS_DB': 'postings.db'}
+    for missing in shared_stores:
+        stores = {name: path for name, path in shared_stores.items() if name != missing}
+        with mock.patch.dict(os.environ, {'GUNICORN_WORKERS': '3', **stores}), pytest.raises(RuntimeError):
+            os.environ.pop(missing, None)
+            runpy.run_path(config_path)
+
+def test_extraction_pool_matches_inline(client):
+    """Test that analyses run in the extraction process pool match inline ones."""
+    import app as app_module
+    from process_pool import ExtractionPool
+    pdf_bytes = create_sample_pdf().getvalue()
+    job_description = "Process pool test. Required Skills: Python, React"
+    from uploads import SpooledUpload
+    upload = SpooledUpload.from_bytes(pdf_bytes)
+    inline = app_module.run_local_stage(upload, job_description, True, True)
+    pool = ExtractionPool(max_workers=1, initializer=app_module.warm_up)
+    try:
+        with mock.patch.object(app_module, 'extraction_pool', pool):
+            pooled = pool.run(app_module.run_local_stage, upload, job_description, True, True)
+            with mock.patch('app.USE_AI', 0), mock.patch.object(app_module.result_cache, 'get', return_value=None):
+                response = client.post('/resume/parse', data={
+                    'resume': (io.BytesIO(pdf_bytes), 'test.pdf'),
+                    'job_description': job_description
+                })
+                batch = client.post('/resume/parse/batch', data={
+                    'resume': [(io.BytesIO(pdf_bytes), 'a.pdf'), (io.BytesIO(b"not a pdf"), 'b.pdf')],
+                    'job_description': job_description
+                })
+    finally:
+        pool.shutdown()
+    assert pooled == inline
+    assert response.status_code == 200
+    assert response.get_json() == json.loads(json.dumps(inline.local_result))
+    assert batch.status_code == 200
+    assert len(batch.get_json()['errors']) == 1
+    assert pool.stats()['submitted'] >= 4
+
+def test_upload_limits(client):
+    """Test the request body limit, the per-resume limit and spooled uploads."""
+    pdf_bytes = create_sample_pdf().getvalue()
+    data = lambda: {'resume': (io.BytesIO(pdf_bytes), 'test.pdf'), 'job_description': 'Python developer'}
+    with mock.patch.dict(app.config, {'MAX_CONTENT_LENGTH': 100}):
+        response = client.post('/resume/parse', data=data())
+    assert response.status_code == 413
+    assert 'error' in response.get_json()
+
+    with mock.patch('app.RESUME_MAX_BYTES', 100):
+        assert client.post('/resume/parse', data=data()).status_code == 413
+        batch = client.post('/resume/parse/batch', data=data())
+    assert batch.status_code == 400
+    assert 'limit' in batch.get_json()['errors'][0]['error']
+
+    with mock.patch('app.USE_AI', 0), mock.patch('app.UPLOAD_MEMORY_THRESHOLD', 0):
+        response = client.post('/resume/parse', data=data())
+    assert response.status_code == 200
+    assert 'Python' in response.get_json()['data']['skills']
+
+def test_long_resume_parsed_in_parallel():
+    """Test that long resumes are split across the pool and match a single parse."""
+    import app as app_module
+    from process_pool import ExtractionPool
+    from uploads import SpooledUpload
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer)
+    for page in range(6):
+        p.drawString(100, 750, f"Page {page}: 3 years of experience in Python and React")
+        p.showPage()
+    p.save()
+    upload = SpooledUpload.from_bytes(buffer.getvalue())
+
+    assert app_module.parse_resume_parallel(upload) is None  # pool disabled
+    pool = ExtractionPool(max_workers=2, initializer=app_module.warm_up)
+    try:
+        with mock.patch.object(app_module, 'extraction_pool', pool), mock.patch('app.PDF_PARALLEL_MIN_PAGES', 4):
+            document = app_module.parse_resume_parallel(upload)
+            local = pool.run(app_module.run_local_stage, upload, "Python developer", True, False, document)
+    finally:
+        pool.shutdown()
+    assert document == app_module.parse_resume_upload(upload)[1]
+    assert pool.stats()['submitted'] == 8  # page count, six one-page ranges, then run_local_stage
+    assert local.local_data['total_experience_years'] == 18
+
+def test_parallel_parse_stops_submitting_at_char_budget():
+    """Test that page ranges past PDF_MAX_CHARS are never parsed."""
+    import app as app_module
+    from process_pool import ExtractionPool
+    from uploads import SpooledUpload
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer)
+    for page in range(16):
+        p.drawString(100, 750, f"Page {page}: 3 years of experience in Python and React")
+        p.showPage()
+    p.save()
+    upload = SpooledUpload.from_bytes(buffer.getvalue())
+
+    pool = ExtractionPool(max_workers=2, initializer=app_module.warm_up)
+    try:
+        with mock.patch.object(app_module, 'extraction_pool', pool), mock.patch('app.PDF_PARALLEL_MIN_PAGES', 4), \
+                mock.patch('app.PDF_PARALLEL_RANGES_PER_PROCESS', 8), mock.patch('app.PDF_MAX_CHARS', 100):
+            document = app_module.parse_resume_parallel(upload)
+            serial = app_module.parse_resume_upload(upload)[1]
+    finally:
+        pool.shutdown()
+    assert document.truncated
+    assert document == serial
+    assert pool.stats()['submitted'] < 16
+
+def test_parallel_parse_reads_no_pdf_on_the_request_thread():
+    """Test that the page count of a pooled parse comes from the extraction pool."""
+    import app as app_module
+    from process_pool import ExtractionPool
+    from uploads import SpooledUpload
+    upload = SpooledUpload.from_bytes(create_pdf(["Python developer"]).getvalue())
+    pool = ExtractionPool(max_workers=1, initializer=app_module.warm_up)
+    try:
+        with mock.patch.object(app_module, 'extraction_pool', pool), \
+                mock.patch('app.count_pages', side_effect=AssertionError("PDF opened on the request thread")):
+            assert app_module.parse_resume_parallel(upload) is None  # one page: parsed whole by run_local_stage
+    finally:
+        pool.shutdown()
+    assert pool.stats()['submitted'] == 1
+
+def test_identical_concurrent_requests_are_coalesced(client):
+    """Test that duplicate in-flight analyses share one xAI call."""
+    import app as app_module
+    from concurrent.futures import ThreadPoolExecutor
+    from benchmark import stub_completion
+    pdf_bytes = create_sample_pdf().getvalue()
+    calls = []
+    slow_completion = stub_completion(0.3)
+
+    async def counting_completion(**kwargs):
+        calls.append(kwargs)
+        return await slow_completion(**kwargs)
+
+    def post(_):
+        with app.test_client() as thread_client:
+            return thread_client.post('/resume/parse', data={
+                'resume': (io.BytesIO(pdf_bytes), 'test.pdf'),
+                'job_description': 'Coalescing test. Required Skills: Python'
+            })
+
+    with mock.patch('app.USE_AI', 1), \
+            mock.patch.object(app_module.ai_runner, 'create_completion', counting_completion), \
+            mock.patch.object(app_module.result_cache, 'get', return_value=None):
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            responses = list(pool.map(post, range(4)))
+    assert [response.status_code for response in responses] == [200] * 4
+    assert len(calls) == 1
+    assert all(response.get_json() == responses[0].get_json() for response in responses)
+
+def test_open_breaker_falls_back_immediately(client):
+    """Test that an open circuit breaker skips xAI and is reported in /health."""
+    import app as app_module
+    from ai_client import CircuitBreaker
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+    breaker.record_failure()
+    app_module.ai_runner.start()
+    with mock.patch('app.USE_AI', 1), mock.patch.object(app_module.ai_runner, 'breaker', breaker), \
+            mock.patch.object(app_module.ai_runner._client.chat.completions, 'create') as create:
+        response = client.post('/resume/parse', data={
+            'resume': (create_sample_pdf(), 'test.pdf'),
+            'job_description': 'Breaker test. Required Skills: Python'
+        })
+        health = client.get('/health').get_json()
+    assert response.status_code == 200
+    create.assert_not_called()
+    assert health['ai_circuit_breaker']['state'] == 'open'
+    assert health['ai_circuit_breaker']['rejected'] == 1
+
+def test_truncated_ai_response_is_salvaged(client):
+    """Test that a reply cut off at max_tokens is repaired instead of discarded."""
+    import app as app_module
+    from types import SimpleNamespace
+    from stub_xai import DEFAULT_RESPONSE
+    requests_seen = []
+
+    async def truncated_completion(**kwargs):
+        requests_seen.append(kwargs)
+        message = SimpleNamespace(content="```json\n" + DEFAULT_RESPONSE[:DEFAULT_RESPONSE.index('"improvement_suggestions"') + 40])
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    fallbacks = app_module.AI_FALLBACKS.value(mode="sync")
+    repairs = app_module.AI_JSON_REPAIRS.value()
+    with mock.patch('app.USE_AI', 1), \
+            mock.patch.object(app_module.ai_runner, 'create_completion', truncated_completion):
+        response = client.post('/resume/parse', data={
+            'resume': (create_sample_pdf(), 'test.pdf'),
+            'job_description': 'Salvage test. Required Skills: Python'
+        })
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['ats_score'] == '85.00%'
+    assert data['data']['skills'] == [{'name': 'Python', 'confidence': 0.9, 'relevance': 0.9}]
+    assert set(data['improvement_suggestions']) == {'critical', 'recommended', 'advanced'}
+    assert app_module.AI_FALLBACKS.value(mode="sync") == fallbacks
+    assert app_module.AI_JSON_REPAIRS.value() == repairs + 1
+    assert data['repaired'] is True
+    with mock.patch('app.USE_AI', 1), \
+            mock.patch.object(app_module.ai_runner, 'create_completion', truncated_completion):
+        client.post('/resume/parse', data={
+            'resume': (create_sample_pdf(), 'test.pdf'),
+            'job_description': 'Salvage test. Required Skills: Python'
+        })
+    assert len(requests_seen) == 2  # the salvaged result was not cached
+    assert requests_seen[0]['response_format']['json_schema']['schema'] is app_module.AI_RESPONSE_SCHEMA
+
+def test_parse_ai_response_conforms_to_schema():
+    """Test that replies are coerced to the schema and unusable ones rejected."""
+    import app as app_module
+    result = app_module.parse_ai_response(
+        'Sure! {"data": {"skills": [{"name": "Go"}], "total_experience_years": "6"}, '
+        '"breakdown": {"skills": 30, "experience": 20, "education_certifications": "0", "formatting": null, '
+        '"keyword_optimization": 0}} Hope this helps.'
+    )
+    assert result['data']['total_experience_years'] == 6.0
+    assert result['data']['education'] == []
+    assert result['breakdown']['education_certifications'] == 0
+    assert result['breakdown']['formatting'] == 0
+    assert result['ats_score'] == '50.00%'
+    assert 'repaired' not in result
+    assert app_module.parse_ai_response('{"ats_score": "90%"}') is None
+    # Cut off inside "data": zero-filling the breakdown would report a 0% score
+    from stub_xai import DEFAULT_RESPONSE
+    assert app_module.parse_ai_response(DEFAULT_RESPONSE[:60]) is None
+    assert app_module.parse_ai_response(
+        '{"data": {"skills": []}, "breakdown": {"skills": 30, "experience": 20}}'
+    ) is None
+    assert app_module.parse_ai_response("I can't help with that.") is None
+
+def test_near_duplicate_resume_reuses_ai_result(client):
+    """Test that a lightly edited resume of the same owner reuses the earlier AI analysis, rescored locally."""
+    import app as app_module
+    from benchmark import stub_completion
+    from near_duplicates import NearDuplicateIndex
+    calls = []
+    completion = stub_completion(0)
+
+    async def counting_completion(**kwargs):
+        calls.append(kwargs)
+        return await completion(**kwargs)
+
+    lines = [f"Role {n}: built Python and React services for team {n} with measurable impact" for n in range(30)]
+    edit = lambda n: lines[:n] + [f"Role {n}: built Docker and Kubernetes services for team {n} with measurable impact"] \
+        + lines[n + 1:]
+    job_description = "Near duplicate test. Required Skills: Python, React, Docker"
+    post = lambda pdf_lines, owner: client.post('/resume/parse', data={
+        'resume': (create_pdf(pdf_lines), 'test.pdf'), 'job_description': job_description, 'resume_owner': owner
+    })
+    with mock.patch('app.USE_AI', 1), mock.patch('app.NEAR_DUPLICATE_MODE', 'rescore'), \
+            mock.patch.object(app_module, 'near_duplicates', NearDuplicateIndex(threshold=0.8)), \
+            mock.patch.object(app_module.ai_runner, 'create_completion', counting_completion):
+        first = post(lines, 'alice')
+        second = post(edit(10), 'alice')
+        # Same bytes as alice's reused resume: served neither from the cache nor by reuse
+        same_bytes_other_owner = post(edit(10), 'bob')
+        other_owner = post(edit(12), 'carol')
+        unrelated = post([f"Chef {n}: cooked pasta for guests" for n in range(30)], 'alice')
+        health = client.get('/health').get_json()
+    assert [first.status_code, second.status_code, same_bytes_other_owner.status_code, other_owner.status_code,
+            unrelated.status_code] == [200] * 5
+    assert len(calls) == 4
+    assert 'near_duplicate' not in same_bytes_other_owner.get_json()
+    reused = second.get_json()
+    assert reused['near_duplicate']['mode'] == 'rescore'
+    assert reused['near_duplicate']['similarity'] >= 0.8
+    assert reused['improvement_suggestions'] == first.get_json()['improvement_suggestions']
+    # The edit adds a required skill, so the local scorer moves the reused score up
+    assert float(reused['ats_score'].rstrip('%')) > float(first.get_json()['ats_score'].rstrip('%'))
+    assert 'near_duplicate' not in other_owner.get_json()
+    assert 'near_duplicate' not in unrelated.get_json()
+    assert health['near_duplicates']['hits'] == 1
+
+def test_ownerless_near_duplicate_keeps_only_the_score(client):
+    """Test that a match across users is rescored and carries the current resume's data, not the earlier one's."""
+    import app as app_module
+    from benchmark import stub_completion
+    from near_duplicates import NearDuplicateIndex
+    lines = [f"Project {n}: shipped Python and React tools for group {n} with clear results" for n in range(30)]
+    edited = lines[:5] + ["Project 5: shipped Docker and Kubernetes tools for group 5 with clear results"] + lines[6:]
+    job_description = "Shared index test. Required Skills: Python, React, Docker"
+    post = lambda pdf_lines: client.post('/resume/parse', data={
+        'resume': (create_pdf(pdf_lines), 'test.pdf'), 'job_description': job_description
+    })
+    with mock.patch('app.USE_AI', 1), mock.patch('app.NEAR_DUPLICATE_MODE', 'reuse'), \
+            mock.patch.object(app_module, 'near_duplicates', NearDuplicateIndex(threshold=0.8)), \
+            mock.patch.object(app_module.ai_runner, 'create_completion', stub_completion(0)):
+        first = post(lines).get_json()
+        reused = post(edited).get_json()
+    with mock.patch('app.USE_AI', 0):
+        local = post(edited).get_json()
+    assert reused['near_duplicate']['mode'] == 'rescore'
+    assert reused['data'] == local['data'] != first['data']
+    assert reused['improvement_suggestions'] == local['improvement_suggestions']
+
+def test_new_resume_version_reanalyzes_changed_sections(client):
+    """Test that a revised resume sends xAI only its changed sections and reuses section extraction."""
+    import app as app_module
+    import hashlib
+    from benchmark import stub_completion
+    prompts = []
+    completion = stub_completion(0)
+
+    async def recording_completion(**kwargs):
+        prompts.append(kwargs['messages'][-1]['content'])
+        return await completion(**kwargs)
+
+    first_version = create_pdf([
+        "Jane Roe jane@example.com", "SUMMARY Backend engineer focused on reliable services",
+        "Experience: 5 years of experience in backend development at Acme",
+        "Skills: Python, Docker, Kubernetes", "Education: BS Computer Science",
+    ]).getvalue()
+    second_version = create_pdf([
+        "Jane Roe jane@example.com", "SUMMARY Backend engineer focused on reliable services",
+        "Experience: 6 years of experience in platform engineering at Acme",
+        "Skills: Python, Docker, Kubernetes", "Education: BS Computer Science",
+    ]).getvalue()
+    job_description = 'Revision test. Required Skills: Python, Docker'
+    revisions = app_module.AI_INCREMENTAL_ANALYSES.value()
+    with mock.patch('app.USE_AI', 1), mock.patch('app.SECTION_EXTRACTION', True), \
+            mock.patch.object(app_module.ai_runner, 'create_completion', recording_completion):
+        first = client.post('/resume/parse', data={
+            'resume': (io.BytesIO(first_version), 'v1.pdf'), 'job_description': job_description
+        })
+        section_hits = client.get('/health').get_json()['section_cache']['hits']
+        second = client.post('/resume/parse', data={
+            'resume': (io.BytesIO(second_version), 'v2.pdf'), 'job_description': job_description,
+            'previous_resume_digest': hashlib.sha256(first_version).hexdigest(),
+        })
+        health = client.get('/health').get_json()
+    assert first.status_code == 200 and second.status_code == 200
+    assert len(prompts) == 2
+    assert 'Skills: Python, Docker, Kubernetes' in prompts[0]
+    assert '**Changed Sections:**\n[experience]\nExperience: 6 years' in prompts[1]
+    assert 'Skills: Python, Docker, Kubernetes' not in prompts[1]
+    assert '"skills":{"skills":["Python","Docker","Kubernetes"]' in prompts[1]
+    assert first.get_json()['ats_score'] in prompts[1]
+    assert app_module.AI_INCREMENTAL_ANALYSES.value() == revisions + 1
+    # Only the experience section was extracted again
+    assert health['section_cache']['hits'] >= section_hits + 4
+
 def test_parse_resume_invalid_pdf(client):
     """Test parsing resume with an invalid PDF file."""
     # Create an invalid PDF file (just text)
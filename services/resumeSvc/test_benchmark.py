@@ -0,0 +1,38 @@
+import pytest
+import json
+import benchmark
+
+def test_benchmark_smoke(tmp_path):
+    """Test that a tiny benchmark run writes every stage and the load test to JSON."""
+    output = tmp_path / "bench.json"
+    exit_code = benchmark.main([
+        "--pages", "1", "--repeat", "1", "--requests", "2", "--concurrency", "2",
+        "--ai-latency", "0", "--output", str(output)
+    ])
+    assert exit_code == 0
+
+    results = json.loads(output.read_text())
+    stages = results["micro"]["1_pages"]
+    for stage in ("extract_text_from_pdf", "check_formatting", "extract_skills_and_experience", "weighted_score_no_ai"):
+        assert stages[stage]["runs"] == 1
+    assert results["load"]["errors"] == 0
+    assert results["load"]["requests"] == 2
+
+def test_load_test_does_full_work_per_request():
+    """Test that without the cache no request is served from a store or coalesced with another."""
+    executed = benchmark.app.in_flight_analyses.stats()["executed"]
+    stored = benchmark.app.document_store.stats()
+    load = benchmark.run_load_test(pages=1, requests=3, concurrency=3, ai_latency=0)
+    assert load["errors"] == 0
+    assert benchmark.app.in_flight_analyses.stats()["executed"] - executed == 3
+    assert benchmark.app.document_store.stats()["hits"] == stored["hits"]
+
+def test_compare_flags_regressions():
+    """Test that slower medians beyond the threshold are reported."""
+    baseline = {"micro": {"1_pages": {"check_formatting": {"median_ms": 10.0}}}}
+    current = {"micro": {"1_pages": {"pdf_bytes": 100, "check_formatting": {"median_ms": 15.0}}}}
+    assert benchmark.compare(current, baseline, 0.2)[0]["benchmark"] == "1_pages.check_formatting"
+    assert benchmark.compare(current, baseline, 0.6) == []
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
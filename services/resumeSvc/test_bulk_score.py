@@ -0,0 +1,90 @@
+import pytest
+import json
+from reportlab.pdfgen import canvas
+from unittest import mock
+import app
+import bulk_score
+
+def write_pdf(path, lines):
+    pdf = canvas.Canvas(str(path))
+    for offset, line in enumerate(lines):
+        pdf.drawString(100, 750 - 20 * offset, line)
+    pdf.save()
+
+@pytest.fixture
+def archive(tmp_path):
+    """A directory of two resumes (one nested) and one unreadable file."""
+    root = tmp_path / "resumes"
+    (root / "2024").mkdir(parents=True)
+    write_pdf(root / "a.pdf", ["Skills: Python, React", "Experience: 5 years at Tech Corp"])
+    write_pdf(root / "2024" / "b.pdf", ["Skills: Java", "Education: BS Computer Science"])
+    (root / "broken.pdf").write_bytes(b"not a pdf")
+    (root / "notes.txt").write_text("ignored")
+    return root
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+def test_iter_resume_paths_from_directory_and_manifest(archive, tmp_path):
+    """Test recursive, sorted directory discovery and manifest paths relative to the manifest."""
+    assert [path[len(str(archive)) + 1:] for path in bulk_score.iter_resume_paths(str(archive))] == [
+        "a.pdf", "broken.pdf", "2024/b.pdf"
+    ]
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("# archive\nresumes/a.pdf\n\nresumes/2024/b.pdf\n")
+    assert list(bulk_score.iter_resume_paths(str(manifest))) == [
+        str(tmp_path / "resumes" / "a.pdf"), str(tmp_path / "resumes" / "2024" / "b.pdf")
+    ]
+
+def test_bulk_score_writes_ndjson_per_resume(archive, tmp_path, capsys):
+    """Test that every resume is scored against every job description in a worker process."""
+    output = tmp_path / "scores.ndjson"
+    exit_code = bulk_score.main([
+        str(archive), "--job-description", "Python developer. Required Skills: Python, React",
+        "--job-description", "Java developer. Required Skills: Java", "--output", str(output), "--processes", "1",
+    ])
+    assert exit_code == 0
+    records = {record["path"].rsplit("/", 1)[-1]: record for record in read_records(output)}
+    assert set(records) == {"a.pdf", "b.pdf", "broken.pdf"}
+    assert "PDF extraction failed" in records["broken.pdf"]["error"]
+    scores = records["a.pdf"]["scores"]
+    assert [score["job_description"] for score in scores] == [0, 1]
+    assert float(scores[0]["ats_score"].rstrip("%")) > float(scores[1]["ats_score"].rstrip("%"))
+    assert "Python" in scores[0]["data"]["skills"]
+    assert json.loads(capsys.readouterr().err.strip().splitlines()[-1])["scored"] == 2
+
+def test_each_resume_is_extracted_once_for_all_job_descriptions(archive, tmp_path):
+    """Test that scoring against several job descriptions does not re-extract the resume per job."""
+    output = tmp_path / "scores.ndjson"
+    job_args = []
+    for index in range(4):
+        job_args += ["--job-description", f"Role {index}. Required Skills: Python, Java"]
+    with mock.patch.object(app, "extract_resume_data", wraps=app.extract_resume_data) as extract:
+        assert bulk_score.main([str(archive), *job_args, "--output", str(output), "--processes", "0"]) == 0
+    assert extract.call_count == 2
+    records = {record["path"].rsplit("/", 1)[-1]: record for record in read_records(output)}
+    scores = records["a.pdf"]["scores"]
+    assert [score["job_description"] for score in scores] == [0, 1, 2, 3]
+    assert scores[0]["improvement_suggestions"]
+
+def test_resume_continues_an_interrupted_run(archive, tmp_path, capsys):
+    """Test that --resume keeps complete lines, drops a half-written one and scores the rest once."""
+    output = tmp_path / "scores.ndjson"
+    args = [str(archive), "--job-description", "Python developer", "--output", str(output), "--processes", "0"]
+    assert bulk_score.main(args) == 0
+    first_line, second_line = output.read_text().splitlines()[:2]
+    output.write_text(first_line + "\n" + second_line[:20])
+
+    assert bulk_score.main(args + ["--resume"]) == 0
+    records = read_records(output)
+    assert len(records) == 3
+    assert len({record["path"] for record in records}) == 3
+    assert records[0] == json.loads(first_line)
+    assert json.loads(capsys.readouterr().err.strip().splitlines()[-1])["skipped"] == 1
+
+def test_requires_a_job_description(archive):
+    with pytest.raises(SystemExit):
+        bulk_score.main([str(archive)])
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
@@ -0,0 +1,53 @@
+import pytest
+import time
+from extraction import extract_certifications, extract_education, extract_experience
+
+def test_extract_experience():
+    """Test years and roles, including "N+ years" phrasing."""
+    total, relevant = extract_experience("3 years of experience in data engineering. 2 yrs in machine learning.")
+    assert total == 5
+    assert relevant == {"data engineering": 3, "machine learning": 2}
+
+    total, relevant = extract_experience("Requires 5+ years experience.")
+    assert total == 5
+    assert relevant == {"general": 5}
+
+def test_extract_experience_stops_at_section_words():
+    """Test that a role phrase does not run into the next section."""
+    _, relevant = extract_experience("Experience: 5 years at Tech Corp Education: BS Computer Science")
+    assert relevant == {"at Tech Corp": 5}
+
+def test_extract_education():
+    """Test degree normalization and fields with and without "in"."""
+    assert extract_education("Education: BS Computer Science Certifications: AWS") == ["BS in Computer Science"]
+    assert extract_education("Master's in Statistics") == ["MS in Statistics"]
+    assert extract_education("Graduated with a degree in computer science") == ["BS in Computer Science"]
+
+def test_extract_education_ignores_degree_letters_inside_words():
+    """Test that "ms"/"bs" inside other words are not read as degrees."""
+    assert extract_education("Designed distributed systems and programs") == []
+
+def test_extract_certifications():
+    """Test listed, named and AWS certifications across lines and bullets."""
+    text = """
+    Certifications:
+    - AWS Certified Solutions Architect
+    - Certified Kubernetes Administrator
+    """
+    assert extract_certifications(text) == [
+        "AWS Certified Solutions Architect", "Kubernetes Administrator", "AWS Certified"
+    ]
+    assert extract_certifications("Amazon certified developer.") == ["developer", "AWS Certified"]
+    assert extract_certifications("No relevant credentials.") == []
+
+def test_long_unpunctuated_text_stays_linear():
+    """Test that a long resume without punctuation does not trigger heavy backtracking."""
+    text = ("certification bs in " + "word " * 50) * 2000
+    start = time.perf_counter()
+    extract_certifications(text)
+    extract_education(text)
+    extract_experience(text)
+    assert time.perf_counter() - start < 2
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
@@ -0,0 +1,206 @@
+import pytest
+import threading
+import time
+from unittest import mock
+import httpx
+import jobs
+from jobs import JobManager, InMemoryJobStore, SQLiteJobStore
+
+def wait_for(manager, job_id, statuses=(jobs.COMPLETED, jobs.FAILED), timeout=5):
+    """Poll a job until it reaches one of the given statuses."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryJobStore()
+    return SQLiteJobStore(str(tmp_path / "jobs.db"))
+
+def test_job_completes_with_partial_result(store):
+    """Test that partial and final results are recorded."""
+    release = threading.Event()
+
+    def analysis(value, on_partial=None):
+        on_partial({"stage": "local", "value": value})
+        release.wait(5)
+        return {"value": value * 2}
+
+    manager = JobManager(store, max_workers=1)
+    job_id = manager.submit(analysis, 21)
+
+    job = wait_for(manager, job_id, statuses=(jobs.RUNNING,))
+    deadline = time.time() + 5
+    while manager.get(job_id)["partial"] is None and time.time() < deadline:
+        time.sleep(0.01)
+    assert manager.get(job_id)["partial"] == {"stage": "local", "value": 21}
+    assert manager.get(job_id)["result"] is None
+
+    release.set()
+    job = wait_for(manager, job_id)
+    assert job["status"] == jobs.COMPLETED
+    assert job["result"] == {"value": 42}
+
+def test_job_failure_is_recorded(store):
+    """Test that an exception marks the job failed with its message."""
+    def analysis(on_partial=None):
+        raise ValueError("Empty or unreadable resume text")
+
+    manager = JobManager(store)
+    job = wait_for(manager, manager.submit(analysis))
+    assert job["status"] == jobs.FAILED
+    assert job["error"] == "Empty or unreadable resume text"
+
+def test_unknown_job(store):
+    """Test that an unknown id returns None."""
+    assert JobManager(store).get("missing") is None
+
+def test_callback_receives_finished_job():
+    """Test that the callback URL is posted the final job record."""
+    manager = JobManager(InMemoryJobStore())
+    with mock.patch.object(jobs, "send_callback") as post, \
+            mock.patch.object(jobs, "resolve_host", return_value={"93.184.216.34"}):
+        job_id = manager.submit(lambda on_partial=None: {"ok": True}, callback_url="http://example.test/hook")
+        wait_for(manager, job_id)
+        deadline = time.time() + 5
+        while not post.called and time.time() < deadline:
+            time.sleep(0.01)
+    url, address, payload, _ = post.call_args.args
+    assert url == "http://example.test/hook"
+    assert address == "93.184.216.34"
+    assert payload["id"] == job_id
+    assert payload["result"] == {"ok": True}
+
+@pytest.mark.parametrize("url, addresses", [
+    ("http://169.254.169.254/latest/meta-data", {"169.254.169.254"}),
+    ("http://localhost:5000/hook", {"127.0.0.1"}),
+    ("http://internal.example.com/hook", {"10.0.0.5"}),
+    ("http://rebound.example.com/hook", {"93.184.216.34", "192.168.1.1"}),
+    ("http://ipv6.example.com/hook", {"::1"}),
+    ("ftp://example.com/hook", {"93.184.216.34"}),
+])
+def test_callback_to_non_public_address_is_rejected(url, addresses):
+    """Test that callbacks cannot target loopback, private, link-local or metadata addresses."""
+    manager = JobManager(InMemoryJobStore())
+    with mock.patch.object(jobs, "resolve_host", return_value=addresses), \
+            pytest.raises(jobs.InvalidCallbackUrl):
+        manager.submit(lambda on_partial=None: None, callback_url=url)
+    assert manager.stats()["pending"] == 0
+
+def test_callback_host_allowlist():
+    """Test exact and subdomain allowlist entries."""
+    with mock.patch.object(jobs, "resolve_host", return_value={"93.184.216.34"}):
+        jobs.check_callback_url("https://hooks.example.com/x", [".example.com"])
+        jobs.check_callback_url("https://partner.test/x", ["partner.test"])
+        with pytest.raises(jobs.InvalidCallbackUrl):
+            jobs.check_callback_url("https://evil.test/x", [".example.com", "partner.test"])
+
+def test_callback_is_rechecked_before_sending():
+    """Test that a host resolving to a private address by completion time is not called."""
+    manager = JobManager(InMemoryJobStore())
+    resolved = [{"93.184.216.34"}, {"10.0.0.1"}]
+    with mock.patch.object(jobs, "send_callback") as post, \
+            mock.patch.object(jobs, "resolve_host", side_effect=lambda host, port: resolved.pop(0)):
+        job_id = manager.submit(lambda on_partial=None: {"ok": True}, callback_url="http://flaky.test/hook")
+        wait_for(manager, job_id)
+        deadline = time.time() + 5
+        while manager.stats()["pending"] and time.time() < deadline:
+            time.sleep(0.01)
+    post.assert_not_called()
+
+def test_callback_connects_to_the_checked_address():
+    """Test that the POST goes to the address that passed the check, so DNS rebinding cannot redirect it."""
+    request = jobs.pinned_request("https://user@hooks.example.com:8443/hook?x=1", "93.184.216.34", {"id": "1"})
+    assert str(request.url) == "https://93.184.216.34:8443/hook?x=1"
+    assert request.headers["Host"] == "hooks.example.com:8443"
+    assert request.extensions["sni_hostname"] == "hooks.example.com"
+    assert request.read() == b'{"id": "1"}'
+    request = jobs.pinned_request("http://hooks.example.com/hook", "2606:2800:220:1::1", {})
+    assert request.url.host == "2606:2800:220:1::1"
+    assert request.headers["Host"] == "hooks.example.com"
+    assert "sni_hostname" not in request.extensions
+
+    sent = []
+    transport = httpx.MockTransport(lambda request: sent.append(request) or httpx.Response(204))
+    client = httpx.Client
+    with mock.patch.object(jobs.httpx, "Client", lambda **kwargs: client(transport=transport, **kwargs)):
+        jobs.send_callback("http://hooks.example.com/hook", "93.184.216.34", {"id": "1"}, 5)
+    assert sent[0].url.host == "93.184.216.34"
+
+def test_submissions_beyond_max_pending_are_rejected():
+    """Test that queued and running jobs are capped and slots free up as jobs finish."""
+    manager = JobManager(InMemoryJobStore(), max_workers=1, max_pending=2)
+    release = threading.Event()
+    job_ids = [manager.submit(lambda on_partial=None: release.wait(5)) for _ in range(2)]
+    with pytest.raises(jobs.JobQueueFull):
+        manager.submit(lambda on_partial=None: None)
+    release.set()
+    for job_id in job_ids:
+        wait_for(manager, job_id)
+    deadline = time.time() + 5
+    while manager.stats()["pending"] and time.time() < deadline:
+        time.sleep(0.01)
+    assert manager.stats() == {"pending": 0, "max_pending": 2}
+    wait_for(manager, manager.submit(lambda on_partial=None: {"ok": True}))
+
+def test_sqlite_store_survives_restart(tmp_path):
+    """Test that a new store instance sees jobs written by an earlier one."""
+    db_path = str(tmp_path / "jobs.db")
+    manager = JobManager(SQLiteJobStore(db_path))
+    job_id = manager.submit(lambda on_partial=None: {"ok": True})
+    wait_for(manager, job_id)
+
+    assert SQLiteJobStore(db_path).get(job_id)["result"] == {"ok": True}
+
+def test_jobs_interrupted_by_restart_are_failed(tmp_path):
+    """Test that jobs left queued or running by an exited process are failed and their callbacks notified."""
+    import os
+    import socket
+    import subprocess
+    import sys
+    db_path = str(tmp_path / "jobs.db")
+    exited = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    host = socket.gethostname()
+    earlier_processes = {
+        "dead_pid": f"{host}:{int(exited.stdout)}:old",
+        "reused_pid": f"{host}:{os.getpid()}:old",
+        "other_host": f"elsewhere:{os.getpid()}:old",
+    }
+    store = SQLiteJobStore(db_path)
+    for job_id, token in earlier_processes.items():
+        with mock.patch.object(jobs, "process_token", return_value=token):
+            store.create({"id": job_id, "status": jobs.RUNNING, "created_at": 1, "updated_at": 1,
+                          "callback_url": "http://example.test/hook" if job_id == "dead_pid" else None})
+    manager = JobManager(SQLiteJobStore(db_path))
+    release = threading.Event()
+    live_job = manager.submit(lambda on_partial=None: release.wait(5))
+
+    with mock.patch.object(manager, "_notify") as notify:
+        assert sorted(manager.recover_interrupted()) == ["dead_pid", "reused_pid"]
+        deadline = time.time() + 5
+        while notify.call_count < 2 and time.time() < deadline:
+            time.sleep(0.01)
+    assert sorted(call.args[0] for call in notify.call_args_list) == ["dead_pid", "reused_pid"]
+    assert manager.get("dead_pid")["status"] == jobs.FAILED
+    assert manager.get("dead_pid")["error"] == jobs.INTERRUPTED
+    assert manager.get("other_host")["status"] == jobs.RUNNING
+    assert manager.get(live_job)["status"] in (jobs.QUEUED, jobs.RUNNING)
+    release.set()
+    assert wait_for(manager, live_job)["status"] == jobs.COMPLETED
+    assert InMemoryJobStore().fail_interrupted(jobs.INTERRUPTED) == []
+
+def test_in_memory_store_is_bounded():
+    """Test that the oldest jobs are dropped beyond max_jobs."""
+    store = InMemoryJobStore(max_jobs=2)
+    for job_id in ("a", "b", "c"):
+        store.create({"id": job_id, "status": jobs.QUEUED})
+    assert store.get("a") is None
+    assert store.get("c")["status"] == jobs.QUEUED
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
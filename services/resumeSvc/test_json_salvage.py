@@ -0,0 +1,71 @@
+import pytest
+import json
+from json_salvage import close_truncated_json, conform_to_schema, parse_json_lenient, strip_code_fences
+from stub_xai import DEFAULT_RESPONSE
+
+def test_strip_code_fences():
+    """Test fenced replies with and without a language tag or closing fence."""
+    assert strip_code_fences('```json\n{"a": 1}\n```') .strip() == '{"a": 1}'
+    assert strip_code_fences('Result:\n```\n{"a": 1}\n```\nThanks').strip() == '{"a": 1}'
+    assert strip_code_fences('```json\n{"a": 1').strip() == '{"a": 1'
+    assert strip_code_fences('{"a": 1}') == '{"a": 1}'
+
+def test_clean_and_wrapped_replies():
+    """Test that prose around a complete object is ignored without repair."""
+    expected = json.loads(DEFAULT_RESPONSE)
+    assert parse_json_lenient(DEFAULT_RESPONSE) == (expected, False)
+    assert parse_json_lenient("Here is the analysis:\n" + DEFAULT_RESPONSE + "\nLet me know!") == (expected, False)
+    assert parse_json_lenient("```json\n" + DEFAULT_RESPONSE + "\n```") == (expected, False)
+
+def test_every_truncation_is_salvaged():
+    """Test that any prefix of a reply parses to an object keeping only complete values."""
+    expected = json.loads(DEFAULT_RESPONSE)
+    for cut in range(1, len(DEFAULT_RESPONSE)):
+        obj, repaired = parse_json_lenient(DEFAULT_RESPONSE[:cut])
+        assert repaired and isinstance(obj, dict), cut
+        for key, value in obj.items():
+            assert key in expected
+            if not isinstance(value, (dict, list)):
+                assert value == expected[key]
+
+def test_close_truncated_json():
+    """Test cuts inside strings, numbers, keys and nested containers."""
+    assert close_truncated_json('{"a": [1, 2, "unfinished') == '{"a": [1, 2]}'
+    assert close_truncated_json('{"a": 1.5') == '{}'
+    assert close_truncated_json('{"a": 1, "b') == '{"a": 1}'
+    assert close_truncated_json('{"a": {"b": [{"c": 1}, {"d":') == '{"a": {"b": [{"c": 1}, {}]}}'
+    assert close_truncated_json('{"a": "x\\"y"') == '{"a": "x\\"y"}'
+    assert parse_json_lenient("I'm sorry, I can't help with that.") == (None, False)
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "skills": {"type": "array", "items": {"type": "object", "properties": {"name": {"type": "string"}},
+                                              "required": ["name"]}},
+        "years": {"type": "number"},
+        "score": {"type": "string"},
+        "breakdown": {"type": "object", "properties": {"skills": {"type": "number"}}, "required": ["skills"]},
+    },
+    "required": ["skills", "breakdown"],
+}
+
+def test_conform_to_schema():
+    """Test coercion, dropping of bad values and filling of required fields."""
+    value, problems = conform_to_schema(
+        {"skills": [{"name": "Python"}, "React", {"level": 3}], "years": "7", "score": 85, "extra": True},
+        SCHEMA,
+    )
+    assert value == {
+        "skills": [{"name": "Python"}, {"level": 3, "name": ""}], "years": 7.0, "score": "85", "extra": True,
+        "breakdown": {"skills": 0},
+    }
+    assert "$.skills[1]: expected object" in problems
+    assert "$.breakdown: missing" in problems
+
+    value, problems = conform_to_schema({"skills": [], "breakdown": {"skills": "n/a"}, "years": "40%"}, SCHEMA)
+    assert value["breakdown"] == {"skills": 0}
+    assert value["years"] == 40.0
+    assert conform_to_schema([], SCHEMA)[0] is None
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
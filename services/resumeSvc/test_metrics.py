@@ -0,0 +1,63 @@
+import pytest
+from metrics import MetricsRegistry, collect_stage_timings, server_timing_header, timed_stage
+
+def test_counter_render():
+    """Test labelled counter values and their exposition format."""
+    registry = MetricsRegistry()
+    fallbacks = registry.counter("ai_fallback", "AI fallbacks.", ["mode"])
+    fallbacks.inc(mode="sync")
+    fallbacks.inc(2, mode="stream")
+    assert fallbacks.value(mode="stream") == 2
+    body = registry.render()
+    assert "# TYPE ai_fallback counter" in body
+    assert 'ai_fallback_total{mode="sync"} 1' in body
+    assert 'ai_fallback_total{mode="stream"} 2' in body
+    with pytest.raises(ValueError):
+        fallbacks.inc(-1, mode="sync")
+    with pytest.raises(ValueError):
+        fallbacks.inc(kind="sync")
+
+def test_histogram_buckets_are_cumulative():
+    """Test bucket counts, sum and count of a histogram."""
+    registry = MetricsRegistry()
+    stages = registry.histogram("stage_seconds", "Stage time.", ["stage"], buckets=(0.1, 1))
+    for value in (0.05, 0.5, 5):
+        stages.observe(value, stage="pdf_parse")
+    body = registry.render()
+    assert 'stage_seconds_bucket{stage="pdf_parse",le="0.1"} 1' in body
+    assert 'stage_seconds_bucket{stage="pdf_parse",le="1"} 2' in body
+    assert 'stage_seconds_bucket{stage="pdf_parse",le="+Inf"} 3' in body
+    assert 'stage_seconds_sum{stage="pdf_parse"} 5.55' in body
+    assert 'stage_seconds_count{stage="pdf_parse"} 3' in body
+
+def test_label_values_are_escaped():
+    """Test that quotes and newlines in label values are escaped."""
+    registry = MetricsRegistry()
+    registry.counter("errors", "Errors.", ["message"]).inc(message='bad "x"\n')
+    assert 'errors_total{message="bad \\"x\\"\\n"} 1' in registry.render()
+
+def test_duplicate_metric_is_rejected():
+    """Test that a metric name can only be registered once."""
+    registry = MetricsRegistry()
+    registry.counter("requests", "Requests.")
+    with pytest.raises(ValueError):
+        registry.histogram("requests", "Requests.")
+
+def test_stage_timings_collection():
+    """Test that timed stages feed the histogram and the collecting context only."""
+    registry = MetricsRegistry()
+    stages = registry.histogram("stage_seconds", "Stage time.", ["stage"])
+    with collect_stage_timings() as timings:
+        with timed_stage(stages, "pdf_parse"):
+            pass
+        with timed_stage(stages, "pdf_parse"):
+            pass
+    with timed_stage(stages, "prompt_build"):
+        pass
+    assert list(timings) == ["pdf_parse"]
+    assert stages.count(stage="pdf_parse") == 2
+    assert stages.count(stage="prompt_build") == 1
+    assert server_timing_header({"pdf_parse": 0.0123}) == "pdf_parse;dur=12.3"
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
@@ -0,0 +1,72 @@
+import pytest
+import random
+from near_duplicates import MinHasher, NearDuplicateIndex, estimate_jaccard, lsh_bands, shingles
+
+VOCABULARY = ("python react aws docker kubernetes led team built services reduced latency "
+              "designed pipelines mentored engineers shipped features improved reliability").split()
+
+def make_resume(seed, words=200):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(VOCABULARY) + str(rng.randint(0, 50)) for _ in range(words))
+
+def edit(text, word_index, replacement="golang"):
+    words = text.split()
+    words[word_index] = replacement
+    return " ".join(words)
+
+def test_shingles():
+    """Test word shingling, including texts shorter than one shingle."""
+    assert shingles("Python, React and AWS", size=3) == {"python react and", "react and aws"}
+    assert shingles("Python", size=3) == {"python"}
+    assert shingles("", size=3) == set()
+
+def test_lsh_bands_favor_recall_at_threshold():
+    """Test that the band split keeps the collision midpoint at or below the threshold."""
+    bands, rows = lsh_bands(128, 0.9)
+    assert bands * rows == 128
+    assert (bands, rows) == (8, 16)
+    assert (1 / bands) ** (1 / rows) <= 0.9
+
+def test_signatures_estimate_jaccard():
+    """Test that signature agreement tracks shingle Jaccard similarity and is deterministic."""
+    hasher = MinHasher(num_perm=256)
+    original = make_resume(1)
+    edited = edit(original, 100)
+    exact = len(shingles(original) & shingles(edited)) / len(shingles(original) | shingles(edited))
+    similarity = estimate_jaccard(hasher.signature(original), hasher.signature(edited))
+    assert abs(similarity - exact) < 0.1
+    assert (MinHasher(num_perm=256).signature(original) == hasher.signature(original)).all()
+    assert estimate_jaccard(hasher.signature(original), hasher.signature(make_resume(2))) < 0.2
+
+def test_index_finds_near_duplicates_within_namespace():
+    """Test that a lightly edited resume matches, an unrelated one or another job does not."""
+    index = NearDuplicateIndex(threshold=0.8)
+    original = make_resume(1)
+    index.add("first", index.signature(original), {"result_key": "ai:first"}, namespace="job-a")
+
+    key, similarity, value = index.find(index.signature(edit(original, 50)), namespace="job-a")
+    assert key == "first"
+    assert similarity >= 0.8
+    assert value == {"result_key": "ai:first"}
+    assert index.find(index.signature(edit(original, 50)), namespace="job-b") is None
+    assert index.find(index.signature(make_resume(3)), namespace="job-a") is None
+    assert index.stats()["hits"] == 1
+    assert index.stats()["misses"] == 2
+
+def test_index_evicts_least_recently_used():
+    """Test that the index stays within max_entries and discard removes entries."""
+    index = NearDuplicateIndex(threshold=0.8, max_entries=2)
+    resumes = [make_resume(seed) for seed in range(3)]
+    for seed, text in enumerate(resumes[:2]):
+        index.add(seed, index.signature(text), seed)
+    assert index.find(index.signature(resumes[0]))[0] == 0
+    index.add(2, index.signature(resumes[2]), 2)
+    assert index.find(index.signature(resumes[1])) is None
+    assert index.stats()["evictions"] == 1
+
+    index.discard(0)
+    assert index.find(index.signature(resumes[0])) is None
+    assert index.stats()["entries"] == 1
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
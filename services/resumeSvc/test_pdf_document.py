@@ -0,0 +1,110 @@
+import pytest
+import io
+import json
+from unittest import mock
+from reportlab.pdfgen import canvas
+import pdf_document
+from pdf_document import (
+    ParsedDocument, merge_documents, page_ranges, parse_page_range, parse_page_text, parse_pdf
+)
+
+def create_pdf(pages):
+    """Create a PDF with one drawString line per entry on each page."""
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer)
+    for lines in pages:
+        y = 750
+        for line in lines:
+            p.drawString(100, y, line)
+            y -= 20
+        p.showPage()
+    p.save()
+    buffer.seek(0)
+    return buffer
+
+def test_parse_page_text_normalizes_whitespace():
+    """Test that page text is collapsed and layout markers are detected."""
+    page = parse_page_text("  Skills:\n\tPython   Table of contents ")
+    assert page.text == "Skills: Python Table of contents"
+    assert page.word_count == 5
+    assert page.mentions_layout is True
+
+def test_parse_page_text_handles_missing_text():
+    """Test that a page without extractable text yields an empty page."""
+    page = parse_page_text(None)
+    assert page.text == ""
+    assert page.word_count == 0
+    assert page.mentions_layout is False
+
+def test_parse_pdf_collects_every_page():
+    """Test that a multi-page PDF is parsed into per-page text."""
+    pdf_file = create_pdf([["John Doe", "Software Engineer"], ["Skills: Python, React"]])
+    document = parse_pdf(pdf_file)
+
+    assert isinstance(document, ParsedDocument)
+    assert document.page_count == 2
+    assert document.word_counts == [4, 3]
+    assert document.text == "John Doe Software Engineer Skills: Python, React"
+
+def test_parse_pdf_builds_a_single_reader():
+    """Test that parsing constructs exactly one PdfReader."""
+    pdf_file = create_pdf([["John Doe"]])
+    with mock.patch.object(pdf_document, "PdfReader", wraps=pdf_document.PdfReader) as reader:
+        document = parse_pdf(pdf_file)
+        document.text
+        document.word_counts
+    assert reader.call_count == 1
+
+def test_parse_pdf_invalid_file():
+    """Test that invalid PDF bytes raise from the parser."""
+    with pytest.raises(Exception):
+        parse_pdf(io.BytesIO(b"This is not a PDF file"))
+
+def test_parse_pdf_caps_pages_and_page_text():
+    """Test that pages past max_pages and text past max_page_chars are dropped."""
+    pdf = create_pdf([["Page %d Python developer" % n] for n in range(5)])
+    document = parse_pdf(pdf, max_pages=2, max_page_chars=10)
+    assert document.page_count == 2
+    assert document.truncated is True
+    assert all(len(page.text) <= 10 for page in document.pages)
+
+    pdf.seek(0)
+    assert parse_pdf(pdf).truncated is False
+
+def test_parse_pdf_stops_at_char_budget():
+    """Test that extraction stops once the character budget is reached."""
+    pdf = create_pdf([["Page %d Python developer" % n] for n in range(5)])
+    document = parse_pdf(pdf, max_chars=30)
+    assert document.page_count == 2
+    assert document.truncated is True
+
+def test_page_ranges():
+    """Test that pages are split into contiguous, covering ranges."""
+    assert page_ranges(10, 3) == [(0, 4), (4, 8), (8, 10)]
+    assert page_ranges(2, 4) == [(0, 1), (1, 2)]
+    assert page_ranges(5, 1) == [(0, 5)]
+
+def test_merged_page_ranges_match_whole_parse():
+    """Test that parsing page ranges and merging them equals a single parse."""
+    pdf = create_pdf([["Page %d Python developer" % n] for n in range(7)])
+    whole = parse_pdf(pdf)
+    parts = []
+    for start, stop in page_ranges(7, 3):
+        pdf.seek(0)
+        parts.append(parse_page_range(pdf, start, stop))
+    assert merge_documents(parts) == whole
+
+    merged = merge_documents(parts, max_chars=30)
+    assert merged.page_count == 2
+    assert merged.truncated is True
+
+def test_document_round_trips_through_dict():
+    """Test that a stored parse is restored unchanged."""
+    document = parse_pdf(create_pdf([["Python developer"], ["Table of skills"]]), max_pages=1)
+    restored = ParsedDocument.from_dict(json.loads(json.dumps(document.to_dict())))
+    assert restored == document
+    assert restored.truncated is True
+    assert restored.text == document.text
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
@@ -0,0 +1,78 @@
+import pytest
+import os
+import time
+from metrics import Histogram, collect_stage_timings, record_stage_timings, timed_stage
+from process_pool import ExtractionPool
+
+CHILD_SECONDS = Histogram("child_stage_seconds", "Stage timings of the child", ["stage"])
+
+_initialized = False
+
+def mark_initialized():
+    global _initialized
+    _initialized = True
+
+def child_info():
+    return os.getpid(), _initialized
+
+def fail():
+    raise ValueError("Empty or unreadable resume text")
+
+def crash_once(marker_path):
+    if not os.path.exists(marker_path):
+        open(marker_path, "w").close()
+        os._exit(1)
+    return "recovered"
+
+def timed_child_work():
+    with timed_stage(CHILD_SECONDS, "pdf_parse"):
+        time.sleep(0.01)
+    return os.getpid()
+
+def test_child_stage_timings_reach_the_parent():
+    """Test that stage timings recorded in a child are observed in the parent and the caller's context."""
+    parent_seconds = Histogram("parent_stage_seconds", "Stage timings replayed in the parent", ["stage"])
+    pool = ExtractionPool(
+        max_workers=1, on_stage_timings=lambda timings: record_stage_timings(parent_seconds, timings)
+    )
+    try:
+        with collect_stage_timings() as timings:
+            assert pool.run(timed_child_work) != os.getpid()
+            assert pool.submit(timed_child_work).result() != os.getpid()
+    finally:
+        pool.shutdown()
+    assert parent_seconds.count(stage="pdf_parse") == 2
+    assert timings["pdf_parse"] >= 0.02
+
+def test_disabled_pool_runs_inline():
+    """Test that max_workers=0 runs work on the calling thread."""
+    pool = ExtractionPool(max_workers=0, initializer=mark_initialized)
+    assert pool.run(child_info) == (os.getpid(), False)
+    assert pool.submit(child_info).result() == (os.getpid(), False)
+    with pytest.raises(ValueError):
+        pool.submit(fail).result()
+
+def test_work_runs_in_initialized_child():
+    """Test that work runs in a child process that ran the initializer."""
+    pool = ExtractionPool(max_workers=1, initializer=mark_initialized)
+    try:
+        pid, initialized = pool.run(child_info)
+        assert pid != os.getpid()
+        assert initialized
+        with pytest.raises(ValueError, match="unreadable"):
+            pool.run(fail)
+        assert pool.stats()["submitted"] == 2
+    finally:
+        pool.shutdown()
+
+def test_broken_pool_is_restarted(tmp_path):
+    """Test that a child dying mid-task restarts the pool and retries once."""
+    pool = ExtractionPool(max_workers=1)
+    try:
+        assert pool.run(crash_once, str(tmp_path / "crashed")) == "recovered"
+        assert pool.stats()["restarts"] == 1
+    finally:
+        pool.shutdown()
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
@@ -0,0 +1,92 @@
+import pytest
+import json
+from prompt_budget import (
+    TRUNCATION_MARKER, compact_json, count_tokens, dedupe_text, estimate_output_tokens,
+    fit_sections, strip_job_boilerplate, truncate_to_tokens
+)
+
+def test_count_tokens():
+    """Test that token counts grow with the text and are zero for empty text."""
+    assert count_tokens("") == 0
+    assert 0 < count_tokens("Python developer") < count_tokens("Python developer " * 20)
+
+def test_strip_job_boilerplate():
+    """Test that EEO and benefits sentences are dropped and role content is kept."""
+    job_desc = (
+        "We are hiring a Senior Python Engineer. You will build APIs with Django.\n"
+        "We offer competitive salary and paid time off. "
+        "Acme is an equal opportunity employer and considers applicants without regard to race."
+    )
+    stripped = strip_job_boilerplate(job_desc)
+    assert "Senior Python Engineer" in stripped
+    assert "Django" in stripped
+    assert "equal opportunity" not in stripped
+    assert "paid time off" not in stripped
+
+def test_dedupe_text():
+    """Test that repeated sentences and extra whitespace are removed."""
+    text = "John Doe   Resume. Built APIs in Python. John Doe Resume. Led a team of 5."
+    assert dedupe_text(text) == "John Doe Resume. Built APIs in Python. Led a team of 5."
+
+def test_compact_json():
+    """Test that JSON is serialized without indentation or spaces."""
+    data = {"skills": ["Python", "React"], "total_experience_years": 5}
+    compact = compact_json(data)
+    assert json.loads(compact) == data
+    assert len(compact) < len(json.dumps(data, indent=2))
+    assert " " not in compact
+
+def test_truncate_to_tokens():
+    """Test that long text is cut to the limit and marked."""
+    text = "python " * 500
+    truncated = truncate_to_tokens(text, 50)
+    assert truncated.endswith(TRUNCATION_MARKER)
+    assert count_tokens(truncated) <= 50
+    assert truncate_to_tokens("short", 50) == "short"
+
+def test_fit_sections_cuts_lowest_priority_first():
+    """Test that low-priority sections shrink before high-priority ones."""
+    resume = "resume " * 200
+    job = "job " * 200
+    local = "local " * 200
+    sections = [
+        {"name": "resume", "text": resume, "priority": 3, "min_tokens": 100},
+        {"name": "job", "text": job, "priority": 2, "min_tokens": 50},
+        {"name": "local", "text": local, "priority": 1},
+    ]
+    budget = count_tokens(resume) + count_tokens(job) + 20
+    fitted = fit_sections(sections, budget)
+
+    assert fitted["resume"] == resume
+    assert fitted["job"] == job
+    assert count_tokens(fitted["local"]) <= 20
+    assert sum(count_tokens(text) for text in fitted.values()) <= budget
+
+def test_fit_sections_ignores_floors_when_needed():
+    """Test that floors give way when the budget is smaller than their sum."""
+    sections = [
+        {"name": "resume", "text": "resume " * 200, "priority": 2, "min_tokens": 300},
+        {"name": "job", "text": "job " * 200, "priority": 1, "min_tokens": 300},
+    ]
+    fitted = fit_sections(sections, 100)
+    assert sum(count_tokens(text) for text in fitted.values()) <= 100
+
+def test_fit_sections_within_budget_is_unchanged():
+    """Test that sections already under budget are returned as is."""
+    sections = [{"name": "resume", "text": "Python developer", "priority": 1}]
+    assert fit_sections(sections, 1000) == {"resume": "Python developer"}
+
+def test_estimate_output_tokens():
+    """Test that the output cap scales with the schema's lists and stays between the floor and ceiling."""
+    small = estimate_output_tokens('{"score": number}')
+    large = estimate_output_tokens('{"a": [string], "b": [string], "c": [string]}')
+    assert small < large
+    assert estimate_output_tokens('{"a": [string]}' * 100, ceiling=500) == 500
+    assert estimate_output_tokens('{"score": number}', floor=2000) == 2000
+
+def test_app_output_cap_not_below_previous_fixed_cap():
+    import app
+    assert app.AI_MAX_OUTPUT_TOKENS >= 2000
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
@@ -0,0 +1,130 @@
+import hashlib
+import pytest
+from unittest import mock
+import result_cache
+from result_cache import ResultCache, job_description_digest, result_cache_key
+
+SAMPLE_RESULT = {"ats_score": "72.50%", "data": {"skills": ["Python", "React"]}}
+
+def test_job_description_digest_is_normalized():
+    """Test that whitespace and case changes map to the same digest."""
+    assert job_description_digest("Senior  Python\nEngineer ") == job_description_digest("senior python engineer")
+    assert job_description_digest("Python engineer") != job_description_digest("Java engineer")
+
+def test_cache_key_separates_modes():
+    """Test that AI and local results for the same inputs do not collide."""
+    resume_hash = hashlib.sha256(b"%PDF-1.4").hexdigest()
+    job_hash = job_description_digest("Python engineer")
+    assert result_cache_key(resume_hash, job_hash, "ai") != result_cache_key(resume_hash, job_hash, "local")
+
+def test_get_and_set():
+    """Test hits, misses and that cached results are returned as copies."""
+    cache = ResultCache()
+    assert cache.get("key") is None
+
+    cache.set("key", SAMPLE_RESULT)
+    cached = cache.get("key")
+    assert cached == SAMPLE_RESULT
+    cached["ats_score"] = "0.00%"
+    assert cache.get("key") == SAMPLE_RESULT
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+def test_lru_eviction_by_entries():
+    """Test that the least recently used entry is evicted first."""
+    cache = ResultCache(max_entries=2)
+    cache.set("a", {"value": 1})
+    cache.set("b", {"value": 2})
+    cache.get("a")
+    cache.set("c", {"value": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"value": 1}
+    assert cache.get("c") == {"value": 3}
+    assert cache.stats()["evictions"] == 1
+
+def test_eviction_by_bytes():
+    """Test that the byte bound is enforced and oversized results are skipped."""
+    cache = ResultCache(max_bytes=40)
+    cache.set("a", {"text": "x" * 20})
+    cache.set("b", {"text": "y" * 20})
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+    assert cache.stats()["bytes"] <= 40
+
+    cache.set("huge", {"text": "z" * 100})
+    assert cache.get("huge") is None
+
+def test_ttl_expiry():
+    """Test that entries expire after the TTL."""
+    cache = ResultCache(ttl_seconds=10)
+    with mock.patch.object(result_cache.time, "time", return_value=1000.0):
+        cache.set("key", SAMPLE_RESULT)
+    with mock.patch.object(result_cache.time, "time", return_value=1005.0):
+        assert cache.get("key") == SAMPLE_RESULT
+    with mock.patch.object(result_cache.time, "time", return_value=1011.0):
+        assert cache.get("key") is None
+
+def test_disk_tier_survives_restart(tmp_path):
+    """Test that the SQLite tier serves results to a fresh cache instance."""
+    db_path = str(tmp_path / "results.db")
+    ResultCache(db_path=db_path).set("key", SAMPLE_RESULT)
+
+    restarted = ResultCache(db_path=db_path)
+    assert restarted.get("key") == SAMPLE_RESULT
+    assert restarted.stats()["disk_hits"] == 1
+    # Promoted into memory on the first disk hit
+    assert restarted.get("key") == SAMPLE_RESULT
+    assert restarted.stats()["hits"] == 1
+
+def test_disk_tier_keeps_byte_budget_with_running_total(tmp_path):
+    """Test that the disk tier evicts least recently used rows and tracks its size without scanning."""
+    db_path = str(tmp_path / "results.db")
+    cache = ResultCache(max_bytes=100, db_path=db_path)
+    for key in ("a", "b", "c", "d"):
+        cache.set(key, {"text": key * 20})
+    db = cache._connection()
+    keys = [row[0] for row in db.execute("SELECT key FROM results ORDER BY accessed_at")]
+    total = db.execute("SELECT total FROM results_size").fetchone()[0]
+    assert keys == ["b", "c", "d"]  # 31 bytes each
+    assert total == db.execute("SELECT SUM(LENGTH(payload)) FROM results").fetchone()[0] <= 100
+    cache.set("d", {"text": "e"})
+    assert db.execute("SELECT total FROM results_size").fetchone()[0] == \
+        db.execute("SELECT SUM(LENGTH(payload)) FROM results").fetchone()[0]
+    plan = " ".join(str(row) for row in db.execute("EXPLAIN QUERY PLAN SELECT key FROM results ORDER BY accessed_at LIMIT 1"))
+    assert "results_accessed_at" in plan
+
+def test_disk_tier_upgrades_tables_without_size_column(tmp_path):
+    """Test that a results table written by an older release gets its size column and total."""
+    import sqlite3
+    db_path = str(tmp_path / "results.db")
+    db = sqlite3.connect(db_path)
+    db.execute("CREATE TABLE results (key TEXT PRIMARY KEY, payload TEXT NOT NULL, expires_at REAL NOT NULL, "
+               "accessed_at REAL NOT NULL)")
+    db.execute("INSERT INTO results VALUES ('key', ?, 9e12, 0)", ('{"ats_score":"72.50%"}',))
+    db.commit()
+    db.close()
+    cache = ResultCache(db_path=db_path)
+    assert cache.get("key") == {"ats_score": "72.50%"}
+    assert cache._connection().execute("SELECT total FROM results_size").fetchone()[0] == len('{"ats_score":"72.50%"}')
+
+def test_memory_hits_do_not_wait_on_the_disk_tier(tmp_path):
+    """Test that the in-memory tier answers while SQLite work holds the disk lock."""
+    cache = ResultCache(db_path=str(tmp_path / "results.db"))
+    cache.set("key", SAMPLE_RESULT)
+    with cache._db_lock:
+        assert cache.get("key") == SAMPLE_RESULT
+
+def test_clear(tmp_path):
+    """Test that clear empties both tiers."""
+    cache = ResultCache(db_path=str(tmp_path / "results.db"))
+    cache.set("key", SAMPLE_RESULT)
+    cache.clear()
+    assert cache.get("key") is None
+    assert cache.stats()["bytes"] == 0
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
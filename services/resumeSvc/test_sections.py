@@ -0,0 +1,57 @@
+import pytest
+from sections import CONTACT, diff_sections, find_headings, merge_extractions, segment_resume
+
+RESUME = ("Jane Roe jane@example.com SUMMARY Backend engineer who likes Python. "
+          "Work Experience: 5 years of experience in backend development at Acme "
+          "Education: BS Computer Science Skills: Python, Docker Certifications: AWS Certified")
+
+def test_headings_need_a_colon_or_capitals():
+    """Test that lower-case mentions of section words are not taken as headings."""
+    assert [name for _, name in find_headings(RESUME)] == [
+        "summary", "experience", "education", "skills", "certifications"
+    ]
+    assert find_headings("I have 5 years of experience and strong skills") == []
+
+def test_segment_resume():
+    """Test that text splits into the contact block and one entry per section."""
+    sections = segment_resume(RESUME)
+    assert list(sections) == [CONTACT, "summary", "experience", "education", "skills", "certifications"]
+    assert sections[CONTACT] == "Jane Roe jane@example.com"
+    assert sections["experience"].startswith("Work Experience:")
+    assert sections["skills"] == "Skills: Python, Docker"
+    assert " ".join(sections.values()) == RESUME
+
+def test_repeated_sections_are_joined():
+    """Test that a section split across pages is one section."""
+    sections = segment_resume("Skills: Python EXPERIENCE Acme Skills: Go")
+    assert sections == {"skills": "Skills: Python Skills: Go", "experience": "EXPERIENCE Acme"}
+    assert segment_resume("no headings here") == {CONTACT: "no headings here"}
+
+def test_diff_sections():
+    """Test that changed, unchanged and removed sections are told apart."""
+    previous = segment_resume(RESUME)
+    current = segment_resume(RESUME.replace("5 years", "6 years").replace(" Certifications: AWS Certified", ""))
+    changed, unchanged, removed = diff_sections(previous, current)
+    assert changed == ["experience"]
+    assert unchanged == [CONTACT, "summary", "education", "skills"]
+    assert removed == ["certifications"]
+
+def test_merge_extractions():
+    """Test that per-section results merge into one whole-resume result."""
+    merged = merge_extractions([
+        {"skills": ["Python"], "total_experience_years": 3, "relevant_experience": {"backend": 3},
+         "education": [], "certifications": ["AWS Certified"]},
+        {"skills": ["Docker", "Python"], "total_experience_years": 2, "relevant_experience": {"backend": 2},
+         "education": ["BS in Computer Science"], "certifications": ["AWS Certified"], "organizations": ["Acme"]},
+    ])
+    assert merged == {
+        "skills": ["Python", "Docker"],
+        "total_experience_years": 5,
+        "relevant_experience": {"backend": 5},
+        "education": ["BS in Computer Science"],
+        "certifications": ["AWS Certified"],
+        "organizations": ["Acme"],
+    }
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
@@ -0,0 +1,89 @@
+import pytest
+import os
+import pickle
+from unittest import mock
+from semantic_scorer import SemanticScorer, build_vectorizer
+
+CORPUS = [
+    "python django flask backend api development",
+    "react javascript frontend css html",
+    "docker kubernetes terraform devops cloud",
+    "machine learning tensorflow pytorch data science",
+]
+
+def test_similarity_matrix_shape_and_ranking():
+    """Test that each resume is most similar to the matching posting."""
+    scorer = SemanticScorer(bootstrap_corpus=CORPUS)
+    resumes = ["Backend developer with Python and Django APIs", "Kubernetes and Terraform on the cloud"]
+    jobs = ["Python backend API engineer", "DevOps engineer: Docker, Kubernetes, Terraform", "Frontend React role"]
+
+    scores = scorer.similarity(resumes, jobs)
+
+    assert scores.shape == (2, 3)
+    assert scores[0].argmax() == 0
+    assert scores[1].argmax() == 1
+    assert ((scores >= 0) & (scores <= 1 + 1e-9)).all()
+
+def test_job_vectors_are_cached():
+    """Test that repeated job descriptions are only vectorized once."""
+    scorer = SemanticScorer(bootstrap_corpus=CORPUS)
+    scorer.similarity(["python"], ["Python backend"])
+    with mock.patch.object(scorer.vectorizer, "transform", wraps=scorer.vectorizer.transform) as transform:
+        scorer.similarity(["python"], ["Python backend", "Python backend"])
+    # Only the resume is transformed; the job row comes from the cache
+    assert transform.call_count == 1
+
+def test_job_cache_is_bounded():
+    """Test that cached job vectors are evicted beyond the bound."""
+    scorer = SemanticScorer(bootstrap_corpus=CORPUS, max_cached_jobs=2)
+    scorer.job_matrix(["python", "react", "docker"])
+    assert len(scorer._job_vectors) == 2
+
+def test_terms_outside_the_corpus_count():
+    """Test that words the corpus never saw still make texts similar."""
+    scorer = SemanticScorer(bootstrap_corpus=CORPUS)
+    scores = scorer.similarity(["Rust firmware for embedded devices"], ["Embedded Rust firmware engineer", "Chef"])
+    assert scores[0, 0] > 0.3
+    assert scores[0, 1] == 0
+
+def test_model_is_persisted_and_reloaded(tmp_path):
+    """Test that a fitted model is saved without pickle and reused by a new scorer."""
+    model_path = str(tmp_path / "tfidf.npy")
+    first = SemanticScorer(bootstrap_corpus=CORPUS, model_path=model_path)
+    expected = first.similarity(["python django"], ["python backend"])
+    assert os.path.exists(model_path)
+    with open(model_path, "rb") as model_file:
+        assert not model_file.read().startswith(b"\x80")  # not a pickle stream
+
+    second = SemanticScorer(model_path=model_path)
+    assert (second.vectorizer[-1].idf_ == first.vectorizer[-1].idf_).all()
+    assert second.similarity(["python django"], ["python backend"]) == pytest.approx(expected)
+
+def test_pickled_model_is_never_loaded(tmp_path):
+    """Test that a pickle at the model path is ignored and replaced by a freshly fitted model."""
+    model_path = tmp_path / "tfidf.pkl"
+    model_path.write_bytes(pickle.dumps(build_vectorizer().fit(CORPUS)))
+    with mock.patch("pickle.load") as load, mock.patch("pickle.loads") as loads:
+        scorer = SemanticScorer(bootstrap_corpus=CORPUS, model_path=str(model_path))
+        assert scorer.similarity(["python"], ["python"])[0, 0] == pytest.approx(1.0)
+    assert not load.called and not loads.called
+    assert SemanticScorer(model_path=str(model_path)).vectorizer[-1].idf_.shape == scorer.vectorizer[-1].idf_.shape
+
+def test_fit_from_corpus_file(tmp_path):
+    """Test that a corpus file adds its documents to the IDF statistics."""
+    corpus_path = tmp_path / "corpus.txt"
+    corpus_path.write_text("rust embedded firmware\n\nelixir phoenix\n")
+    scorer = SemanticScorer(bootstrap_corpus=CORPUS, corpus_path=str(corpus_path))
+    hashing, tfidf = scorer.vectorizer
+    column = lambda term: hashing.transform([term]).indices[0]
+    # Terms in the corpus are more common than unseen ones, so they weigh less
+    assert tfidf.idf_[column("firmware")] < tfidf.idf_[column("cobol")]
+    assert tfidf.idf_[column("python")] < tfidf.idf_[column("cobol")]
+
+def test_empty_inputs():
+    """Test that empty inputs produce an empty matrix."""
+    scorer = SemanticScorer(bootstrap_corpus=CORPUS)
+    assert scorer.similarity([], ["python"]).shape == (0, 1)
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
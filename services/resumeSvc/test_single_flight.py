@@ -0,0 +1,52 @@
+import pytest
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from single_flight import SingleFlight
+
+def test_concurrent_calls_share_one_execution():
+    """Test that callers with the same key get the result of a single run."""
+    flight = SingleFlight()
+    calls = []
+
+    def slow(value):
+        calls.append(value)
+        time.sleep(0.2)
+        return {"value": value}
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        results = list(pool.map(lambda _: flight.do("key", slow, 1), range(5)))
+    assert calls == [1]
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"in_flight": 0, "executed": 1, "coalesced": 4}
+
+def test_different_keys_run_separately():
+    """Test that distinct keys are not coalesced, and finished keys run again."""
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
+    assert flight.do("a", lambda: 3) == 3
+    assert flight.stats()["executed"] == 3
+
+def test_exception_is_shared():
+    """Test that waiting callers receive the leader's exception."""
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.2)
+        raise ValueError("PDF extraction failed")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "key", failing)
+        started.wait()
+        follower = pool.submit(flight.do, "key", failing)
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result()
+    assert flight.stats()["executed"] == 1
+    assert flight.stats()["in_flight"] == 0
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
@@ -0,0 +1,52 @@
+import pytest
+from skill_matcher import SkillMatcher, get_skill_matcher
+
+TAXONOMY = {"python", "java", "javascript", "go", "google cloud", "c++", "node.js", "machine learning", "sql", "nosql"}
+
+def test_matches_preserve_surface_form_and_offsets():
+    """Test that matches report canonical skill, original case and offsets."""
+    text = "Built APIs in Python and Node.js"
+    matches = list(SkillMatcher(TAXONOMY).finditer(text))
+
+    assert [(m.skill, m.surface) for m in matches] == [("python", "Python"), ("node.js", "Node.js")]
+    for match in matches:
+        assert text[match.start:match.end] == match.surface
+
+def test_respects_word_boundaries():
+    """Test that short skills do not match inside longer words."""
+    found = SkillMatcher(TAXONOMY).first_matches("Worked at Google on JavaScript and NoSQL stores")
+    assert "go" not in found
+    assert "java" not in found
+    assert "sql" not in found
+    assert set(found) == {"javascript", "nosql"}
+
+def test_prefers_longest_skill():
+    """Test that overlapping skills resolve to the longest match."""
+    found = SkillMatcher(TAXONOMY).first_matches("Deployed on Google Cloud, wrote Go services")
+    assert found["google cloud"].surface == "Google Cloud"
+    assert found["go"].surface == "Go"
+
+def test_symbols_and_whitespace():
+    """Test skills with punctuation and multi-word skills split across lines."""
+    found = SkillMatcher(TAXONOMY).first_matches("C++, Machine\n  Learning.")
+    assert found["c++"].surface == "C++"
+    assert found["machine learning"].surface == "Machine\n  Learning"
+
+def test_first_match_per_skill():
+    """Test that only the first occurrence of each skill is kept."""
+    found = SkillMatcher(TAXONOMY).first_matches("python, Python, PYTHON")
+    assert len(found) == 1
+    assert found["python"].surface == "python"
+    assert found["python"].start == 0
+
+def test_empty_inputs():
+    """Test that empty taxonomies and texts produce no matches."""
+    assert SkillMatcher(set()).first_matches("Python") == {}
+    assert SkillMatcher(TAXONOMY).first_matches("") == {}
+
+def test_get_skill_matcher_is_memoized():
+    """Test that the same skill set reuses one compiled matcher."""
+    assert get_skill_matcher(frozenset(TAXONOMY)) is get_skill_matcher(frozenset(TAXONOMY))
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
@@ -0,0 +1,97 @@
+import pytest
+import json
+import random
+import time
+import httpx
+from openai import OpenAI, RateLimitError, InternalServerError
+from ai_client import AIRunner
+from stub_xai import DEFAULT_RESPONSE, StubConfig, parse_latency, start_in_thread
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**config):
+        server, base_url = start_in_thread(StubConfig(**config))
+        servers.append(server)
+        return base_url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def chat(base_url, **kwargs):
+    client = OpenAI(api_key="test", base_url=base_url, max_retries=0)
+    return client.chat.completions.create(
+        model="grok-2-latest", messages=[{"role": "user", "content": "Analyze this resume"}], **kwargs
+    )
+
+def test_parse_latency():
+    """Test the supported distributions and rejection of bad specs."""
+    rng = random.Random(0)
+    assert parse_latency("fixed:0.25")(rng) == 0.25
+    assert all(0.1 <= parse_latency("uniform:0.1,0.2")(rng) <= 0.2 for _ in range(50))
+    assert all(parse_latency("normal:0,1")(rng) >= 0 for _ in range(50))
+    assert parse_latency("lognormal:-1,0.5")(rng) > 0
+    with pytest.raises(ValueError):
+        parse_latency("gamma:1,2")
+    with pytest.raises(ValueError):
+        parse_latency("uniform:1")
+
+def test_completion_round_trip(stub):
+    """Test a plain completion with the canned reply and usage counts."""
+    completion = chat(stub())
+    assert json.loads(completion.choices[0].message.content) == json.loads(DEFAULT_RESPONSE)
+    assert completion.usage.prompt_tokens > 0
+    assert completion.usage.completion_tokens > 0
+
+def test_latency_is_applied(stub):
+    """Test that the configured latency delays the reply."""
+    base_url = stub(latency="fixed:0.2")
+    start = time.perf_counter()
+    chat(base_url)
+    assert time.perf_counter() - start >= 0.2
+
+def test_injected_failures(stub):
+    """Test 429 with Retry-After and 500 injection."""
+    with pytest.raises(RateLimitError) as error:
+        chat(stub(rate_limit_rate=1.0, retry_after=3))
+    assert error.value.response.headers["retry-after"] == "3"
+    with pytest.raises(InternalServerError):
+        chat(stub(error_rate=1.0))
+
+def test_malformed_and_fenced_replies(stub):
+    """Test that malformed replies are not valid JSON and fenced ones are wrapped."""
+    base_url = stub(malformed_rate=1.0, seed=1)
+    for _ in range(5):
+        with pytest.raises(json.JSONDecodeError):
+            json.loads(chat(base_url).choices[0].message.content)
+
+    content = chat(stub(fenced_rate=1.0)).choices[0].message.content
+    assert content.startswith("```json\n") and content.endswith("\n```")
+
+def test_streaming(stub):
+    """Test that a streamed reply reassembles into the canned content."""
+    stream = chat(stub(stream_chunk_chars=25), stream=True)
+    content = "".join(chunk.choices[0].delta.content or "" for chunk in stream)
+    assert content == DEFAULT_RESPONSE
+
+def test_stats_endpoint(stub):
+    """Test that the stub counts what it served."""
+    base_url = stub(fenced_rate=1.0)
+    chat(base_url)
+    stats = httpx.get(base_url.rsplit("/v1", 1)[0] + "/stats").json()
+    assert stats["requests"] == 1
+    assert stats["fenced"] == 1
+
+def test_ai_runner_against_stub(stub):
+    """Test that the service's AI runner talks to the stub under concurrency."""
+    runner = AIRunner(api_key="test", base_url=stub(latency="fixed:0.1"), max_concurrency=4, timeout=10)
+    futures = [runner.submit(runner.create_completion, model="grok-2-latest",
+                             messages=[{"role": "user", "content": "hi"}]) for _ in range(8)]
+    for future in futures:
+        assert future.result(timeout=10).choices[0].message.content == DEFAULT_RESPONSE
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
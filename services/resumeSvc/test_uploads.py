@@ -0,0 +1,58 @@
+import pytest
+import hashlib
+import io
+import os
+import pickle
+from pypdf import PdfReader
+from reportlab.pdfgen import canvas
+from uploads import SpooledUpload, UploadTooLarge, spool_upload
+
+def create_pdf_bytes():
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer)
+    p.drawString(100, 750, "Skills: Python")
+    p.save()
+    return buffer.getvalue()
+
+def test_small_upload_stays_in_memory():
+    """Test that uploads under the threshold are held as bytes with their digest."""
+    data = create_pdf_bytes()
+    upload = spool_upload(io.BytesIO(data), max_bytes=len(data), memory_threshold=len(data))
+    assert upload.path is None
+    assert upload.data == data
+    assert upload.digest == hashlib.sha256(data).hexdigest()
+    assert upload == SpooledUpload.from_bytes(data)
+
+def test_large_upload_is_spooled_and_memory_mapped(tmp_path):
+    """Test that larger uploads go to a temp file that pypdf reads through mmap."""
+    data = create_pdf_bytes()
+    upload = spool_upload(io.BytesIO(data), max_bytes=len(data), memory_threshold=10, spool_dir=str(tmp_path))
+    assert upload.data is None
+    assert os.path.dirname(upload.path) == str(tmp_path)
+    assert upload.size == len(data)
+    assert upload.digest == hashlib.sha256(data).hexdigest()
+    assert upload.read_bytes() == data
+    with upload.open() as pdf_file:
+        assert "Python" in PdfReader(pdf_file).pages[0].extract_text()
+    # Pickles as the path, not the bytes
+    assert pickle.loads(pickle.dumps(upload)).read_bytes() == data
+
+    with upload:
+        path = upload.path
+    assert not os.path.exists(path)
+    assert upload.path is None
+
+def test_oversized_upload_is_rejected(tmp_path):
+    """Test that the size limit is enforced and no temp file is left behind."""
+    with pytest.raises(UploadTooLarge):
+        spool_upload(io.BytesIO(b"x" * 200_000), max_bytes=100_000, memory_threshold=10, spool_dir=str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+def test_empty_upload():
+    """Test that an empty upload opens as an empty file."""
+    upload = spool_upload(io.BytesIO(b""), max_bytes=10)
+    assert upload.size == 0
+    assert upload.read_bytes() == b""
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
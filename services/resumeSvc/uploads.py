@@ -0,0 +1,106 @@
+"""Size-bounded spooling of uploaded resumes.
+
+An upload is copied in chunks, with its digest computed on the way, and kept
+in memory only while it is small. Larger uploads go to a temp file that
+pypdf reads through a read-only memory map, so the page cache holds the
+bytes rather than the worker's heap. Uploads over the size limit are
+rejected partway through the copy.
+
+A SpooledUpload pickles as its digest plus either the bytes or the temp
+file path, so it can be handed to the extraction process pool cheaply.
+"""
+import hashlib
+import io
+import logging
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """The upload is larger than the configured limit."""
+
+
+@dataclass
+class SpooledUpload:
+    """An uploaded file held in memory (data) or in a temp file (path)."""
+    digest: str
+    size: int
+    data: bytes = None
+    path: str = None
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(digest=hashlib.sha256(data).hexdigest(), size=len(data), data=data)
+
+    @contextmanager
+    def open(self):
+        """Yield a readable, seekable file object over the upload."""
+        if self.path is None or self.size == 0:
+            yield io.BytesIO(self.data or b"")
+            return
+        with open(self.path, "rb") as spool_file, \
+                mmap.mmap(spool_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+    def read_bytes(self):
+        with self.open() as upload_file:
+            return upload_file.read()
+
+    def close(self):
+        """Remove the temp file, if any."""
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def spool_upload(stream, max_bytes, memory_threshold=1024 * 1024, spool_dir=None):
+    """Copy a file stream into a SpooledUpload, raising UploadTooLarge past max_bytes."""
+    hasher = hashlib.sha256()
+    buffer = io.BytesIO()
+    spool_file = None
+    size = 0
+    try:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(f"Resume file exceeds the {max_bytes} byte limit")
+            hasher.update(chunk)
+            if spool_file is None and size > memory_threshold:
+                spool_file = tempfile.NamedTemporaryFile(
+                    prefix="resume-", suffix=".pdf", dir=spool_dir, delete=False
+                )
+                spool_file.write(buffer.getvalue())
+                buffer = None
+            if spool_file is not None:
+                spool_file.write(chunk)
+            else:
+                buffer.write(chunk)
+    except BaseException:
+        if spool_file is not None:
+            spool_file.close()
+            os.unlink(spool_file.name)
+        raise
+
+    if spool_file is None:
+        return SpooledUpload(digest=hasher.hexdigest(), size=size, data=buffer.getvalue())
+    spool_file.close()
+    return SpooledUpload(digest=hasher.hexdigest(), size=size, path=spool_file.name)
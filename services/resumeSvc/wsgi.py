@@ -0,0 +1,9 @@
+"""Production entry point: gunicorn -c gunicorn.conf.py wsgi:application
+
+Importing this module warms the models. With preload_app (the default in
+gunicorn.conf.py) that happens once in the master before workers fork.
+"""
+from app import app, warm_up
+
+warm_up()
+application = app